@@ -0,0 +1,32 @@
+import inspect
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable
+from typing import Any
+
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+
+
+async def run_repo(fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+    """
+    Calls a repository method from async code.
+
+    Coroutine methods (async repos) are awaited on the event loop; blocking methods
+    (sync repos) are run in the threadpool so they do not stall it.
+    """
+    if inspect.iscoroutinefunction(fn):
+        return await fn(*args, **kwargs)
+    return await run_in_threadpool(fn, *args, **kwargs)
+
+
+async def iterate_repo(
+    rows: Iterable[Any] | AsyncIterable[Any],
+) -> AsyncIterator[Any]:
+    """
+    Iterates rows streamed by a repository from async code, pulling each row of a
+    blocking (sync repo) iterator in the threadpool.
+    """
+    if isinstance(rows, AsyncIterable):
+        async for row in rows:
+            yield row
+    else:
+        async for row in iterate_in_threadpool(rows):
+            yield row
@@ -13,6 +13,29 @@ class Settings(BaseSettings):
     jwt_auth_algorithm: str
     jwt_auth_expires: int
     jwt_refresh_expires: int
+    http_timeout: float = 10.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_http2: bool = False
+    currency_api_url: str = "https://api.freecurrencyapi.com/v1"
+    currency_cache_ttl: float = 900.0
+    currency_cache_max_entries: int = 128
+    currency_cache_max_stale: float = 86400.0
+    currency_refresh_interval: float = 600.0
+    currency_api_timeout: float = 3.0
+    currency_retry_attempts: int = 3
+    currency_retry_backoff: float = 0.2
+    currency_retry_backoff_max: float = 2.0
+    currency_breaker_failures: int = 5
+    currency_breaker_reset: float = 30.0
+    currency_hedge_percentile: float | None = None
+    currency_history_days: int = 730
+    home_currency: str = "JPY"
+    firestore_async: bool = False
+    transaction_cache_ttl: float = 30.0
+    transaction_cache_max_entries: int = 4096
+    transaction_version_ttl: float = 5.0
     model_config = SettingsConfigDict(env_file=".env")
 
 
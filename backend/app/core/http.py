@@ -1,9 +1,91 @@
+from typing import final, override
+
 import httpx
+from fastapi import Request
+
+from app.core.config import Settings
+from app.models.metrics_models import HTTPPoolStats
+
+
+@final
+class PoolStatsTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the pooled transport and records how the connection pool is used.
+    """
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport):
+        self._transport = transport
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    @override
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await self._transport.handle_async_request(request)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    @override
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def stats(self) -> HTTPPoolStats:
+        # httpx does not expose its httpcore pool publicly; read it defensively.
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        return HTTPPoolStats(
+            requests=self.requests,
+            errors=self.errors,
+            in_flight=self.in_flight,
+            peak_in_flight=self.peak_in_flight,
+            connections=len(connections),
+            idle_connections=sum(1 for conn in connections if conn.is_idle()),
+        )
+
+
+@final
+class HTTPClientPool:
+    """
+    Process-wide outbound HTTP client owned by the application lifespan.
+
+    A single `httpx.AsyncClient` keeps TCP/TLS connections alive between requests,
+    so calls to external APIs only pay the handshake once per pooled connection.
+    """
+
+    def __init__(self, settings: Settings):
+        limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        )
+        self.transport = PoolStatsTransport(
+            # HTTP/2 uses `h2`, installed with the `httpx[http2]` dependency.
+            httpx.AsyncHTTPTransport(limits=limits, http2=settings.http_http2)
+        )
+        self.client = httpx.AsyncClient(
+            transport=self.transport,
+            timeout=settings.http_timeout,
+            headers={"Accept": "application/json"},
+        )
+
+    def stats(self) -> HTTPPoolStats:
+        return self.transport.stats()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def get_http_pool(request: Request) -> HTTPClientPool:
+    return request.app.state.http_pool
 
 
-async def get_http_client():
-    async with httpx.AsyncClient(
-        timeout=10.0,
-        headers={"Accept": "application/json"},
-    ) as client:
-        yield client
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    return get_http_pool(request).client
@@ -0,0 +1,83 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from google.cloud import firestore
+
+from app.core.config import get_settings
+from app.core.http import HTTPClientPool
+from app.dependencies.db import create_firestore_client
+from app.infrastructure.currency_api import CurrencyAPIClient
+from app.infrastructure.rate_cache import RateCache
+from app.infrastructure.rate_history import RateHistory
+from app.infrastructure.rate_refresher import RateRefresher
+from app.infrastructure.resilience import CircuitBreaker, ResiliencePolicy
+from app.infrastructure.transaction_cache import TransactionCache
+from app.repo.rate_repo import RateRepo
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+
+    app.state.http_pool = HTTPClientPool(settings)
+    app.state.firestore = create_firestore_client(settings)
+    app.state.rate_cache = RateCache(
+        ttl=settings.currency_cache_ttl,
+        max_entries=settings.currency_cache_max_entries,
+        max_stale=settings.currency_cache_max_stale,
+    )
+    app.state.currency_policy = ResiliencePolicy(
+        CircuitBreaker(
+            failure_threshold=settings.currency_breaker_failures,
+            reset_timeout=settings.currency_breaker_reset,
+        ),
+        max_attempts=settings.currency_retry_attempts,
+        backoff_base=settings.currency_retry_backoff,
+        backoff_max=settings.currency_retry_backoff_max,
+        hedge_percentile=settings.currency_hedge_percentile,
+    )
+    app.state.rate_history = RateHistory()
+    # A non-positive TTL disables caching of transaction reads.
+    app.state.transaction_cache = None
+    if settings.transaction_cache_ttl > 0:
+        app.state.transaction_cache = TransactionCache(
+            ttl=settings.transaction_cache_ttl,
+            max_entries=settings.transaction_cache_max_entries,
+            version_ttl=settings.transaction_version_ttl,
+        )
+
+    # A non-positive interval disables scheduled refreshes (e.g. in tests).
+    refresher: RateRefresher | None = None
+    history_db: firestore.Client | None = None
+    if settings.currency_refresh_interval > 0:
+        # RateRepo is synchronous, so it needs a sync client even in async mode.
+        if isinstance(app.state.firestore, firestore.Client):
+            history_db = app.state.firestore
+        else:
+            history_db = firestore.Client(project=settings.gcp_project_id)
+        refresher = RateRefresher(
+            CurrencyAPIClient(
+                app.state.http_pool.client,
+                settings.currency_api_key,
+                app.state.rate_cache,
+                app.state.currency_policy,
+                settings.currency_api_timeout,
+                settings.currency_api_url,
+            ),
+            settings.currency_refresh_interval,
+            app.state.rate_history,
+            RateRepo(history_db),
+            settings.currency_history_days,
+        )
+        refresher.start()
+
+    try:
+        yield
+    finally:
+        if refresher is not None:
+            await refresher.stop()
+        if history_db is not None and history_db is not app.state.firestore:
+            history_db.close()
+        app.state.firestore.close()
+        await app.state.http_pool.aclose()
@@ -1,10 +1,16 @@
-from typing import Annotated
-from fastapi import Depends
+from fastapi import Request
 from google.cloud import firestore
-from app.core.config import Settings, get_settings
+from app.core.config import Settings
 
+FirestoreClient = firestore.Client | firestore.AsyncClient
 
-def get_firestore_client(
-    settings: Annotated[Settings, Depends(get_settings)],
-) -> firestore.Client:
+
+def create_firestore_client(settings: Settings) -> FirestoreClient:
+    if settings.firestore_async:
+        return firestore.AsyncClient(project=settings.gcp_project_id)
     return firestore.Client(project=settings.gcp_project_id)
+
+
+def get_firestore_client(request: Request) -> FirestoreClient:
+    # Created once in the app lifespan; clients are thread-safe and reuse their channel.
+    return request.app.state.firestore
@@ -1,20 +1,41 @@
 from typing import Annotated
-from fastapi import Depends
+from fastapi import Depends, Request
 import httpx
 
 from app.core import http
 from app.core import config
 from app.infrastructure.currency_api import CurrencyAPIClient
+from app.infrastructure.rate_cache import RateCache
+from app.infrastructure.rate_history import RateHistory
+from app.infrastructure.resilience import ResiliencePolicy
 
 
 # Currency api related dependencies
 
 
+def get_rate_cache(request: Request) -> RateCache:
+    return request.app.state.rate_cache
+
+
+def get_rate_history(request: Request) -> RateHistory:
+    return request.app.state.rate_history
+
+
+def get_currency_policy(request: Request) -> ResiliencePolicy:
+    return request.app.state.currency_policy
+
+
 def get_currency_api(
     client: Annotated[httpx.AsyncClient, Depends(http.get_http_client)],
     settings: Annotated[config.Settings, Depends(config.get_settings)],
+    cache: Annotated[RateCache, Depends(get_rate_cache)],
+    policy: Annotated[ResiliencePolicy, Depends(get_currency_policy)],
 ):
     return CurrencyAPIClient(
         client,
         settings.currency_api_key,
+        cache,
+        policy,
+        settings.currency_api_timeout,
+        settings.currency_api_url,
     )
@@ -1,24 +1,67 @@
 from typing import Annotated
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from google.cloud import firestore
 
+from app.core.config import Settings, get_settings
 from app.dependencies.auth import get_current_user_id
-from app.dependencies.db import get_firestore_client
+from app.dependencies.db import FirestoreClient, get_firestore_client
+from app.dependencies.external import get_rate_history
+from app.infrastructure.rate_history import RateHistory
+from app.infrastructure.transaction_cache import TransactionCacheBackend
+from app.repo.async_transaction_repo import AsyncTransactionRepo
+from app.repo.async_user_repo import AsyncUserRepo
+from app.repo.cached_transaction_repo import (
+    AnyTransactionRepo,
+    CachedTransactionRepo,
+)
 from app.repo.transaction_repo import TransactionRepo
 from app.repo.user_repo import UserRepo
 from app.services.auth_service import AuthService
+from app.services.exchange_rate_service import ExchangeRateService
 from app.services.transaction_service import TransactionService
 
 
-def get_transaction_service(
-    db: Annotated[firestore.Client, Depends(get_firestore_client)],
+def get_exchange_rate_service(
+    history: Annotated[RateHistory, Depends(get_rate_history)],
+    settings: Annotated[Settings, Depends(get_settings)],
+) -> ExchangeRateService:
+    return ExchangeRateService(history, settings.home_currency)
+
+
+def get_transaction_cache(request: Request) -> TransactionCacheBackend | None:
+    return request.app.state.transaction_cache
+
+
+def get_transaction_repo(
+    db: Annotated[FirestoreClient, Depends(get_firestore_client)],
     user_id: Annotated[str, Depends(get_current_user_id)],
+    cache: Annotated[
+        TransactionCacheBackend | None, Depends(get_transaction_cache)
+    ] = None,
+) -> AnyTransactionRepo:
+    repo: TransactionRepo | AsyncTransactionRepo
+    if isinstance(db, firestore.AsyncClient):
+        repo = AsyncTransactionRepo(db, user_id)
+    else:
+        repo = TransactionRepo(db, user_id)
+    if cache is None:
+        return repo
+    return CachedTransactionRepo(repo, cache, user_id)
+
+
+def get_transaction_service(
+    repo: Annotated[AnyTransactionRepo, Depends(get_transaction_repo)],
+    rates: Annotated[
+        ExchangeRateService | None, Depends(get_exchange_rate_service)
+    ] = None,
 ) -> TransactionService:
-    return TransactionService(TransactionRepo(db, user_id))
+    return TransactionService(repo, rates)
 
 
 def get_auth_service(
-    db: Annotated[firestore.Client, Depends(get_firestore_client)],
+    db: Annotated[FirestoreClient, Depends(get_firestore_client)],
 ) -> AuthService:
+    if isinstance(db, firestore.AsyncClient):
+        return AuthService(AsyncUserRepo(db))
     return AuthService(UserRepo(db))
@@ -0,0 +1,21 @@
+from typing import override
+
+
+class CurrencyError(Exception):
+    """Base class for currency error"""
+
+
+class UnsupportedCurrencyError(CurrencyError):
+    def __init__(self, currency: str):
+        super().__init__(currency)
+        self.currency = currency
+
+    @override
+    def __str__(self):
+        return f"The currency {self.currency} is not supported by the rate provider."
+
+
+class CircuitOpenError(CurrencyError):
+    @override
+    def __str__(self):
+        return "The currency API is temporarily unavailable. Please try again later."
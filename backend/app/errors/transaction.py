@@ -9,3 +9,36 @@ class TransactionNotExists(TransactionError):
     @override
     def __str__(self):
         return "The target transaction does not exist."
+
+
+class InvalidCursorError(TransactionError):
+    @override
+    def __str__(self):
+        return "The pagination cursor is invalid."
+
+
+class SummaryTooLargeError(TransactionError):
+    def __init__(self, buckets: int, limit: int):
+        super().__init__(buckets, limit)
+        self.buckets = buckets
+        self.limit = limit
+
+    @override
+    def __str__(self):
+        return (
+            f"The summary would have {self.buckets} buckets; at most {self.limit} "
+            "are allowed. Narrow the date range or the categories."
+        )
+
+
+class QueryTooBroadError(TransactionError):
+    def __init__(self, scanned: int):
+        super().__init__(scanned)
+        self.scanned = scanned
+
+    @override
+    def __str__(self):
+        return (
+            f"The search read {self.scanned} transactions without filling the page. "
+            "Narrow the date range or combine fewer filters."
+        )
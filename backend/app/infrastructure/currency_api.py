@@ -1,24 +1,68 @@
-from typing import final
+from datetime import date
+from typing import Any, final
 from pydantic_extra_types.currency_code import Currency
 import httpx
 
+from app.infrastructure.rate_cache import RateCache
+from app.infrastructure.rate_table import RateTable
+from app.infrastructure.resilience import ResiliencePolicy
+
 
 @final
 class CurrencyAPIClient:
-    def __init__(self, client: httpx.AsyncClient, api_key: str):
-        self.url = "https://api.freecurrencyapi.com/v1/latest"
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_key: str,
+        cache: RateCache | None = None,
+        policy: ResiliencePolicy | None = None,
+        timeout: float | None = None,
+        base_url: str = "https://api.freecurrencyapi.com/v1",
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.url = f"{self.base_url}/latest"
         self.client = client
         self.api_key = api_key
+        self.cache = cache
+        self.policy = policy
+        self.timeout = timeout
+
+    async def get_rate_table(self) -> RateTable:
+        """
+        Returns the complete USD-based rate table, fetched with a single upstream call.
+
+        When a cache is configured, the table is reused until it expires, and concurrent
+        misses share one upstream request. An expired table is still returned while a
+        background refresh is running or failing, within the cache's `max_stale` window.
+        """
+        if self.cache is None:
+            return await self._fetch_rate_table()
+        return await self.cache.get_or_load("latest", self._fetch_rate_table)
+
+    async def refresh_rate_table(self) -> RateTable:
+        """
+        Fetches a new rate table and stores it in the cache, bypassing its freshness.
+        """
+        if self.cache is None:
+            return await self._fetch_rate_table()
+        return await self.cache.refresh("latest", self._fetch_rate_table)
+
+    async def _fetch_rate_table(self) -> RateTable:
+        return RateTable.from_response(await self.get_currency_rates(None))
 
-    async def get_currency_rates(self, currencies: list[Currency]):
+    async def get_currency_rates(self, currencies: list[Currency] | None = None):
         """
         Fetches exchange rates of the specified currencies relative to the base currency (USD).
 
         Due to free-tier API limitations, rates are returned only with respect to a single base
         currency, which is fixed as USD.
 
+        When a resilience policy is configured, the request goes through its circuit breaker,
+        jittered retries and optional hedging.
+
         Args:
-            currencies (list[Currency]): the list of currency codes to get the rates relative to the base currency.
+            currencies (list[Currency] | None): the list of currency codes to get the rates
+                relative to the base currency. Every supported currency is returned when omitted.
 
         Returns:
             dict: A JSON-like dictionary containing currency codes mapped to their exchange rates
@@ -31,10 +75,35 @@ class CurrencyAPIClient:
                 }
             }
         """
-        params = {
-            "apikey": self.api_key,
-            "currencies": ",".join(currencies),
+        params = {"apikey": self.api_key}
+        if currencies:
+            params["currencies"] = ",".join(currencies)
+        return await self._get(self.url, params)
+
+    async def get_historical_rates(self, day: date) -> RateTable:
+        """
+        Fetches the complete USD-based rate table as of the end of `day`.
+
+        The upstream response is keyed by date, for example:
+        {
+            "data": {
+                "2024-01-31": {"EUR": 0.92, "JPY": 147.5, "USD": 1}
+            }
         }
-        res = await self.client.get(self.url, params=params)
-        _ = res.raise_for_status()
+        """
+        params = {"apikey": self.api_key, "date": day.isoformat()}
+        res_data = await self._get(f"{self.base_url}/historical", params)
+        return RateTable(res_data["data"][day.isoformat()])
+
+    async def _get(self, url: str, params: dict[str, str]) -> Any:
+        timeout = httpx.USE_CLIENT_DEFAULT if self.timeout is None else self.timeout
+
+        async def request() -> httpx.Response:
+            return await self.client.get(url, params=params, timeout=timeout)
+
+        if self.policy is None:
+            res = await request()
+            _ = res.raise_for_status()
+        else:
+            res = await self.policy.call(request)
         return res.json()
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, final
+
+from app.models.metrics_models import RateCacheStats
+
+logger = logging.getLogger(__name__)
+
+
+@final
+class RateCache:
+    """
+    In-process TTL cache for upstream exchange-rate responses.
+
+    Entries expire `ttl` seconds after they were stored, and the least recently used
+    entry is evicted once `max_entries` is exceeded. Concurrent misses for the same
+    key share a single in-flight load instead of each calling the upstream API.
+
+    For `max_stale` seconds after expiry an entry is still served as-is while a
+    background load revalidates it, so callers never wait on a slow or failing upstream
+    as long as a previous value exists.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        max_stale: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task[Any]] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.load_errors = 0
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Returns the cached value for `key`, calling `loader` at most once per miss.
+
+        Errors raised by `loader` propagate to every waiter and are never cached.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            age = self._clock() - stored_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < self.ttl + self.max_stale:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                _ = self._start_load(key, loader)
+                return value
+            del self._entries[key]
+
+        if key in self._inflight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+
+        # Shield the shared load so one cancelled caller does not cancel the others.
+        return await asyncio.shield(self._start_load(key, loader))
+
+    async def refresh(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Reloads `key` regardless of its freshness, joining a load already in flight.
+        """
+        return await asyncio.shield(self._start_load(key, loader))
+
+    def _start_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> asyncio.Task[Any]:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader))
+            # Background revalidations may have no waiter; mark their errors as seen.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        try:
+            value = await loader()
+            self._store(key, value)
+            return value
+        except Exception:
+            self.load_errors += 1
+            logger.warning("Failed to load rates for %r", key, exc_info=True)
+            raise
+        finally:
+            del self._inflight[key]
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (self._clock(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> RateCacheStats:
+        return RateCacheStats(
+            hits=self.hits,
+            stale_hits=self.stale_hits,
+            misses=self.misses,
+            coalesced=self.coalesced,
+            evictions=self.evictions,
+            load_errors=self.load_errors,
+            entries=len(self._entries),
+        )
@@ -0,0 +1,93 @@
+from bisect import bisect_right
+from collections.abc import Iterable
+from datetime import date, datetime
+from typing import final
+
+from app.errors.currency import UnsupportedCurrencyError
+from app.infrastructure.rate_table import RateTable
+
+
+def _day(when: date | datetime) -> date:
+    return when.date() if isinstance(when, datetime) else when
+
+
+@final
+class RateHistory:
+    """
+    In-memory time series of daily rate tables keyed by date.
+
+    A lookup for a given day uses the table of that day, or of the closest earlier day
+    when that day has no snapshot (weekends, gaps before a backfill). Lookups are a
+    binary search over the sorted days, so thousands of them per request stay cheap.
+    """
+
+    def __init__(self):
+        self._tables: dict[date, RateTable] = {}
+        self._ordinals: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def __contains__(self, day: object) -> bool:
+        return day in self._tables
+
+    @property
+    def latest_day(self) -> date | None:
+        if not self._ordinals:
+            return None
+        return date.fromordinal(self._ordinals[-1])
+
+    def add(self, day: date, table: RateTable) -> None:
+        if day not in self._tables:
+            self._ordinals.insert(
+                bisect_right(self._ordinals, day.toordinal()), day.toordinal()
+            )
+        self._tables[day] = table
+
+    def add_many(self, tables: dict[date, RateTable]) -> None:
+        self._tables.update(tables)
+        self._ordinals = sorted(day.toordinal() for day in self._tables)
+
+    def table_at(self, when: date | datetime) -> RateTable | None:
+        pos = bisect_right(self._ordinals, _day(when).toordinal())
+        if pos == 0:
+            return None
+        return self._tables[date.fromordinal(self._ordinals[pos - 1])]
+
+    def rate_at(
+        self,
+        when: date | datetime,
+        from_cur: str,
+        to_cur: str,
+    ) -> float | None:
+        """
+        Returns the `from_cur -> to_cur` rate in effect on the day of `when`, or None when
+        no snapshot that old exists or a currency is missing from it.
+        """
+        table = self.table_at(when)
+        if table is None:
+            return None
+        try:
+            return table.rate(from_cur, to_cur)
+        except UnsupportedCurrencyError:
+            return None
+
+    def rates_at(
+        self,
+        lookups: Iterable[tuple[date | datetime, str, str]],
+    ) -> list[float | None]:
+        """
+        Bulk version of `rate_at`; each distinct day is only searched once.
+        """
+        tables: dict[date, RateTable | None] = {}
+        result: list[float | None] = []
+        for when, from_cur, to_cur in lookups:
+            day = _day(when)
+            if day not in tables:
+                tables[day] = self.table_at(day)
+            table = tables[day]
+            if table is None or from_cur not in table or to_cur not in table:
+                result.append(None)
+            else:
+                result.append(table.rate(from_cur, to_cur))
+        return result
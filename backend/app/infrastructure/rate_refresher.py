@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import final
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.infrastructure.currency_api import CurrencyAPIClient
+from app.infrastructure.rate_history import RateHistory
+from app.infrastructure.rate_table import RateTable
+from app.repo.rate_repo import RateRepo
+
+logger = logging.getLogger(__name__)
+
+
+def utc_today() -> date:
+    # Snapshots are keyed by UTC day, whatever the host's time zone.
+    return datetime.now(timezone.utc).date()
+
+
+@final
+class RateRefresher:
+    """
+    Background task that keeps the cached rate table warm.
+
+    The table is fetched at startup and then every `interval` seconds, so requests are
+    served from memory and never wait on the upstream API. Failures are logged and the
+    previous table keeps being served until the next successful refresh.
+
+    When a rate history is given, the first successful refresh of each day is recorded
+    as that day's snapshot, and persisted through `repo` if one is configured. Stored
+    snapshots from the last `history_days` days are loaded into memory at startup.
+    """
+
+    def __init__(
+        self,
+        api_client: CurrencyAPIClient,
+        interval: float,
+        history: RateHistory | None = None,
+        repo: RateRepo | None = None,
+        history_days: int = 730,
+    ):
+        self.api_client = api_client
+        self.interval = interval
+        self.history = history
+        self.repo = repo
+        self.history_days = history_days
+        self._task: asyncio.Task[None] | None = None
+
+    async def run(self) -> None:
+        await self._load_history()
+        while True:
+            try:
+                table = await self.api_client.refresh_rate_table()
+            except Exception:
+                # The cache already logged the cause; keep serving the previous table.
+                logger.warning("Scheduled rate refresh failed")
+            else:
+                await self._record(table)
+            await asyncio.sleep(self.interval)
+
+    async def _load_history(self) -> None:
+        if self.history is None or self.repo is None:
+            return
+        since = utc_today() - timedelta(days=self.history_days)
+        try:
+            days = await run_in_threadpool(self.repo.load, since)
+        except Exception:
+            logger.warning("Failed to load the rate history", exc_info=True)
+            return
+        self.history.add_many({day: RateTable(rates) for day, rates in days.items()})
+
+    async def _record(self, table: RateTable) -> None:
+        if self.history is None:
+            return
+        today = utc_today()
+        if today in self.history:
+            return
+        self.history.add(today, table)
+        if self.repo is None:
+            return
+        try:
+            await run_in_threadpool(
+                self.repo.save_many, {today: table.as_dict()}, table.base
+            )
+        except Exception:
+            logger.warning(
+                "Failed to store the rate snapshot of %s", today, exc_info=True
+            )
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        _ = self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
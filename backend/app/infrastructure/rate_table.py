@@ -0,0 +1,87 @@
+import time
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, final
+
+import numpy as np
+
+from app.errors.currency import UnsupportedCurrencyError
+
+
+@final
+class RateTable:
+    """
+    USD-based exchange rates for every supported currency, held as one flat array.
+
+    Each currency code maps to a position in `rates`, so converting between any two
+    currencies is two dictionary lookups and one division instead of an upstream call.
+    """
+
+    __slots__ = ("base", "codes", "index", "rates", "fetched_at")
+
+    def __init__(
+        self,
+        rates: Mapping[str, float],
+        base: str = "USD",
+        fetched_at: float | None = None,
+    ):
+        self.base = base
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self.codes = tuple(sorted(rates))
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.rates = array("d", (float(rates[code]) for code in self.codes))
+
+    @classmethod
+    def from_response(cls, response: dict[str, Any]) -> RateTable:
+        return cls(response["data"])
+
+    def __contains__(self, currency: object) -> bool:
+        return currency in self.index
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def as_dict(self) -> dict[str, float]:
+        return dict(zip(self.codes, self.rates))
+
+    def age(self) -> float:
+        """
+        Returns how many seconds ago the rates were fetched from the upstream API.
+        """
+        return max(0.0, time.time() - self.fetched_at)
+
+    def position(self, currency: str) -> int:
+        try:
+            return self.index[currency]
+        except KeyError:
+            raise UnsupportedCurrencyError(currency) from None
+
+    def rate(self, from_cur: str, to_cur: str) -> float:
+        """
+        Returns how many units of `to_cur` one unit of `from_cur` buys.
+
+        Both rates are quoted against the base currency, so the cross rate is
+        rate[to_cur] / rate[from_cur].
+        """
+        return self.rates[self.position(to_cur)] / self.rates[self.position(from_cur)]
+
+    def convert(self, amount: float, from_cur: str, to_cur: str) -> float:
+        return amount * self.rate(from_cur, to_cur)
+
+    def convert_many(
+        self,
+        amounts: Sequence[float],
+        from_curs: Sequence[str],
+        to_curs: Sequence[str],
+    ) -> list[float]:
+        """
+        Converts many amounts at once with vectorized arithmetic over the rate array.
+        """
+        count = len(amounts)
+        rates = np.frombuffer(self.rates, dtype=np.float64)
+        from_idx = np.fromiter(
+            map(self.position, from_curs), dtype=np.intp, count=count
+        )
+        to_idx = np.fromiter(map(self.position, to_curs), dtype=np.intp, count=count)
+        values = np.asarray(amounts, dtype=np.float64)
+        return (values * (rates[to_idx] / rates[from_idx])).tolist()
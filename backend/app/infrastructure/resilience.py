@@ -0,0 +1,233 @@
+import asyncio
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from enum import Enum
+from typing import final
+
+import httpx
+
+from app.errors.currency import CircuitOpenError
+from app.models.metrics_models import UpstreamStats
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@final
+class CircuitBreaker:
+    """
+    Stops calling an upstream that keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls are
+    rejected immediately. Once `reset_timeout` seconds have passed, up to
+    `half_open_max_calls` probe calls are let through: a success closes the circuit
+    again, a failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self.consecutive_failures = 0
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> CircuitState:
+        if (
+            self._state == CircuitState.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = CircuitState.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == CircuitState.OPEN or (
+            state == CircuitState.HALF_OPEN and self._probes >= self.half_open_max_calls
+        ):
+            self.rejected += 1
+            raise CircuitOpenError()
+        if state == CircuitState.HALF_OPEN:
+            self._probes += 1
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self._state = CircuitState.CLOSED
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if (
+            self._state == CircuitState.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            self._state = CircuitState.OPEN
+            self._opened_at = self._clock()
+            self.opened += 1
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Network errors, timeouts, rate limiting and 5xx responses are worth retrying;
+    other 4xx responses will fail the same way again.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.RequestError)
+
+
+@final
+class ResiliencePolicy:
+    """
+    Guards idempotent upstream GETs with a circuit breaker, bounded retries and
+    optional hedging.
+
+    Retries back off exponentially with full jitter. When `hedge_percentile` is set, a
+    second identical request is sent if the first has not answered within that
+    percentile of recent latencies, and whichever answers first wins.
+    """
+
+    MIN_HEDGE_SAMPLES = 20
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        max_attempts: int = 3,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+        hedge_percentile: float | None = None,
+        latency_window: int = 200,
+    ):
+        self.breaker = breaker
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.hedged = 0
+
+    async def call(
+        self,
+        request: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        """
+        Sends `request` under the policy and returns a successful response.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+            httpx.HTTPError: The last error once retries are exhausted or the error is
+                not retryable.
+        """
+        self.calls += 1
+        for attempt in range(self.max_attempts):
+            self.breaker.before_call()
+            self.attempts += 1
+            try:
+                res = await self._send(request)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The upstream answered; the request itself is wrong.
+                    self.breaker.record_success()
+                    raise
+                self.failures += 1
+                self.breaker.record_failure()
+                if attempt + 1 >= self.max_attempts:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self._backoff(attempt))
+            else:
+                self.breaker.record_success()
+                return res
+
+        raise AssertionError("unreachable")
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def _hedge_delay(self) -> float | None:
+        if (
+            self.hedge_percentile is None
+            or len(self._latencies) < self.MIN_HEDGE_SAMPLES
+        ):
+            return None
+        latencies = sorted(self._latencies)
+        index = min(
+            len(latencies) - 1, int(len(latencies) * self.hedge_percentile / 100)
+        )
+        return latencies[index]
+
+    async def _send(
+        self,
+        request: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        delay = self._hedge_delay()
+        if delay is None:
+            return await self._timed(request)
+
+        first = asyncio.create_task(self._timed(request))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        self.hedged += 1
+        pending = {first, asyncio.create_task(self._timed(request))}
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in pending:
+                _ = task.cancel()
+
+    async def _timed(
+        self,
+        request: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        started = time.monotonic()
+        res = await request()
+        _ = res.raise_for_status()
+        self._latencies.append(time.monotonic() - started)
+        return res
+
+    def stats(self) -> UpstreamStats:
+        return UpstreamStats(
+            circuit_state=self.breaker.state.value,
+            consecutive_failures=self.breaker.consecutive_failures,
+            circuit_opened=self.breaker.opened,
+            circuit_rejected=self.breaker.rejected,
+            calls=self.calls,
+            attempts=self.attempts,
+            retries=self.retries,
+            failures=self.failures,
+            hedged=self.hedged,
+            hedge_delay=self._hedge_delay(),
+        )
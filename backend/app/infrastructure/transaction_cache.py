@@ -0,0 +1,189 @@
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from typing import Any, Protocol, final
+
+from app.models.metrics_models import CacheEndpointStats, TransactionCacheStats
+
+# (user id, endpoint, normalized query parameters)
+_Key = tuple[str, str, Hashable]
+
+
+class TransactionCacheBackend(Protocol):
+    """
+    What `CachedTransactionRepo` needs from a cache, so the in-process
+    `TransactionCache` can be swapped for a shared one.
+    """
+
+    async def get_or_load(
+        self,
+        user_id: str,
+        endpoint: str,
+        key: Hashable,
+        transaction_type: str | None,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any: ...
+
+    async def invalidate(
+        self,
+        user_id: str,
+        transaction_types: Iterable[str] | None = None,
+        version: int | None = None,
+    ) -> None: ...
+
+    async def version(
+        self, user_id: str, loader: Callable[[], Awaitable[int]]
+    ) -> int: ...
+
+    def stats(self) -> TransactionCacheStats: ...
+
+
+@final
+class TransactionCache:
+    """
+    In-process cache of transaction query results, per user.
+
+    Entries expire `ttl` seconds after they were stored, and the least recently used
+    entry is evicted once `max_entries` is exceeded. Each entry remembers the
+    transaction type its query was restricted to (None for queries over all types),
+    so a write only drops the entries it can affect.
+
+    A load that started before an invalidation of the same user is not stored, so a
+    slow read racing a write never puts the old result back.
+
+    The version of each user's transactions is kept for `version_ttl` seconds.
+    Writes through this instance record the version they produced, so when a reload
+    finds a kept version changed, another instance has written, and the user's
+    entries are dropped.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        version_ttl: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_ttl = version_ttl
+        self._clock = clock
+        self._entries: OrderedDict[_Key, tuple[float, str | None, Any]] = OrderedDict()
+        self._by_user: dict[str, set[_Key]] = {}
+        self._generations: dict[str, int] = {}
+        self._versions: dict[str, tuple[float, int]] = {}
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get_or_load(
+        self,
+        user_id: str,
+        endpoint: str,
+        key: Hashable,
+        transaction_type: str | None,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Returns the cached result of `key`, calling `loader` on a miss. Errors raised
+        by `loader` propagate and are never cached.
+        """
+        full_key = (user_id, endpoint, key)
+        entry = self._entries.get(full_key)
+        if entry is not None:
+            stored_at, _, value = entry
+            if self._clock() - stored_at < self.ttl:
+                self._hits[endpoint] = self._hits.get(endpoint, 0) + 1
+                self._entries.move_to_end(full_key)
+                return value
+            self._remove(full_key)
+
+        self._misses[endpoint] = self._misses.get(endpoint, 0) + 1
+        generation = self._generations.get(user_id, 0)
+        value = await loader()
+        if self._generations.get(user_id, 0) == generation:
+            self._store(full_key, transaction_type, value)
+        return value
+
+    async def invalidate(
+        self,
+        user_id: str,
+        transaction_types: Iterable[str] | None = None,
+        version: int | None = None,
+    ) -> None:
+        """
+        Drops the entries of `user_id` that may include rows of `transaction_types`:
+        queries restricted to one of them, and queries over all types. Without
+        `transaction_types`, every entry of the user is dropped.
+
+        `version` is the version the write produced; it is kept as the user's, so
+        the next check does not take this write for one by another instance. Without
+        it the version is read again next time.
+        """
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        if version is None:
+            _ = self._versions.pop(user_id, None)
+        else:
+            self._versions[user_id] = (self._clock(), version)
+        types = None if transaction_types is None else set(transaction_types)
+        for full_key in list(self._by_user.get(user_id, ())):
+            tx_type = self._entries[full_key][1]
+            if types is None or tx_type is None or tx_type in types:
+                self._remove(full_key)
+                self.invalidations += 1
+
+    async def version(self, user_id: str, loader: Callable[[], Awaitable[int]]) -> int:
+        """
+        The version of the user's transactions, calling `loader` when the kept one is
+        older than `version_ttl`.
+        """
+        entry = self._versions.get(user_id)
+        if entry is not None and self._clock() - entry[0] < self.version_ttl:
+            self._hits["version"] = self._hits.get("version", 0) + 1
+            return entry[1]
+
+        self._misses["version"] = self._misses.get("version", 0) + 1
+        loaded_at = self._clock()
+        version = await loader()
+        # Entries cached under an older version may be out of date.
+        if entry is not None and entry[1] != version and self._by_user.get(user_id):
+            await self.invalidate(user_id)
+        self._versions[user_id] = (loaded_at, version)
+        return version
+
+    def _store(self, full_key: _Key, transaction_type: str | None, value: Any) -> None:
+        self._entries[full_key] = (self._clock(), transaction_type, value)
+        self._entries.move_to_end(full_key)
+        self._by_user.setdefault(full_key[0], set()).add(full_key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, full_key: _Key) -> None:
+        del self._entries[full_key]
+        keys = self._by_user[full_key[0]]
+        keys.discard(full_key)
+        if not keys:
+            del self._by_user[full_key[0]]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_user.clear()
+        self._versions.clear()
+
+    def stats(self) -> TransactionCacheStats:
+        endpoints = {}
+        for endpoint in sorted(self._hits.keys() | self._misses.keys()):
+            hits = self._hits.get(endpoint, 0)
+            misses = self._misses.get(endpoint, 0)
+            endpoints[endpoint] = CacheEndpointStats(
+                hits=hits, misses=misses, hit_rate=hits / (hits + misses)
+            )
+        return TransactionCacheStats(
+            endpoints=endpoints,
+            invalidations=self.invalidations,
+            evictions=self.evictions,
+            entries=len(self._entries),
+        )
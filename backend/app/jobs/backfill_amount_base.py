@@ -0,0 +1,74 @@
+"""
+Stores `amount_base` on transactions written before it existed.
+
+Each transaction keeps its stored `exchange_rate` when it has one; otherwise the rate
+of the day it occurred is taken from the snapshots in the `exchange_rates`
+collection (see `app.jobs.backfill_rates`). Transactions already converted, or whose
+day has no snapshot, are skipped, so the job can be re-run safely. Every user is
+backfilled unless `--user` is given.
+
+Usage:
+    python -m app.jobs.backfill_amount_base [--user USER_ID ...]
+"""
+
+import argparse
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from google.cloud import firestore
+
+from app.core.config import get_settings
+from app.infrastructure.rate_history import RateHistory
+from app.infrastructure.rate_table import RateTable
+from app.repo.rate_repo import RateRepo
+from app.repo.transaction_repo import TransactionRepo
+from app.services.exchange_rate_service import ExchangeRateService
+
+
+def backfill(
+    db: firestore.Client,
+    rates: ExchangeRateService,
+    user_ids: Iterable[str] | None = None,
+    concurrency: int = 4,
+) -> dict[str, int]:
+    """
+    Backfills the transactions of each user in `user_ids`, or of every user.
+
+    Returns:
+        dict[str, int]: The number of transactions updated, by user id.
+    """
+    if user_ids is None:
+        user_ids = [doc.id for doc in db.collection("users").list_documents()]
+
+    def backfill_one(user_id: str) -> tuple[str, int]:
+        repo = TransactionRepo(db, user_id)
+        return user_id, repo.backfill_amount_base(rates.rates_of)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return dict(pool.map(backfill_one, user_ids))
+
+
+def main(user_ids: list[str] | None, concurrency: int) -> None:
+    settings = get_settings()
+    db = firestore.Client(project=settings.gcp_project_id)
+    try:
+        history = RateHistory()
+        history.add_many(
+            {day: RateTable(rates) for day, rates in RateRepo(db).load().items()}
+        )
+        rates = ExchangeRateService(history, settings.home_currency)
+        updated = backfill(db, rates, user_ids, concurrency)
+        print(
+            f"Stored amount_base on {sum(updated.values())} transaction(s) of "
+            f"{len(updated)} user(s)."
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--user", action="append", dest="user_ids")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    main(args.user_ids, args.concurrency)
@@ -0,0 +1,90 @@
+"""
+Backfills daily exchange-rate snapshots into Firestore.
+
+Days that are already stored are skipped, so the job can be re-run safely.
+
+Usage:
+    python -m app.jobs.backfill_rates --start 2024-01-01 --end 2024-12-31
+"""
+
+import argparse
+import asyncio
+from datetime import date, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from google.cloud import firestore
+
+from app.core.config import get_settings
+from app.core.http import HTTPClientPool
+from app.infrastructure.currency_api import CurrencyAPIClient
+from app.infrastructure.resilience import CircuitBreaker, ResiliencePolicy
+from app.repo.rate_repo import RateRepo
+
+
+async def backfill(
+    api_client: CurrencyAPIClient,
+    repo: RateRepo,
+    start: date,
+    end: date,
+    concurrency: int = 4,
+) -> list[date]:
+    """
+    Fetches the snapshot of every missing day in [start, end] and stores them in bulk.
+
+    Returns:
+        list[date]: The days that were backfilled.
+    """
+    stored = await run_in_threadpool(repo.load, start)
+    days = [
+        start + timedelta(days=n)
+        for n in range((end - start).days + 1)
+        if start + timedelta(days=n) not in stored
+    ]
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(day: date):
+        async with semaphore:
+            return day, await api_client.get_historical_rates(day)
+
+    tables = dict(await asyncio.gather(*(fetch(day) for day in days)))
+    await run_in_threadpool(
+        repo.save_many, {day: table.as_dict() for day, table in tables.items()}
+    )
+    return days
+
+
+async def main(start: date, end: date, concurrency: int) -> None:
+    settings = get_settings()
+    pool = HTTPClientPool(settings)
+    db = firestore.Client(project=settings.gcp_project_id)
+    try:
+        api_client = CurrencyAPIClient(
+            pool.client,
+            settings.currency_api_key,
+            policy=ResiliencePolicy(
+                CircuitBreaker(
+                    failure_threshold=settings.currency_breaker_failures,
+                    reset_timeout=settings.currency_breaker_reset,
+                ),
+                max_attempts=settings.currency_retry_attempts,
+                backoff_base=settings.currency_retry_backoff,
+                backoff_max=settings.currency_retry_backoff_max,
+            ),
+            timeout=settings.currency_api_timeout,
+            base_url=settings.currency_api_url,
+        )
+        days = await backfill(api_client, RateRepo(db), start, end, concurrency)
+        print(f"Backfilled {len(days)} day(s) between {start} and {end}.")
+    finally:
+        await pool.aclose()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.start, args.end, args.concurrency))
@@ -0,0 +1,33 @@
+"""
+Writes the composite indexes the transaction queries need to `firestore.indexes.json`.
+
+Run it after changing the query planner or any transaction query, commit the result,
+and deploy it with `firebase deploy --only firestore:indexes`.
+
+Usage:
+    python -m app.jobs.generate_indexes [--output PATH]
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from app.repo.query_planner import firestore_indexes
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parents[2] / "firestore.indexes.json"
+
+
+def render() -> str:
+    return json.dumps(firestore_indexes(), indent=2) + "\n"
+
+
+def main(output: Path) -> None:
+    _ = output.write_text(render())
+    print(f"Wrote {len(firestore_indexes()['indexes'])} index(es) to {output}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+    main(args.output)
@@ -0,0 +1,61 @@
+"""
+Recomputes the monthly transaction rollups from the stored transactions.
+
+Use it to repair rollups after a failed write or a manual edit in the console, or to
+create them for transactions stored before rollups existed. Every user is rebuilt
+unless `--user` is given.
+
+Usage:
+    python -m app.jobs.rebuild_rollups [--user USER_ID ...]
+"""
+
+import argparse
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from google.cloud import firestore
+
+from app.core.config import get_settings
+from app.repo.transaction_repo import TransactionRepo
+
+
+def rebuild(
+    db: firestore.Client,
+    user_ids: Iterable[str] | None = None,
+    concurrency: int = 4,
+) -> dict[str, int]:
+    """
+    Rebuilds the rollup of each user in `user_ids`, or of every user.
+
+    Returns:
+        dict[str, int]: The number of transactions counted, by user id.
+    """
+    if user_ids is None:
+        user_ids = [doc.id for doc in db.collection("users").list_documents()]
+
+    def rebuild_one(user_id: str) -> tuple[str, int]:
+        return user_id, TransactionRepo(db, user_id).rebuild_rollup()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return dict(pool.map(rebuild_one, user_ids))
+
+
+def main(user_ids: list[str] | None, concurrency: int) -> None:
+    settings = get_settings()
+    db = firestore.Client(project=settings.gcp_project_id)
+    try:
+        counted = rebuild(db, user_ids, concurrency)
+        print(
+            f"Rebuilt {len(counted)} rollup(s) from "
+            f"{sum(counted.values())} transaction(s)."
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--user", action="append", dest="user_ids")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    main(args.user_ids, args.concurrency)
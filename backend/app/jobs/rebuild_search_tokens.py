@@ -0,0 +1,61 @@
+"""
+Recomputes the search tokens stored on every transaction.
+
+Run it once for transactions stored before free-text search existed, and again after
+changing the tokenizer in `app/repo/search_tokens.py`. Every user is reindexed unless
+`--user` is given.
+
+Usage:
+    python -m app.jobs.rebuild_search_tokens [--user USER_ID ...]
+"""
+
+import argparse
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from google.cloud import firestore
+
+from app.core.config import get_settings
+from app.repo.transaction_repo import TransactionRepo
+
+
+def rebuild(
+    db: firestore.Client,
+    user_ids: Iterable[str] | None = None,
+    concurrency: int = 4,
+) -> dict[str, int]:
+    """
+    Rebuilds the search tokens of each user in `user_ids`, or of every user.
+
+    Returns:
+        dict[str, int]: The number of transactions updated, by user id.
+    """
+    if user_ids is None:
+        user_ids = [doc.id for doc in db.collection("users").list_documents()]
+
+    def rebuild_one(user_id: str) -> tuple[str, int]:
+        return user_id, TransactionRepo(db, user_id).rebuild_search_tokens()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return dict(pool.map(rebuild_one, user_ids))
+
+
+def main(user_ids: list[str] | None, concurrency: int) -> None:
+    settings = get_settings()
+    db = firestore.Client(project=settings.gcp_project_id)
+    try:
+        updated = rebuild(db, user_ids, concurrency)
+        print(
+            f"Reindexed {sum(updated.values())} transaction(s) of "
+            f"{len(updated)} user(s)."
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--user", action="append", dest="user_ids")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    main(args.user_ids, args.concurrency)
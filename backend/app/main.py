@@ -1,7 +1,8 @@
 from fastapi import FastAPI
 
 from app.core.env_boostrap import load_env_from_secret_manager
-from app.routers import auth_router, currency_router, transaction_router
+from app.core.lifespan import lifespan
+from app.routers import auth_router, currency_router, metrics_router, transaction_router
 import os
 
 from starlette.middleware.sessions import SessionMiddleware
@@ -13,12 +14,13 @@ if APP_ENV not in {"local", "ci", "dev"}:
         secret_name="gdgteamf1-env", project_id=os.environ["GCP_PROJECT_ID"]
     )
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Routers
 app.include_router(currency_router.router)
 app.include_router(transaction_router.router)
 app.include_router(auth_router.router)
+app.include_router(metrics_router.router)
 
 
 # Middleware
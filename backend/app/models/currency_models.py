@@ -11,3 +11,11 @@ class CurrencyConvertReq(BaseModel):
 
 class CurrencyConvertRes(BaseModel):
     result: Annotated[float, Field(strict=True, gt=0)]
+
+
+class CurrencyConvertBatchReq(BaseModel):
+    items: Annotated[list[CurrencyConvertReq], Field(min_length=1, max_length=10000)]
+
+
+class CurrencyConvertBatchRes(BaseModel):
+    results: list[float]
@@ -0,0 +1,52 @@
+from pydantic import BaseModel
+
+
+class HTTPPoolStats(BaseModel):
+    requests: int
+    errors: int
+    in_flight: int
+    peak_in_flight: int
+    connections: int
+    idle_connections: int
+
+
+class RateCacheStats(BaseModel):
+    hits: int
+    stale_hits: int
+    misses: int
+    coalesced: int
+    evictions: int
+    load_errors: int
+    entries: int
+
+
+class UpstreamStats(BaseModel):
+    circuit_state: str
+    consecutive_failures: int
+    circuit_opened: int
+    circuit_rejected: int
+    calls: int
+    attempts: int
+    retries: int
+    failures: int
+    hedged: int
+    hedge_delay: float | None
+
+
+class CurrencyStats(BaseModel):
+    cache: RateCacheStats
+    upstream: UpstreamStats
+
+
+class CacheEndpointStats(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class TransactionCacheStats(BaseModel):
+    # By repo method ("list", "search", and "version" for ETag checks).
+    endpoints: dict[str, CacheEndpointStats]
+    invalidations: int
+    evictions: int
+    entries: int
@@ -1,8 +1,17 @@
+from copy import copy
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Annotated
+from functools import lru_cache
+from typing import Annotated, Any, Literal
 import uuid
-from pydantic import UUID4, BaseModel, Field, model_validator
+from pydantic import (
+    UUID4,
+    BaseModel,
+    Field,
+    create_model,
+    field_validator,
+    model_validator,
+)
 from pydantic.json_schema import SkipJsonSchema
 from pydantic_extra_types.currency_code import Currency
 
@@ -19,6 +28,9 @@ class Transaction(BaseModel):
     )
     amount: Annotated[float, Field(strict=True, gt=0)]
     exchange_rate: float | None
+    # `amount` in HOME_CURRENCY at `exchange_rate`, filled by the server on write so
+    # amounts in different currencies compare and add up.
+    amount_base: SkipJsonSchema[float | None] = None
     currency: Currency = Field(default=Currency("JPY"))
     transaction_type: TransactionType
     category: str | None
@@ -31,6 +43,64 @@ class Transaction(BaseModel):
     ]
 
 
+TransactionField = Literal[
+    "amount",
+    "exchange_rate",
+    "amount_base",
+    "currency",
+    "transaction_type",
+    "category",
+    "description",
+    "business_name",
+    "payment_method",
+    "occurred_at",
+]
+
+# Returned with every projection: the id, plus what queries filter and sort on.
+PROJECTION_REQUIRED_FIELDS = ("transaction_type", "occurred_at")
+
+
+@lru_cache
+def projection_model(fields: tuple[str, ...]) -> type[BaseModel]:
+    """
+    A model with only `id` and `fields` of `Transaction`, for projected reads.
+    """
+    return create_model(
+        "TransactionProjection",
+        **{
+            name: (info.annotation, copy(info))
+            for name, info in Transaction.model_fields.items()
+            if name == "id" or name in fields
+        },
+    )
+
+
+def _split_field_names(value: Any) -> Any:
+    # Accept both `fields=a&fields=b` and `fields=a,b`.
+    if isinstance(value, str):
+        value = [value]
+    if isinstance(value, list):
+        return [name for item in value for name in str(item).split(",") if name]
+    return value
+
+
+class TransactionBatchCreateReq(BaseModel):
+    items: Annotated[list[Transaction], Field(min_length=1, max_length=500)]
+
+
+class TransactionBatchItemRes(BaseModel):
+    id: UUID4
+    created: bool
+    error: str | None = None
+
+
+class TransactionBatchCreateRes(BaseModel):
+    # One entry per requested item, in request order.
+    results: list[TransactionBatchItemRes]
+    created: int
+    failed: int
+
+
 class TransactionDeleteReq(BaseModel):
     id: list[UUID4]
 
@@ -49,6 +119,10 @@ class TransactionGetReq(BaseModel):
 class TransactionListReq(BaseModel):
     limit: int = Field(default=20, ge=1)
     offset: int = Field(default=0, ge=0)
+    cursor: str | None = None
+    fields: list[TransactionField] | None = None
+
+    split_fields = field_validator("fields", mode="before")(_split_field_names)
 
 
 class TransactionSearchReq(BaseModel):
@@ -56,27 +130,116 @@ class TransactionSearchReq(BaseModel):
     id: list[UUID4] | None = None
     min_amount: int | None = None
     max_amount: int | None = None
+    # Bounds on `amount_base`, comparable across currencies. Bounded searches are
+    # sorted by `amount_base`, largest first, instead of newest first.
+    min_amount_base: float | None = None
+    max_amount_base: float | None = None
     currency: Currency | list[Currency] | None = None
     category: str | list[str] | None = None
     occurred_on: datetime | None = None
     occurred_before: datetime | None = None
     occurred_after: datetime | None = None
+    # Free-text term matched against `business_name` and `description`.
+    q: str | None = Field(default=None, max_length=100, pattern=r"\w")
     limit: int | None = Field(default=None, ge=1)
     offset: int | None = Field(default=None, ge=0)
+    cursor: str | None = None
+    fields: list[TransactionField] | None = None
+
+    split_fields = field_validator("fields", mode="before")(_split_field_names)
 
     @model_validator(mode="after")
     def checkFilter(self):
         other_filters = [
             self.min_amount,
             self.max_amount,
+            self.min_amount_base,
+            self.max_amount_base,
             self.currency,
             self.category,
             self.occurred_on,
             self.occurred_before,
             self.occurred_after,
+            self.q,
             self.limit,
             self.offset,
+            self.cursor,
         ]
         if self.id and any(f is not None for f in other_filters):
             raise ValueError("ID cannot be combined with other filters.")
         return self
+
+
+class TransactionPage(BaseModel):
+    # Transactions, or projections of them when `fields` was requested.
+    items: list[BaseModel]
+    # Pass back as `cursor` to get the next page; None on the last page.
+    next_cursor: str | None = None
+
+
+ExportFormat = Literal["csv", "parquet"]
+
+
+class TransactionExportReq(BaseModel):
+    format: ExportFormat = "csv"
+
+
+SummaryGroup = Literal["category", "month"]
+
+
+class TransactionSummaryReq(BaseModel):
+    transaction_type: TransactionType
+    # The range is [start, end).
+    start: datetime
+    end: datetime
+    group_by: list[SummaryGroup] = Field(default_factory=lambda: ["month"])
+    # The categories to report when grouping by category; all of them when omitted.
+    category: list[str] | None = None
+    currency: Currency | None = None
+    # Add up `amount_base` instead of `amount`, so totals across currencies are in
+    # HOME_CURRENCY.
+    base: bool = False
+
+    split_group_by = field_validator("group_by", "category", mode="before")(
+        _split_field_names
+    )
+
+    @field_validator("start", "end")
+    @classmethod
+    def assumeUtc(cls, value: datetime) -> datetime:
+        # Firestore reads naive datetimes as UTC; say so, so the bounds compare.
+        return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+    @model_validator(mode="after")
+    def checkRange(self):
+        if self.end <= self.start:
+            raise ValueError("end must be after start.")
+        return self
+
+
+class TransactionSummaryBucket(BaseModel):
+    # "YYYY-MM"; None unless grouped by month.
+    month: str | None = None
+    # None unless grouped by category, or for uncategorized transactions.
+    category: str | None = None
+    count: int
+    total: float
+
+
+class TransactionSummaryRes(BaseModel):
+    buckets: list[TransactionSummaryBucket]
+    count: int
+    total: float
+    # The currency of the totals when summed with `base`.
+    base_currency: str | None = None
+
+
+class RollupBucket(BaseModel):
+    count: int
+    total: float
+
+
+class TransactionRollupRes(BaseModel):
+    # "YYYY-MM" -> transaction type -> category ("(uncategorized)" for none) ->
+    # currency code; amounts in different currencies are kept apart.
+    months: dict[str, dict[TransactionType, dict[str, dict[str, RollupBucket]]]]
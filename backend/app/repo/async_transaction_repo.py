@@ -0,0 +1,477 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime
+from typing import Any, final
+
+from google.api_core.exceptions import AlreadyExists, GoogleAPICallError
+from google.cloud import firestore
+from google.cloud.firestore import AsyncClient
+from pydantic import UUID4
+
+from app.errors.transaction import TransactionNotExists
+from app.models.transaction_models import Transaction, TransactionType
+from app.repo import transaction_queries as queries
+from app.repo.query_planner import ResidualScan, plan_search
+
+
+@final
+class AsyncTransactionRepo:
+    """
+    `TransactionRepo` on top of Firestore's `AsyncClient`.
+
+    Every method has the same signature as its `TransactionRepo` counterpart but is a
+    coroutine, so requests run on the event loop instead of the threadpool.
+    """
+
+    def __init__(self, db: AsyncClient, user_id: str):
+        self.db = db
+        user_doc = db.collection("users").document(user_id)
+        self.tx_collection = user_doc.collection("transactions")
+        self.rollup_ref = user_doc.collection(queries.ROLLUP_COLLECTION).document(
+            queries.ROLLUP_DOCUMENT
+        )
+
+    @staticmethod
+    async def _iter_docs(
+        query: Any, fields: tuple[str, ...] | None = None
+    ) -> AsyncIterator[Transaction]:
+        async for doc in query.stream():
+            if not doc.exists:
+                continue
+            yield queries.to_transaction(doc, fields)
+
+    @staticmethod
+    async def _stream_docs(
+        query: Any, fields: tuple[str, ...] | None = None
+    ) -> list[Transaction]:
+        docs = [doc async for doc in query.stream() if doc.exists]
+        return queries.to_transactions(docs, fields)
+
+    @staticmethod
+    async def _iter_scan(query: Any, scan: ResidualScan) -> AsyncIterator[Any]:
+        # Residual filters run on the raw data, before any row is validated.
+        async for doc in query.stream():
+            if scan.done:
+                return
+            if doc.exists and scan.take(doc.to_dict()):
+                yield doc
+
+    @staticmethod
+    async def _scan(query: Any, scan: ResidualScan) -> list[Any]:
+        return [doc async for doc in AsyncTransactionRepo._iter_scan(query, scan)]
+
+    async def _get_many(
+        self, ids: list[UUID4], fields: tuple[str, ...] | None = None
+    ) -> list[Transaction]:
+        refs = list(queries.unique_refs(self.tx_collection, ids).values())
+        limit = asyncio.Semaphore(queries.MAX_PARALLEL_READS)
+
+        async def read(chunk: list[Any]) -> list[Any]:
+            async with limit:
+                return [doc async for doc in self.db.get_all(chunk, field_paths=fields)]
+
+        snapshots = await asyncio.gather(
+            *(read(chunk) for chunk in queries.chunked(refs, queries.GET_ALL_CHUNK))
+        )
+        docs = {doc.id: doc for chunk in snapshots for doc in chunk}
+        return queries.in_request_order(ids, docs, fields)
+
+    async def create(
+        self, transaction_type: TransactionType, data: Transaction | dict[str, Any]
+    ) -> Transaction:
+        """
+        Writes `data` unless a transaction with its id exists, e.g. when a client
+        resends it; the stored one is returned then.
+        """
+        if isinstance(data, dict):
+            # Validate and normalize common transaction fields before persisting.
+            data = Transaction(**data)
+
+        if not await self._create_row(queries.to_document(data)):
+            return await self.get(data.id)
+        return data
+
+    async def _create_row(self, tx_data: dict[str, Any]) -> bool:
+        """
+        Commits one row with its rollup increment.
+
+        Returns:
+            False, without writing anything, if the row already exists.
+        """
+        # `create` fails on an existing row, so a resent row is not counted twice.
+        batch = self.db.batch()
+        batch.create(self.tx_collection.document(tx_data["id"]), tx_data)
+        batch.set(
+            self.rollup_ref,
+            queries.rollup_document(queries.rollup_totals([tx_data])),
+            merge=True,
+        )
+        try:
+            await batch.commit()
+        except AlreadyExists:
+            return False
+        return True
+
+    async def create_many(self, items: list[Transaction]) -> dict[str, str]:
+        """
+        Writes `items` in write batches that each also increment the rollup by their
+        own rows, committed one after another like `TransactionRepo.create_many`.
+        A failed batch fails all of its items; items that already exist count as
+        written.
+
+        Returns:
+            The error message of every item that could not be written, by its id.
+        """
+        errors: dict[str, str] = {}
+        rows = [queries.to_document(tx) for tx in items]
+        # Each batch leaves room for its rollup write.
+        for chunk in queries.chunked(rows, queries.BATCH_LIMIT - 1):
+            batch = self.db.batch()
+            for tx_data in chunk:
+                batch.create(self.tx_collection.document(tx_data["id"]), tx_data)
+            totals = queries.rollup_totals(chunk)
+            batch.set(self.rollup_ref, queries.rollup_document(totals), merge=True)
+            try:
+                await batch.commit()
+            except AlreadyExists:
+                # Some rows were written before; write the others one by one.
+                for tx_data in chunk:
+                    try:
+                        _ = await self._create_row(tx_data)
+                    except GoogleAPICallError as e:
+                        errors[tx_data["id"]] = str(e)
+            except GoogleAPICallError as e:
+                errors.update((tx_data["id"], str(e)) for tx_data in chunk)
+        return errors
+
+    async def delete(
+        self, transaction_type: TransactionType, ids: list[UUID4]
+    ) -> list[UUID4]:
+        """
+        Deletes the transactions of `transaction_type` among `ids`, in transactions
+        that read the rows and decrement the rollup by them. A row deleted meanwhile
+        by another request is skipped, so it is never subtracted twice.
+
+        Returns:
+            The ids that were deleted, in request order.
+        """
+        refs = queries.unique_refs(self.tx_collection, ids)
+        if not refs:
+            return []
+
+        @firestore.async_transactional
+        async def delete_chunk(transaction: Any, chunk: list[Any]) -> list[str]:
+            docs = {
+                doc.id: doc
+                async for doc in self.db.get_all(
+                    chunk, field_paths=queries.ROLLUP_FIELDS, transaction=transaction
+                )
+            }
+            deletable = queries.deletable_ids(
+                [ref.id for ref in chunk], docs, transaction_type
+            )
+            for id in deletable:
+                transaction.delete(refs[id])
+            if deletable:
+                totals = queries.rollup_totals(
+                    (docs[id].to_dict() for id in deletable), sign=-1
+                )
+                transaction.set(
+                    self.rollup_ref, queries.rollup_document(totals), merge=True
+                )
+            return deletable
+
+        deleted: set[str] = set()
+        # Each transaction also decrements the rollup by what it deletes, leaving room
+        # for that one extra write.
+        for chunk in queries.chunked(list(refs.values()), queries.BATCH_LIMIT - 1):
+            deleted.update(await delete_chunk(self.db.transaction(), chunk))
+        return [id for key, id in queries.unique_ids(ids).items() if key in deleted]
+
+    async def get(self, id: UUID4) -> Transaction:
+        doc = await self.tx_collection.document(str(id)).get()
+        if not doc.exists:
+            raise TransactionNotExists()
+
+        return queries.to_transaction(doc)
+
+    async def list(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
+    ) -> list[Transaction]:
+        projection = queries.projected_fields(fields)
+        query = queries.list_query(
+            self.tx_collection, limit, offset, cursor, projection
+        )
+        return await self._stream_docs(query, projection)
+
+    def iter_list(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
+    ) -> AsyncIterator[Transaction]:
+        """
+        Like `list`, but yields rows as Firestore streams them. The query is built (and
+        the cursor validated) on call, before iteration starts.
+        """
+        projection = queries.projected_fields(fields)
+        query = queries.list_query(
+            self.tx_collection, limit, offset, cursor, projection
+        )
+        return self._iter_docs(query, projection)
+
+    async def iter_export(
+        self, chunk_size: int = queries.EXPORT_CHUNK
+    ) -> AsyncIterator[list[Transaction]]:
+        """
+        Every transaction, newest first, in lists of up to `chunk_size` read by one
+        query each.
+        """
+        after = None
+        while True:
+            query = queries.export_query(self.tx_collection, chunk_size, after)
+            docs = [doc async for doc in query.stream() if doc.exists]
+            if docs:
+                yield queries.to_transactions(docs)
+            if len(docs) < chunk_size:
+                return
+            after = docs[-1]
+
+    async def list_by_category(
+        self,
+        category: str,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+    ) -> list[Transaction]:
+        query = queries.list_by_category_query(
+            self.tx_collection, category, limit, offset, cursor
+        )
+        return await self._stream_docs(query)
+
+    async def search(
+        self,
+        transaction_type: TransactionType,
+        id: list[UUID4] | None = None,
+        min_amount: int | None = None,
+        max_amount: int | None = None,
+        min_amount_base: float | None = None,
+        max_amount_base: float | None = None,
+        currency: Any = None,
+        category: Any = None,
+        occurred_on: datetime | None = None,
+        occurred_before: datetime | None = None,
+        occurred_after: datetime | None = None,
+        recurring_only: bool | None = None,
+        exclude_recurring: bool | None = None,
+        subscription_id: str | None = None,
+        order_by: str | None = None,
+        order_direction: str = "DESCENDING",
+        q: str | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
+        **_: Any,
+    ) -> list[Transaction]:
+        projection = queries.projected_fields(fields)
+        if id is not None and len(id) > 0:
+            return await self._get_many(id, projection)
+
+        plan = plan_search(
+            transaction_type,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            min_amount_base=min_amount_base,
+            max_amount_base=max_amount_base,
+            currency=currency,
+            category=category,
+            occurred_on=occurred_on,
+            occurred_before=occurred_before,
+            occurred_after=occurred_after,
+            recurring_only=recurring_only,
+            exclude_recurring=exclude_recurring,
+            subscription_id=subscription_id,
+            order_by=order_by,
+            order_direction=order_direction,
+            q=q,
+        )
+        projection = queries.projected_fields(fields, plan.order_by)
+        query = queries.search_query(
+            self.tx_collection, plan, limit, offset, cursor, projection
+        )
+        if not plan.residual:
+            return await self._stream_docs(query, projection)
+
+        scan = ResidualScan(plan, offset, limit)
+        return queries.to_transactions(await self._scan(query, scan), projection)
+
+    def iter_search(
+        self,
+        transaction_type: TransactionType,
+        id: list[UUID4] | None = None,
+        fields: list[str] | None = None,
+        **filters: Any,
+    ) -> AsyncIterator[Transaction]:
+        """
+        Like `search`, but yields rows as Firestore streams them.
+        """
+
+        async def by_id() -> AsyncIterator[Transaction]:
+            for doc in await self._get_many(id or [], projection):
+                yield doc
+
+        projection = queries.projected_fields(fields)
+        if id is not None and len(id) > 0:
+            return by_id()
+
+        plan = plan_search(transaction_type, **filters)
+        query = queries.search_query(
+            self.tx_collection,
+            plan,
+            filters.get("limit"),
+            filters.get("offset"),
+            filters.get("cursor"),
+            projection,
+            bounded=False,
+        )
+        if not plan.residual:
+            return self._iter_docs(query, projection)
+
+        # A stream has no page to fill, so it scans as far as the client reads.
+        scan = ResidualScan(
+            plan, filters.get("offset"), filters.get("limit"), max_scanned=None
+        )
+        return (
+            queries.to_transaction(doc, projection)
+            async for doc in self._iter_scan(query, scan)
+        )
+
+    async def get_rollup(self) -> dict[str, Any]:
+        doc = await self.rollup_ref.get()
+        return queries.to_rollup(doc.to_dict())
+
+    async def get_version(self) -> int:
+        doc = await self.rollup_ref.get(field_paths=[queries.VERSION_FIELD])
+        return queries.to_version(doc.to_dict())
+
+    async def rebuild_rollup(self) -> int:
+        """
+        Recomputes the rollup from the stored transactions, reading only the fields it
+        needs. Writes made while it runs may be lost from the rollup, so run it when
+        the user is idle.
+
+        Returns:
+            The number of transactions counted.
+        """
+        query = self.tx_collection.select(queries.ROLLUP_FIELDS)
+        totals = queries.rollup_totals([doc.to_dict() async for doc in query.stream()])
+        await self.rollup_ref.set(
+            queries.rollup_document(totals, increment=False),
+            merge=queries.ROLLUP_REBUILD_MERGE,
+        )
+        return sum(count for count, _ in totals.values())
+
+    async def rebuild_search_tokens(self) -> int:
+        """
+        Recomputes the stored search tokens of every transaction, e.g. after the
+        tokenizer changed or for transactions stored before search existed. The
+        version is bumped when any row changed, so cached searches and ETags are
+        refreshed.
+
+        Returns:
+            The number of transactions updated.
+        """
+        query = self.tx_collection.select(queries.SEARCHABLE_FIELDS)
+        docs = [doc async for doc in query.stream()]
+        for chunk in queries.chunked(docs):
+            batch = self.db.batch()
+            for doc in chunk:
+                tokens = queries.search_tokens(doc.to_dict())
+                batch.update(doc.reference, {queries.SEARCH_TOKENS_FIELD: tokens})
+            await batch.commit()
+        if docs:
+            await self.rollup_ref.set(queries.version_document(), merge=True)
+        return len(docs)
+
+    async def backfill_amount_base(
+        self, rates_of: Callable[[list[dict[str, Any]]], list[float | None]]
+    ) -> int:
+        """
+        Stores `amount_base` and `exchange_rate` on every transaction that has no
+        `amount_base` yet, with the rates `rates_of` returns for the stored rows.
+        Transactions whose rate is still unknown are left as they are. The version
+        is bumped when any row changed, so cached reads and ETags are refreshed.
+
+        Returns:
+            The number of transactions updated.
+        """
+        query = self.tx_collection.select(queries.BASE_AMOUNT_FIELDS)
+        rows = [
+            (doc.reference, data)
+            async for doc in query.stream()
+            if (data := doc.to_dict()).get("amount_base") is None
+        ]
+        rates = rates_of([data for _, data in rows])
+        updates = [
+            (ref, data, rate)
+            for (ref, data), rate in zip(rows, rates, strict=True)
+            if rate is not None
+        ]
+        for chunk in queries.chunked(updates):
+            batch = self.db.batch()
+            for ref, data, rate in chunk:
+                batch.update(
+                    ref,
+                    {
+                        "exchange_rate": rate,
+                        "amount_base": queries.base_amount(data["amount"], rate),
+                    },
+                )
+            await batch.commit()
+        if updates:
+            await self.rollup_ref.set(queries.version_document(), merge=True)
+        return len(updates)
+
+    async def categories(
+        self,
+        transaction_type: TransactionType,
+        start: datetime,
+        end: datetime,
+        currency: Any = None,
+    ) -> list[str | None]:
+        query = queries.categories_query(
+            self.tx_collection, transaction_type, start, end, currency
+        )
+        return queries.sorted_categories(
+            [(doc.to_dict() or {}).get("category") async for doc in query.stream()]
+        )
+
+    async def summarize(
+        self,
+        transaction_type: TransactionType,
+        ranges: list[tuple[datetime, datetime]],
+        categories: list[str | None] | None = None,
+        currency: Any = None,
+        amount_field: str = "amount",
+    ) -> list[tuple[int, float]]:
+        aggregations = queries.summary_aggregations(
+            self.tx_collection,
+            transaction_type,
+            ranges,
+            categories,
+            currency,
+            amount_field,
+        )
+        limit = asyncio.Semaphore(queries.MAX_PARALLEL_AGGREGATIONS)
+
+        async def run(agg: Any) -> tuple[int, float]:
+            async with limit:
+                return queries.aggregation_values(await agg.get())
+
+        return list(await asyncio.gather(*(run(agg) for agg in aggregations)))
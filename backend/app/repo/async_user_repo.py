@@ -0,0 +1,40 @@
+from typing import Any, final
+
+from google.cloud.firestore_v1 import (
+    AsyncClient,
+    AsyncDocumentReference,
+    DocumentSnapshot,
+    FieldFilter,
+)
+from pydantic import EmailStr
+
+
+@final
+class AsyncUserRepo:
+    """
+    `UserRepo` on top of Firestore's `AsyncClient`; methods that perform I/O are
+    coroutines with the same signatures.
+    """
+
+    def __init__(self, db: AsyncClient):
+        self.col = db.collection("users")
+
+    async def create_user(self, data: dict[Any, Any]) -> str:
+        doc_ref = self.col.document()
+        await doc_ref.set(data)
+        return doc_ref.id
+
+    async def delete_user(self, user_id: str) -> None:
+        doc_ref = self.col.document(user_id)
+        await doc_ref.delete()
+
+    async def get_user_by_email(self, email: EmailStr) -> list[DocumentSnapshot]:
+        doc_query = self.col.where(filter=FieldFilter("email", "==", email))
+        return [doc async for doc in doc_query.stream()]
+
+    def get_user_by_id(self, user_id: str) -> AsyncDocumentReference:
+        return self.col.document(user_id)
+
+    async def get_user_by_google_sub(self, google_sub: str) -> list[DocumentSnapshot]:
+        doc_query = self.col.where(filter=FieldFilter("google_sub", "==", google_sub))
+        return [doc async for doc in doc_query.stream()]
@@ -0,0 +1,133 @@
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any, final
+
+from pydantic import UUID4
+
+from app.core.concurrency import run_repo
+from app.infrastructure.transaction_cache import TransactionCacheBackend
+from app.models.transaction_models import Transaction, TransactionType
+from app.repo import transaction_queries as queries
+from app.repo.async_transaction_repo import AsyncTransactionRepo
+from app.repo.transaction_repo import TransactionRepo
+
+# Filters where the order of the values does not change the result.
+_UNORDERED_FILTERS = {"currency", "category"}
+
+
+def _freeze(name: str, value: Any) -> Hashable:
+    if name == "fields":
+        return queries.projected_fields(value)
+    if isinstance(value, list):
+        if name in _UNORDERED_FILTERS:
+            return tuple(sorted(set(value)))
+        return tuple(value)
+    return value
+
+
+def _search_key(filters: dict[str, Any]) -> Hashable:
+    # Unset filters are left out, so `limit=None` and no limit share an entry.
+    frozen = ((name, _freeze(name, value)) for name, value in filters.items())
+    return tuple(sorted((name, value) for name, value in frozen if value is not None))
+
+
+@final
+class CachedTransactionRepo:
+    """
+    Serves `list` and `search` of a transaction repo from a `TransactionCache`, and
+    invalidates the user's affected entries after every write through it.
+
+    The cached and write methods are coroutines whichever repo is wrapped; every
+    other attribute is the wrapped repo's own.
+    """
+
+    def __init__(
+        self,
+        repo: TransactionRepo | AsyncTransactionRepo,
+        cache: TransactionCacheBackend,
+        user_id: str,
+    ):
+        self.repo = repo
+        self.cache = cache
+        self.user_id = user_id
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.repo, name)
+
+    async def _write(
+        self,
+        transaction_types: Iterable[str] | None,
+        method: Callable[..., Any],
+        *args: Any,
+    ) -> Any:
+        try:
+            result = await run_repo(method, *args)
+        except BaseException:
+            await self.cache.invalidate(self.user_id, transaction_types)
+            raise
+        # Recorded with the invalidation, so the cache does not take this write for
+        # one by another instance and drop the entries it left in place.
+        version = await run_repo(self.repo.get_version)
+        await self.cache.invalidate(self.user_id, transaction_types, version)
+        return result
+
+    async def create(
+        self, transaction_type: TransactionType, data: Transaction | dict[str, Any]
+    ) -> Transaction:
+        types = None
+        if isinstance(data, Transaction):
+            types = [data.transaction_type.value]
+        return await self._write(types, self.repo.create, transaction_type, data)
+
+    async def create_many(self, items: list[Transaction]) -> dict[str, str]:
+        return await self._write(
+            {tx.transaction_type.value for tx in items}, self.repo.create_many, items
+        )
+
+    async def delete(
+        self, transaction_type: TransactionType, ids: list[UUID4]
+    ) -> list[UUID4]:
+        return await self._write(
+            [transaction_type.value], self.repo.delete, transaction_type, ids
+        )
+
+    async def backfill_amount_base(
+        self, rates_of: Callable[[list[dict[str, Any]]], list[float | None]]
+    ) -> int:
+        return await self._write(None, self.repo.backfill_amount_base, rates_of)
+
+    async def list(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
+    ) -> list[Any]:
+        rows = await self.cache.get_or_load(
+            self.user_id,
+            "list",
+            (limit, offset, cursor, queries.projected_fields(fields)),
+            None,
+            lambda: run_repo(self.repo.list, limit, offset, cursor, fields),
+        )
+        # Callers get their own list; the rows are shared and must not be mutated.
+        return list(rows)
+
+    async def search(
+        self, transaction_type: TransactionType, **filters: Any
+    ) -> list[Any]:
+        rows = await self.cache.get_or_load(
+            self.user_id,
+            "search",
+            (transaction_type.value, _search_key(filters)),
+            transaction_type.value,
+            lambda: run_repo(self.repo.search, transaction_type, **filters),
+        )
+        return list(rows)
+
+    async def get_version(self) -> int:
+        return await self.cache.version(
+            self.user_id, lambda: run_repo(self.repo.get_version)
+        )
+
+
+AnyTransactionRepo = TransactionRepo | AsyncTransactionRepo | CachedTransactionRepo
@@ -0,0 +1,356 @@
+"""
+Plans transaction searches so Firestore can serve them from a single composite index.
+
+Firestore orders a query by its inequality field first and allows one `in` and one
+`array_contains` filter, so not every combination of search filters can be sent
+as-is. The planner pushes every equality filter, the most selective `in` filter, one
+token of the search term and the range on the sort field into the query, and leaves
+the rest to be checked in memory on the streamed rows. Searches are sorted newest
+first, or by `amount_base` when it is bounded, so that range is served by the index.
+
+`composite_indexes` lists the index of every query the repos can send; the
+`app.jobs.generate_indexes` job writes them to `firestore.indexes.json`.
+"""
+
+import operator
+from collections.abc import Callable, Iterable, Mapping
+from datetime import datetime, timezone
+from itertools import product
+from typing import Any, final
+
+from app.errors.transaction import QueryTooBroadError
+from app.models.transaction_models import TransactionType
+from app.repo.search_tokens import (
+    SEARCH_TOKENS_FIELD,
+    SEARCHABLE_FIELDS,
+    most_selective,
+    searchable_text,
+    tokenize,
+    words,
+)
+
+COLLECTION_GROUP = "transactions"
+
+# Most rows a search reads to apply in-memory filters before it is rejected.
+RESIDUAL_SCAN_LIMIT = 2000
+
+# Page size of searches with in-memory filters that set no `limit`, so they stop
+# reading once a page is filled instead of scanning for every match.
+RESIDUAL_PAGE_LIMIT = 20
+
+# Firestore rejects `in` filters with more values than this.
+MAX_IN_VALUES = 30
+
+# Residual filters on this field check `searchable_text`, which is not stored but
+# read from `SEARCHABLE_FIELDS`.
+SEARCH_TEXT = "search_text"
+
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "in": lambda value, values: value in values,
+    "contains_words": lambda value, values: all(word in value for word in values),
+}
+
+
+def _utc(value: Any) -> Any:
+    # Firestore reads naive datetimes as UTC and returns aware ones.
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _field(data: Mapping[str, Any], field: str) -> Any:
+    if field == SEARCH_TEXT:
+        return searchable_text(data)
+    return data.get(field)
+
+
+def _values(value: Any) -> list[Any] | None:
+    if value is None:
+        return None
+    values = value if isinstance(value, list) else [value]
+    return list(dict.fromkeys(str(v) for v in values)) or None
+
+
+@final
+class SearchPlan:
+    """
+    The filters of one search, split into those sent to Firestore and the residual
+    ones checked in memory.
+    """
+
+    def __init__(self, order_by: str, direction: str):
+        self.order_by = order_by
+        self.direction = direction
+        self.equalities: list[tuple[str, Any]] = []
+        self.in_filter: tuple[str, list[Any]] | None = None
+        self.array_contains: tuple[str, Any] | None = None
+        self.ranges: list[tuple[str, str, Any]] = []
+        self.residual: list[tuple[str, str, Any]] = []
+
+    @property
+    def residual_fields(self) -> set[str]:
+        fields = {field for field, _, _ in self.residual}
+        if SEARCH_TEXT in fields:
+            fields.remove(SEARCH_TEXT)
+            fields.update(SEARCHABLE_FIELDS)
+        return fields
+
+    def matches(self, data: Mapping[str, Any]) -> bool:
+        for field, op, value in self.residual:
+            try:
+                if not _OPERATORS[op](_field(data, field), value):
+                    return False
+            except TypeError:
+                # e.g. a missing field compared with a number.
+                return False
+        return True
+
+    def index_fields(self) -> list[tuple[str, str]]:
+        equality = {field for field, _ in self.equalities}
+        if self.in_filter is not None:
+            equality.add(self.in_filter[0])
+        contains = None if self.array_contains is None else self.array_contains[0]
+        return index_fields(equality, self.order_by, self.direction, contains)
+
+
+def index_fields(
+    equality: Iterable[str],
+    order_by: str,
+    direction: str,
+    contains: str | None = None,
+) -> list[tuple[str, str]]:
+    """
+    The composite index serving equality filters on `equality`, and an
+    `array_contains` filter on `contains`, sorted by `order_by`. Queries break ties
+    by document id in the same direction.
+    """
+    fields = [(field, "ASCENDING") for field in equality]
+    if contains is not None:
+        fields.append((contains, "CONTAINS"))
+    fields.sort()
+    fields.append((order_by, direction))
+    if direction == "DESCENDING":
+        fields.append(("__name__", "DESCENDING"))
+    return fields
+
+
+def search_order_by(
+    min_amount_base: float | None = None,
+    max_amount_base: float | None = None,
+    **_: Any,
+) -> str:
+    """
+    The field a search with these filters is sorted by, which its cursors point into.
+    """
+    if min_amount_base is not None or max_amount_base is not None:
+        return "amount_base"
+    return "occurred_at"
+
+
+def plan_search(
+    transaction_type: TransactionType,
+    min_amount: int | None = None,
+    max_amount: int | None = None,
+    min_amount_base: float | None = None,
+    max_amount_base: float | None = None,
+    currency: Any = None,
+    category: Any = None,
+    occurred_on: datetime | None = None,
+    occurred_before: datetime | None = None,
+    occurred_after: datetime | None = None,
+    recurring_only: bool | None = None,
+    exclude_recurring: bool | None = None,
+    subscription_id: str | None = None,
+    order_by: str | None = None,
+    order_direction: str = "DESCENDING",
+    q: str | None = None,
+    **_: Any,
+) -> SearchPlan:
+    """
+    Splits the filters of a transaction search into a `SearchPlan`, sorted by
+    `order_by` or else `search_order_by`. Pagination and projection arguments are
+    accepted and ignored.
+    """
+    if order_by is None:
+        order_by = search_order_by(min_amount_base, max_amount_base)
+    plan = SearchPlan(order_by, order_direction)
+    plan.equalities.append(("transaction_type", transaction_type.value))
+
+    if occurred_on is not None:
+        occurred_after = occurred_on.replace(hour=0, minute=0, second=0, microsecond=0)
+        occurred_before = occurred_on.replace(
+            hour=23, minute=59, second=59, microsecond=999999
+        )
+
+    # Only a range on the sort field can be served by the same index.
+    for field, op, value in [
+        ("amount", ">=", min_amount),
+        ("amount", "<=", max_amount),
+        ("amount_base", ">=", min_amount_base),
+        ("amount_base", "<=", max_amount_base),
+        ("occurred_at", "<=", occurred_before),
+        ("occurred_at", ">=", occurred_after),
+    ]:
+        if value is None:
+            continue
+        target = plan.ranges if field == order_by else plan.residual
+        target.append((field, op, _utc(value)))
+
+    memberships: list[tuple[str, list[Any]]] = []
+    for field, value in [("currency", currency), ("category", category)]:
+        values = _values(value)
+        if values is None:
+            continue
+        if len(values) == 1:
+            plan.equalities.append((field, values[0]))
+        else:
+            memberships.append((field, values))
+    # One `in` per query: push the shortest list, which drops the most rows.
+    memberships.sort(key=lambda m: len(m[1]))
+    for field, values in memberships:
+        if plan.in_filter is None and len(values) <= MAX_IN_VALUES:
+            plan.in_filter = (field, values)
+        else:
+            plan.residual.append((field, "in", set(values)))
+
+    if transaction_type == TransactionType.EXPENSE:
+        if recurring_only:
+            # `!=` is an inequality, which has to be on the sort field.
+            plan.residual.append(("interval", "!=", None))
+            if subscription_id is not None:
+                plan.equalities.append(("subscription_id", subscription_id))
+        if exclude_recurring:
+            plan.equalities.append(("interval", None))
+
+    tokens = tokenize(q) if q is not None else []
+    if tokens:
+        # Firestore allows one `array_contains`; it limits the read to the postings
+        # of the most selective token. A row holding a one-token term holds it as a
+        # substring; for longer terms the rows read are checked for each word.
+        plan.array_contains = (SEARCH_TOKENS_FIELD, most_selective(tokens))
+        if len(tokens) > 1:
+            plan.residual.append((SEARCH_TEXT, "contains_words", words(q)))
+    return plan
+
+
+def page_limit(plan: SearchPlan, limit: int | None) -> int | None:
+    """
+    The page size of a search with `plan`: `limit`, or `RESIDUAL_PAGE_LIMIT` when
+    the plan has residual filters and no limit was set.
+    """
+    if limit is None and plan.residual:
+        return RESIDUAL_PAGE_LIMIT
+    return limit
+
+
+@final
+class ResidualScan:
+    """
+    Applies a plan's residual filters, then `offset` and `limit`, to rows in query
+    order.
+
+    Raises:
+        QueryTooBroadError: From `take`, once more than `max_scanned` rows were read.
+    """
+
+    def __init__(
+        self,
+        plan: SearchPlan,
+        offset: int | None,
+        limit: int | None,
+        max_scanned: int | None = RESIDUAL_SCAN_LIMIT,
+    ):
+        self.plan = plan
+        self.offset = offset or 0
+        self.limit = limit
+        self.max_scanned = max_scanned
+        self.scanned = 0
+        self.skipped = 0
+        self.taken = 0
+
+    @property
+    def done(self) -> bool:
+        return self.limit is not None and self.taken >= self.limit
+
+    def take(self, data: Mapping[str, Any]) -> bool:
+        self.scanned += 1
+        if self.max_scanned is not None and self.scanned > self.max_scanned:
+            raise QueryTooBroadError(self.max_scanned)
+        if not self.plan.matches(data):
+            return False
+        if self.skipped < self.offset:
+            self.skipped += 1
+            return False
+        self.taken += 1
+        return True
+
+
+def _search_plans() -> Iterable[SearchPlan]:
+    # One representative per filter shape; the values do not change the index.
+    day = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for amount_base, currency, category, recurring, q in product(
+        [{}, {"min_amount_base": 1.0}],
+        [None, "USD", ["USD", "JPY"]],
+        [None, "food", ["food", "rent"]],
+        [{}, {"exclude_recurring": True}, {"recurring_only": True}],
+        [None, "starbucks"],
+    ):
+        for subscription_id in (
+            [None, "sub"] if "recurring_only" in recurring else [None]
+        ):
+            yield plan_search(
+                TransactionType.EXPENSE,
+                currency=currency,
+                category=category,
+                occurred_after=day,
+                subscription_id=subscription_id,
+                q=q,
+                **amount_base,
+                **recurring,
+            )
+
+
+def composite_indexes() -> list[list[tuple[str, str]]]:
+    """
+    The composite indexes of every query the transaction repos send, in a stable
+    order.
+    """
+    indexes = {tuple(plan.index_fields()) for plan in _search_plans()}
+    # `list_by_category`.
+    indexes.add(tuple(index_fields(["category"], "occurred_at", "DESCENDING")))
+    # Summary aggregations: equality filters and a range on `occurred_at`.
+    for extra in [[], ["category"], ["currency"], ["category", "currency"]]:
+        indexes.add(
+            tuple(
+                index_fields(["transaction_type", *extra], "occurred_at", "ASCENDING")
+            )
+        )
+    return [list(fields) for fields in sorted(indexes)]
+
+
+def firestore_indexes() -> dict[str, Any]:
+    """
+    `composite_indexes` in the format of `firestore.indexes.json`.
+    """
+    return {
+        "indexes": [
+            {
+                "collectionGroup": COLLECTION_GROUP,
+                "queryScope": "COLLECTION",
+                "fields": [
+                    (
+                        {"fieldPath": field, "arrayConfig": order}
+                        if order == "CONTAINS"
+                        else {"fieldPath": field, "order": order}
+                    )
+                    for field, order in fields
+                ],
+            }
+            for fields in composite_indexes()
+        ],
+        "fieldOverrides": [],
+    }
@@ -0,0 +1,49 @@
+from collections.abc import Mapping
+from datetime import date, datetime, timezone
+from typing import final
+
+from google.cloud.firestore import Client
+from google.cloud.firestore_v1 import FieldFilter
+
+# Firestore rejects write batches with more than 500 operations.
+BATCH_LIMIT = 500
+
+
+@final
+class RateRepo:
+    """
+    Daily exchange-rate snapshots, one document per day keyed by its ISO date.
+    """
+
+    def __init__(self, db: Client):
+        self.db = db
+        self.col = db.collection("exchange_rates")
+
+    def save_many(
+        self, days: Mapping[date, Mapping[str, float]], base: str = "USD"
+    ) -> None:
+        items = list(days.items())
+        for start in range(0, len(items), BATCH_LIMIT):
+            batch = self.db.batch()
+            for day, rates in items[start : start + BATCH_LIMIT]:
+                batch.set(
+                    self.col.document(day.isoformat()),
+                    {
+                        "date": day.isoformat(),
+                        "base": base,
+                        "rates": dict(rates),
+                        "saved_at": datetime.now(timezone.utc),
+                    },
+                )
+            batch.commit()
+
+    def load(self, since: date | None = None) -> dict[date, dict[str, float]]:
+        query = self.col
+        if since is not None:
+            query = query.where(filter=FieldFilter("date", ">=", since.isoformat()))
+
+        result: dict[date, dict[str, float]] = {}
+        for doc in query.stream():
+            data = doc.to_dict()
+            result[date.fromisoformat(data["date"])] = data["rates"]
+        return result
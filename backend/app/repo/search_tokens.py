@@ -0,0 +1,94 @@
+"""
+Tokens of the free-text search over `business_name` and `description`.
+
+Text is normalized with NFKC, so full-width characters from PayPay exports match
+their ASCII forms, and case-folded. Each run of word characters then yields its
+character bigrams, which works the same for space-separated words and for Japanese
+text without spaces. A run of one character is kept as a token of its own.
+
+Every transaction stores the bigrams and the single characters of its text in
+`SEARCH_TOKENS_FIELD`, so one-character terms match longer words too. Firestore
+indexes the array, so a search reads only the transactions holding one of the term's
+tokens. Holding every token of a term does not mean holding the term ("cafe" and
+"Cash Safeway Feed"), so the rows read are checked for each of its words as well.
+"""
+
+import re
+import unicodedata
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+SEARCH_TOKENS_FIELD = "search_tokens"
+
+# The fields whose text is searchable.
+SEARCHABLE_FIELDS = ["business_name", "description"]
+
+NGRAM = 2
+
+_WORD = re.compile(r"\w+")
+
+# English letters from most to least frequent. Characters not listed, such as digits
+# and Japanese text, are taken to be rare.
+_LETTER_FREQUENCY = "etaoinsrhldcumfpgwybvkxjqz"
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def words(text: str) -> list[str]:
+    """
+    The normalized runs of word characters of `text`.
+    """
+    return _WORD.findall(normalize(text))
+
+
+def searchable_text(data: Mapping[str, Any]) -> str:
+    """
+    The normalized searchable fields of stored transaction data, one per line, so no
+    word spans two fields.
+    """
+    return "\n".join(normalize(data.get(field) or "") for field in SEARCHABLE_FIELDS)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    The distinct tokens of `text`, in order of first appearance.
+    """
+    tokens: dict[str, None] = {}
+    for word in words(text):
+        if len(word) < NGRAM:
+            tokens[word] = None
+        for start in range(len(word) - NGRAM + 1):
+            tokens[word[start : start + NGRAM]] = None
+    return list(tokens)
+
+
+def document_tokens(texts: Iterable[str | None]) -> list[str]:
+    """
+    The tokens stored on a transaction with the given searchable texts: the tokens
+    of each text, and each of its characters.
+    """
+    tokens: set[str] = set()
+    for text in texts:
+        if not text:
+            continue
+        tokens.update(tokenize(text))
+        tokens.update(char for word in words(text) for char in word)
+    return sorted(tokens)
+
+
+def _commonness(token: str) -> int:
+    return sum(
+        len(_LETTER_FREQUENCY) - _LETTER_FREQUENCY.index(char)
+        for char in token
+        if char in _LETTER_FREQUENCY
+    )
+
+
+def most_selective(tokens: list[str]) -> str:
+    """
+    The token of a term expected to match the fewest transactions: the longest one,
+    then the one of the rarest characters, then the first.
+    """
+    return min(tokens, key=lambda token: (-len(token), _commonness(token)))
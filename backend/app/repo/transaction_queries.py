@@ -0,0 +1,560 @@
+"""
+Query building and document mapping shared by the sync and async transaction repos.
+
+Firestore's sync and async query objects expose the same builder API, so everything
+that does not perform I/O lives here and both repos only differ in how they await it.
+"""
+
+import base64
+import binascii
+import json
+from collections.abc import Iterable, Iterator, Mapping
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from functools import lru_cache
+from typing import Any
+from uuid import UUID
+
+from google.cloud.firestore_v1 import FieldFilter, Increment
+from pydantic import UUID4, BaseModel, TypeAdapter
+
+from app.errors.transaction import InvalidCursorError, SummaryTooLargeError
+from app.models.transaction_models import (
+    PROJECTION_REQUIRED_FIELDS,
+    Transaction,
+    TransactionType,
+    projection_model,
+)
+from app.repo.query_planner import RESIDUAL_SCAN_LIMIT, SearchPlan
+from app.repo.search_tokens import (
+    SEARCH_TOKENS_FIELD,
+    SEARCHABLE_FIELDS,
+    document_tokens,
+)
+
+# Firestore rejects write batches with more than 500 operations.
+BATCH_LIMIT = 500
+
+# What `backfill_amount_base` reads of each stored transaction.
+BASE_AMOUNT_FIELDS = [
+    "amount",
+    "amount_base",
+    "currency",
+    "exchange_rate",
+    "occurred_at",
+]
+
+# Rows read per query by exports; each chunk resumes after the previous one, so no
+# single stream stays open for the whole export.
+EXPORT_CHUNK = 1000
+
+# Id lookups are read with one get_all per chunk; large lists read chunks in parallel.
+GET_ALL_CHUNK = 100
+MAX_PARALLEL_READS = 8
+
+# Summaries run one aggregation query per bucket, at most this many at a time.
+MAX_SUMMARY_BUCKETS = 300
+MAX_PARALLEL_AGGREGATIONS = 16
+
+# Per-user monthly rollup: one document holding the count and amount total of every
+# month x transaction type x category x currency, kept up to date by every write.
+# Amounts in different currencies are never added up together.
+ROLLUP_COLLECTION = "rollups"
+ROLLUP_DOCUMENT = "monthly"
+ROLLUP_FIELDS = ["amount", "category", "currency", "occurred_at", "transaction_type"]
+UNCATEGORIZED = "(uncategorized)"
+# Also in the rollup document: a counter bumped by every write to the user's
+# transactions, which identifies the state of the collection for ETags.
+VERSION_FIELD = "version"
+# Replaces every month of the rollup, but keeps counting versions up.
+ROLLUP_REBUILD_MERGE = ["months", VERSION_FIELD]
+
+# Ties on the sort field are broken by document id so cursors are unambiguous.
+DOCUMENT_ID = "__name__"
+
+
+def apply_optional_filters(
+    query: Any,
+    filters: list[tuple[str, str, Any]],
+) -> Any:
+    for field, operator, value in filters:
+        if value is None:
+            continue
+        query = query.where(
+            filter=FieldFilter(
+                field,
+                operator,
+                value,
+            )
+        )
+    return query
+
+
+def apply_optional_in_filters(
+    query: Any,
+    filters: list[tuple[str, list[Any] | None]],
+) -> Any:
+    for field, values in filters:
+        if values is None or len(values) == 0:
+            continue
+        query = query.where(
+            filter=FieldFilter(
+                field,
+                "in",
+                values,
+            )
+        )
+    return query
+
+
+def apply_order(query: Any, order_by: str, direction: str) -> Any:
+    query = query.order_by(order_by, direction=direction)
+    return query.order_by(DOCUMENT_ID, direction=direction)
+
+
+def apply_pagination(
+    query: Any,
+    offset: int | None,
+    limit: int | None,
+    cursor: str | None = None,
+    order_by: str = "occurred_at",
+) -> Any:
+    if cursor is not None:
+        query = query.start_after(decode_cursor(cursor, order_by))
+    if offset is not None:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def projected_fields(
+    fields: Iterable[str] | None, order_by: str = "occurred_at"
+) -> tuple[str, ...] | None:
+    """
+    The field paths to read for a `fields=` projection, or None to read everything.
+    The sort field is always read, so cursors can be built from the rows.
+    """
+    if not fields:
+        return None
+    return tuple(sorted(set(fields) | set(PROJECTION_REQUIRED_FIELDS) | {order_by}))
+
+
+def apply_projection(query: Any, fields: tuple[str, ...] | None) -> Any:
+    if fields is None:
+        return query
+    return query.select(fields)
+
+
+def encode_cursor(tx: Any, order_by: str = "occurred_at") -> str:
+    """
+    Opaque token pointing just past `tx` in a query sorted by `order_by`.
+    """
+    value = getattr(tx, order_by)
+    if isinstance(value, datetime):
+        value = {"dt": value.isoformat()}
+    elif isinstance(value, Enum):
+        value = value.value
+    payload = json.dumps({"f": order_by, "v": value, "id": str(tx.id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, order_by: str = "occurred_at") -> dict[str, Any]:
+    """
+    Turns a token from `encode_cursor` into `start_after` field values.
+
+    Raises:
+        InvalidCursorError: If the token is malformed, does not point at a
+            transaction id, or was issued for a different sort order.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        field, value, doc_id = payload["f"], payload["v"], payload["id"]
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["dt"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError() from e
+
+    if field != order_by or not _is_transaction_id(doc_id):
+        raise InvalidCursorError()
+    return {order_by: value, DOCUMENT_ID: doc_id}
+
+
+def _is_transaction_id(value: Any) -> bool:
+    # Anything else, e.g. an id with "/", would make `start_after` build an invalid
+    # document path.
+    try:
+        return isinstance(value, str) and str(UUID(value)) == value
+    except ValueError:
+        return False
+
+
+def chunked(items: list[Any], size: int = BATCH_LIMIT) -> Iterator[list[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def unique_refs(collection: Any, ids: Iterable[UUID4]) -> dict[str, Any]:
+    """
+    Document references for `ids` keyed by document id, without duplicates.
+    """
+    return {str(id): collection.document(str(id)) for id in ids}
+
+
+def unique_ids(ids: Iterable[UUID4]) -> dict[str, UUID4]:
+    """
+    `ids` keyed by document id, without duplicates, in request order.
+    """
+    return {str(id): id for id in ids}
+
+
+def deletable_ids(
+    ids: Iterable[Any],
+    docs: Mapping[str, Any],
+    transaction_type: TransactionType,
+) -> list[Any]:
+    """
+    The ids (UUIDs or document ids), in request order, whose snapshot in `docs`
+    exists and has `transaction_type`.
+    """
+    result: list[Any] = []
+    seen: set[str] = set()
+    for id in ids:
+        key = str(id)
+        doc = docs.get(key)
+        if key in seen or doc is None or not doc.exists:
+            continue
+        if doc.to_dict().get("transaction_type") != transaction_type.value:
+            continue
+        seen.add(key)
+        result.append(id)
+    return result
+
+
+def in_request_order(
+    ids: Iterable[UUID4],
+    docs: Mapping[str, Any],
+    fields: tuple[str, ...] | None = None,
+) -> list[Any]:
+    """
+    Transactions for the existing snapshots in `docs`, in the order of `ids`.
+    """
+    found = (docs.get(str(id)) for id in ids)
+    return to_transactions(
+        (doc for doc in found if doc is not None and doc.exists), fields
+    )
+
+
+def _rollup_key(data: Mapping[str, Any]) -> tuple[str, str, str, str]:
+    occurred_at = data["occurred_at"]
+    # Firestore stores timestamps in UTC (naive ones as if they were), so bucket there.
+    if occurred_at.tzinfo is not None:
+        occurred_at = occurred_at.astimezone(timezone.utc)
+    tx_type = data["transaction_type"]
+    if isinstance(tx_type, Enum):
+        tx_type = tx_type.value
+    return (
+        f"{occurred_at:%Y-%m}",
+        tx_type,
+        data.get("category") or UNCATEGORIZED,
+        str(data["currency"]),
+    )
+
+
+def rollup_totals(
+    rows: Iterable[Mapping[str, Any]], sign: int = 1
+) -> dict[tuple[str, str, str, str], tuple[int, float]]:
+    """
+    Count and amount total of stored transaction data by (month, type, category,
+    currency); negated with `sign=-1` for rows being deleted.
+    """
+    totals: dict[tuple[str, str, str, str], tuple[int, float]] = {}
+    for data in rows:
+        key = _rollup_key(data)
+        count, total = totals.get(key, (0, 0.0))
+        totals[key] = (count + sign, total + sign * float(data["amount"]))
+    return totals
+
+
+def rollup_document(
+    totals: Mapping[tuple[str, str, str, str], tuple[int, float]],
+    increment: bool = True,
+) -> dict[str, Any]:
+    """
+    The rollup document for `totals`, which also bumps the version. With `increment`
+    the values are `Increment` transforms, to be written with `merge=True` in the
+    same batch as the rows they count; otherwise they replace all months when
+    written with `merge=ROLLUP_REBUILD_MERGE`.
+    """
+    months: dict[str, Any] = {}
+    for (month, tx_type, category, currency), (count, total) in totals.items():
+        if increment:
+            bucket = {"count": Increment(count), "total": Increment(total)}
+        else:
+            bucket = {"count": count, "total": total}
+        categories = months.setdefault(month, {}).setdefault(tx_type, {})
+        categories.setdefault(category, {})[currency] = bucket
+    return {"months": months, VERSION_FIELD: Increment(1)}
+
+
+def version_document() -> dict[str, Any]:
+    """
+    Bumps the version without touching the counts, for writes that change stored
+    rows but not what the rollup counts. Written with `merge=True`.
+    """
+    return {VERSION_FIELD: Increment(1)}
+
+
+def to_version(data: Mapping[str, Any] | None) -> int:
+    return int((data or {}).get(VERSION_FIELD) or 0)
+
+
+def to_rollup(data: Mapping[str, Any] | None) -> dict[str, Any]:
+    """
+    The `months` of a stored rollup, without buckets emptied by deletes.
+    """
+    months: dict[str, Any] = {}
+    for month, types in ((data or {}).get("months") or {}).items():
+        for tx_type, categories in types.items():
+            for category, currencies in categories.items():
+                for currency, bucket in currencies.items():
+                    # Skips emptied buckets, and the per-category buckets rollups
+                    # had before they were keyed by currency (rebuild_rollups).
+                    if not isinstance(bucket, Mapping) or bucket.get("count", 0) <= 0:
+                        continue
+                    buckets = months.setdefault(month, {}).setdefault(tx_type, {})
+                    buckets.setdefault(category, {})[currency] = bucket
+    return months
+
+
+def to_document(data: Transaction) -> dict[str, Any]:
+    tx_data = data.model_dump()
+    tx_data["id"] = str(tx_data["id"])
+    tx_data["transaction_type"] = tx_data["transaction_type"].value
+    tx_data[SEARCH_TOKENS_FIELD] = search_tokens(tx_data)
+    return tx_data
+
+
+def search_tokens(data: Mapping[str, Any]) -> list[str]:
+    """
+    The search tokens of a stored transaction's searchable fields.
+    """
+    return document_tokens(data.get(field) for field in SEARCHABLE_FIELDS)
+
+
+def base_amount(amount: float, rate: float | None) -> float | None:
+    """
+    `amount` in the home currency at `rate`, or None when the rate is unknown.
+    """
+    return None if rate is None else amount * rate
+
+
+def _row_model(fields: tuple[str, ...] | None) -> type[BaseModel]:
+    return Transaction if fields is None else projection_model(fields)
+
+
+@lru_cache
+def _rows_adapter(model: type[BaseModel]) -> TypeAdapter[list[Any]]:
+    return TypeAdapter(list[model])
+
+
+def _row(doc: Any) -> dict[str, Any]:
+    return doc.to_dict() | {"id": doc.id}
+
+
+def to_transaction(doc: Any, fields: tuple[str, ...] | None = None) -> Any:
+    """
+    Builds a `Transaction` from a snapshot, or a projection model when the read was
+    restricted to `fields`.
+    """
+    return _row_model(fields).model_validate(_row(doc))
+
+
+def to_transactions(
+    docs: Iterable[Any], fields: tuple[str, ...] | None = None
+) -> list[Any]:
+    """
+    `to_transaction` for many snapshots at once.
+
+    The whole list is validated in a single pydantic-core call, which saves the
+    per-row Python overhead of building each model separately.
+    """
+    return _rows_adapter(_row_model(fields)).validate_python(
+        [_row(doc) for doc in docs]
+    )
+
+
+def list_query(
+    collection: Any,
+    limit: int | None = None,
+    offset: int | None = None,
+    cursor: str | None = None,
+    fields: tuple[str, ...] | None = None,
+) -> Any:
+    query = apply_order(collection, "occurred_at", "DESCENDING")
+    query = apply_projection(query, fields)
+    return apply_pagination(query, offset=offset, limit=limit, cursor=cursor)
+
+
+def export_query(collection: Any, chunk_size: int, after: Any = None) -> Any:
+    """
+    One chunk of an export: `list_query` resuming after the snapshot `after`.
+    """
+    query = list_query(collection, limit=chunk_size)
+    if after is not None:
+        query = query.start_after(after)
+    return query
+
+
+def list_by_category_query(
+    collection: Any,
+    category: str,
+    limit: int | None = None,
+    offset: int | None = None,
+    cursor: str | None = None,
+) -> Any:
+    query = apply_order(collection, "occurred_at", "DESCENDING")
+    query = query.where(filter=FieldFilter("category", "==", category))
+    return apply_pagination(query, offset, limit, cursor)
+
+
+def search_query(
+    collection: Any,
+    plan: SearchPlan,
+    limit: int | None = None,
+    offset: int | None = None,
+    cursor: str | None = None,
+    fields: tuple[str, ...] | None = None,
+    bounded: bool = True,
+) -> Any:
+    """
+    The Firestore query of `plan`.
+
+    When the plan has residual filters, `offset` and `limit` are left to
+    `ResidualScan`, the projection also reads the residual fields, and a `bounded`
+    query reads at most one row past `RESIDUAL_SCAN_LIMIT`.
+    """
+    query = collection
+    for field, value in plan.equalities:
+        query = query.where(filter=FieldFilter(field, "==", value))
+    if plan.in_filter is not None:
+        query = apply_optional_in_filters(query, [plan.in_filter])
+    if plan.array_contains is not None:
+        field, value = plan.array_contains
+        query = query.where(filter=FieldFilter(field, "array_contains", value))
+    query = apply_optional_filters(query, plan.ranges)
+    query = apply_order(query, plan.order_by, plan.direction)
+
+    if not plan.residual:
+        query = apply_projection(query, fields)
+        return apply_pagination(
+            query, offset=offset, limit=limit, cursor=cursor, order_by=plan.order_by
+        )
+
+    if fields is not None:
+        fields = tuple(sorted(set(fields) | plan.residual_fields))
+    query = apply_projection(query, fields)
+    return apply_pagination(
+        query,
+        offset=None,
+        limit=RESIDUAL_SCAN_LIMIT + 1 if bounded else None,
+        cursor=cursor,
+        order_by=plan.order_by,
+    )
+
+
+def month_ranges(
+    start: datetime, end: datetime
+) -> list[tuple[str, datetime, datetime]]:
+    """
+    Splits [start, end) at calendar month boundaries into `("YYYY-MM", lower, upper)`
+    ranges, keeping the time zone of `start`.
+    """
+    ranges: list[tuple[str, datetime, datetime]] = []
+    lower = start
+    while lower < end:
+        month_start = lower.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        upper = (month_start + timedelta(days=32)).replace(day=1)
+        ranges.append((f"{lower:%Y-%m}", lower, min(upper, end)))
+        lower = upper
+    return ranges
+
+
+def summary_query(
+    collection: Any,
+    transaction_type: TransactionType,
+    start: datetime,
+    end: datetime,
+    currency: Any = None,
+) -> Any:
+    query = collection.where(
+        filter=FieldFilter("transaction_type", "==", transaction_type.value)
+    )
+    query = query.where(filter=FieldFilter("occurred_at", ">=", start))
+    query = query.where(filter=FieldFilter("occurred_at", "<", end))
+    if currency is not None:
+        query = query.where(filter=FieldFilter("currency", "==", str(currency)))
+    return query
+
+
+def summary_aggregations(
+    collection: Any,
+    transaction_type: TransactionType,
+    ranges: list[tuple[datetime, datetime]],
+    categories: list[str | None] | None = None,
+    currency: Any = None,
+    amount_field: str = "amount",
+) -> list[Any]:
+    """
+    One count-and-total aggregation query per bucket: every range, crossed with every
+    category when `categories` is given (None matching uncategorized transactions).
+    The total adds up `amount_field`. Aggregations only read index entries, not
+    documents.
+
+    Raises:
+        SummaryTooLargeError: If there would be more than `MAX_SUMMARY_BUCKETS`.
+    """
+    buckets = len(ranges) * (1 if categories is None else len(categories))
+    if buckets > MAX_SUMMARY_BUCKETS:
+        raise SummaryTooLargeError(buckets, MAX_SUMMARY_BUCKETS)
+
+    aggregations = []
+    for start, end in ranges:
+        query = summary_query(collection, transaction_type, start, end, currency)
+        buckets = [query]
+        if categories is not None:
+            buckets = [
+                query.where(filter=FieldFilter("category", "==", category))
+                for category in categories
+            ]
+        aggregations.extend(
+            bucket.count(alias="count").sum(amount_field, alias="total")
+            for bucket in buckets
+        )
+    return aggregations
+
+
+def aggregation_values(results: Iterable[Iterable[Any]]) -> tuple[int, float]:
+    values = {result.alias: result.value for row in results for result in row}
+    return int(values.get("count") or 0), float(values.get("total") or 0)
+
+
+def categories_query(
+    collection: Any,
+    transaction_type: TransactionType,
+    start: datetime,
+    end: datetime,
+    currency: Any = None,
+) -> Any:
+    """
+    The categories in use within [start, end). Firestore has no distinct or group-by
+    query, so this reads the `category` field of every matching document.
+    """
+    query = summary_query(collection, transaction_type, start, end, currency)
+    return query.select(["category"])
+
+
+def sorted_categories(categories: Iterable[str | None]) -> list[str | None]:
+    # Uncategorized last.
+    return sorted(set(categories), key=lambda c: (c is None, c or ""))
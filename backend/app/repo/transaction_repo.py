@@ -1,138 +1,252 @@
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, final
 
+from google.api_core.exceptions import AlreadyExists, GoogleAPICallError
+from google.cloud import firestore
 from google.cloud.firestore import Client
-from google.cloud.firestore_v1 import FieldFilter
 from pydantic import UUID4
 
 from app.errors.transaction import TransactionNotExists
 from app.models.transaction_models import Transaction, TransactionType
+from app.repo import transaction_queries as queries
+from app.repo.query_planner import ResidualScan, plan_search
 
 
 @final
 class TransactionRepo:
     def __init__(self, db: Client, user_id: str):
+        self.db = db
         user_doc = db.collection("users").document(user_id)
         self.tx_collection = user_doc.collection("transactions")
+        self.rollup_ref = user_doc.collection(queries.ROLLUP_COLLECTION).document(
+            queries.ROLLUP_DOCUMENT
+        )
 
     @staticmethod
-    def _apply_optional_filters(
-        query: Any,
-        filters: list[tuple[str, str, Any]],
-    ) -> Any:
-        for field, operator, value in filters:
-            if value is None:
+    def _iter_docs(
+        query: Any, fields: tuple[str, ...] | None = None
+    ) -> Iterator[Transaction]:
+        for doc in query.stream():
+            if not doc.exists:
                 continue
-            query = query.where(
-                filter=FieldFilter(
-                    field,
-                    operator,
-                    value,
-                )
-            )
-        return query
+            yield queries.to_transaction(doc, fields)
 
     @staticmethod
-    def _apply_optional_in_filters(
-        query: Any,
-        filters: list[tuple[str, list[Any] | None]],
-    ) -> Any:
-        for field, values in filters:
-            if values is None or len(values) == 0:
-                continue
-            query = query.where(
-                filter=FieldFilter(
-                    field,
-                    "in",
-                    values,
-                )
-            )
-        return query
+    def _stream_docs(
+        query: Any, fields: tuple[str, ...] | None = None
+    ) -> list[Transaction]:
+        return queries.to_transactions(
+            (doc for doc in query.stream() if doc.exists), fields
+        )
 
     @staticmethod
-    def _apply_pagination(
-        query: Any,
-        offset: int | None,
-        limit: int | None,
-    ) -> Any:
-        if offset is not None:
-            query = query.offset(offset)
-        if limit is not None:
-            query = query.limit(limit)
-        return query
+    def _scan(query: Any, scan: ResidualScan) -> Iterator[Any]:
+        # Residual filters run on the raw data, before any row is validated.
+        for doc in query.stream():
+            if scan.done:
+                return
+            if doc.exists and scan.take(doc.to_dict()):
+                yield doc
 
-    @staticmethod
-    def _stream_docs(query: Any) -> list[Transaction]:
-        docs = query.stream()
-        result: list[Transaction] = []
-        for doc in docs:
-            if not doc.exists:
-                continue
-            data = doc.to_dict() | {"id": doc.id}
-            tx_type = data.get("transaction_type")
-            if isinstance(tx_type, str):
-                data["transaction_type"] = TransactionType(tx_type)
-            result.append(Transaction(**data))
-        return result
+    def _get_many(
+        self, ids: list[UUID4], fields: tuple[str, ...] | None = None
+    ) -> list[Transaction]:
+        refs = list(queries.unique_refs(self.tx_collection, ids).values())
+        chunks = list(queries.chunked(refs, queries.GET_ALL_CHUNK))
+        if len(chunks) == 1:
+            snapshots = [list(self.db.get_all(chunks[0], field_paths=fields))]
+        else:
+            workers = min(len(chunks), queries.MAX_PARALLEL_READS)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                snapshots = list(
+                    pool.map(
+                        lambda c: list(self.db.get_all(c, field_paths=fields)), chunks
+                    )
+                )
+        docs = {doc.id: doc for chunk in snapshots for doc in chunk}
+        return queries.in_request_order(ids, docs, fields)
 
     def create(
         self, transaction_type: TransactionType, data: Transaction | dict[str, Any]
     ) -> Transaction:
+        """
+        Writes `data` unless a transaction with its id exists, e.g. when a client
+        resends it; the stored one is returned then.
+        """
         if isinstance(data, dict):
             # Validate and normalize common transaction fields before persisting.
             data = Transaction(**data)
 
-        tx_data = data.model_dump()
-        tx_data["id"] = str(tx_data["id"])
-        tx_data["transaction_type"] = tx_data["transaction_type"].value
-
-        doc_ref = self.tx_collection.document(tx_data["id"])
-        doc_ref.set(tx_data)
+        if not self._create_row(queries.to_document(data)):
+            return self.get(data.id)
         return data
 
+    def _create_row(self, tx_data: dict[str, Any]) -> bool:
+        """
+        Commits one row with its rollup increment.
+
+        Returns:
+            False, without writing anything, if the row already exists.
+        """
+        # `create` fails on an existing row, so a resent row is not counted twice.
+        batch = self.db.batch()
+        batch.create(self.tx_collection.document(tx_data["id"]), tx_data)
+        batch.set(
+            self.rollup_ref,
+            queries.rollup_document(queries.rollup_totals([tx_data])),
+            merge=True,
+        )
+        try:
+            batch.commit()
+        except AlreadyExists:
+            return False
+        return True
+
+    def create_many(self, items: list[Transaction]) -> dict[str, str]:
+        """
+        Writes `items` in write batches that each also increment the rollup by their
+        own rows, so the rollup never disagrees with the rows that were committed.
+        Batches are committed one after another, which keeps the rollup document free
+        of concurrent writes. A failed batch fails all of its items.
+
+        Items that already exist, e.g. resent after a lost response, count as written
+        and are neither overwritten nor counted again.
+
+        Returns:
+            The error message of every item that could not be written, by its id.
+        """
+        errors: dict[str, str] = {}
+        rows = [queries.to_document(tx) for tx in items]
+        # Each batch leaves room for its rollup write.
+        for chunk in queries.chunked(rows, queries.BATCH_LIMIT - 1):
+            batch = self.db.batch()
+            for tx_data in chunk:
+                batch.create(self.tx_collection.document(tx_data["id"]), tx_data)
+            totals = queries.rollup_totals(chunk)
+            batch.set(self.rollup_ref, queries.rollup_document(totals), merge=True)
+            try:
+                batch.commit()
+            except AlreadyExists:
+                # Some rows were written before; write the others one by one.
+                for tx_data in chunk:
+                    try:
+                        _ = self._create_row(tx_data)
+                    except GoogleAPICallError as e:
+                        errors[tx_data["id"]] = str(e)
+            except GoogleAPICallError as e:
+                errors.update((tx_data["id"], str(e)) for tx_data in chunk)
+        return errors
+
     def delete(
         self, transaction_type: TransactionType, ids: list[UUID4]
     ) -> list[UUID4]:
-        deleted_ids: list[UUID4] = []
-        for id in ids:
-            doc_ref = self.tx_collection.document(str(id))
-            doc = doc_ref.get()
-            if not doc.exists:
-                continue
-            data = doc.to_dict()
-            if data.get("transaction_type") != transaction_type.value:
-                continue
-            doc_ref.delete()
-            deleted_ids.append(id)
-        return deleted_ids
+        """
+        Deletes the transactions of `transaction_type` among `ids`, in transactions
+        that read the rows and decrement the rollup by them. A row deleted meanwhile
+        by another request is skipped, so it is never subtracted twice.
+
+        Returns:
+            The ids that were deleted, in request order.
+        """
+        refs = queries.unique_refs(self.tx_collection, ids)
+        if not refs:
+            return []
+
+        @firestore.transactional
+        def delete_chunk(transaction: Any, chunk: list[Any]) -> list[str]:
+            docs = {
+                doc.id: doc
+                for doc in self.db.get_all(
+                    chunk, field_paths=queries.ROLLUP_FIELDS, transaction=transaction
+                )
+            }
+            deletable = queries.deletable_ids(
+                [ref.id for ref in chunk], docs, transaction_type
+            )
+            for id in deletable:
+                transaction.delete(refs[id])
+            if deletable:
+                totals = queries.rollup_totals(
+                    (docs[id].to_dict() for id in deletable), sign=-1
+                )
+                transaction.set(
+                    self.rollup_ref, queries.rollup_document(totals), merge=True
+                )
+            return deletable
+
+        deleted: set[str] = set()
+        # Each transaction also decrements the rollup by what it deletes, leaving room
+        # for that one extra write.
+        for chunk in queries.chunked(list(refs.values()), queries.BATCH_LIMIT - 1):
+            deleted.update(delete_chunk(self.db.transaction(), chunk))
+        return [id for key, id in queries.unique_ids(ids).items() if key in deleted]
 
     def get(self, id: UUID4) -> Transaction:
         doc = self.tx_collection.document(str(id)).get()
         if not doc.exists:
             raise TransactionNotExists()
 
-        return Transaction(**doc.to_dict())
+        return queries.to_transaction(doc)
 
     def list(
         self,
         limit: int | None = None,
         offset: int | None = None,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
     ) -> list[Transaction]:
-        query = self.tx_collection
-        query = query.order_by("occurred_at", direction="DESCENDING")
-        query = self._apply_pagination(query, offset=offset, limit=limit)
-        return self._stream_docs(query)
+        projection = queries.projected_fields(fields)
+        query = queries.list_query(
+            self.tx_collection, limit, offset, cursor, projection
+        )
+        return self._stream_docs(query, projection)
+
+    def iter_list(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
+    ) -> Iterator[Transaction]:
+        """
+        Like `list`, but yields rows as Firestore streams them. The query is built (and
+        the cursor validated) on call, before iteration starts.
+        """
+        projection = queries.projected_fields(fields)
+        query = queries.list_query(
+            self.tx_collection, limit, offset, cursor, projection
+        )
+        return self._iter_docs(query, projection)
+
+    def iter_export(
+        self, chunk_size: int = queries.EXPORT_CHUNK
+    ) -> Iterator[list[Transaction]]:
+        """
+        Every transaction, newest first, in lists of up to `chunk_size` read by one
+        query each.
+        """
+        after = None
+        while True:
+            query = queries.export_query(self.tx_collection, chunk_size, after)
+            docs = [doc for doc in query.stream() if doc.exists]
+            if docs:
+                yield queries.to_transactions(docs)
+            if len(docs) < chunk_size:
+                return
+            after = docs[-1]
 
     def list_by_category(
         self,
         category: str,
         limit: int | None = None,
         offset: int | None = None,
+        cursor: str | None = None,
     ) -> list[Transaction]:
-        query = self.tx_collection
-        query = query.order_by("occurred_at", direction="DESCENDING")
-        query = query.where(filter=FieldFilter("category", "==", category))
-        query = self._apply_pagination(query, offset, limit)
+        query = queries.list_by_category_query(
+            self.tx_collection, category, limit, offset, cursor
+        )
         return self._stream_docs(query)
 
     def search(
@@ -141,6 +255,8 @@ class TransactionRepo:
         id: list[UUID4] | None = None,
         min_amount: int | None = None,
         max_amount: int | None = None,
+        min_amount_base: float | None = None,
+        max_amount_base: float | None = None,
         currency: Any = None,
         category: Any = None,
         occurred_on: datetime | None = None,
@@ -149,68 +265,212 @@ class TransactionRepo:
         recurring_only: bool | None = None,
         exclude_recurring: bool | None = None,
         subscription_id: str | None = None,
-        order_by: str = "occurred_at",
+        order_by: str | None = None,
         order_direction: str = "DESCENDING",
+        q: str | None = None,
         limit: int | None = None,
         offset: int | None = None,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
         **_: Any,
     ) -> list[Transaction]:
+        projection = queries.projected_fields(fields)
         if id is not None and len(id) > 0:
-            result: list[Transaction] = []
-            for tx_id in id:
-                doc = self.tx_collection.document(str(tx_id)).get()
-                if not doc.exists:
-                    continue
-                result.append(Transaction(**doc.to_dict()))
-            return result
-
-        query = self.tx_collection
-        query = query.where(
-            filter=FieldFilter("transaction_type", "==", transaction_type.value)
+            return self._get_many(id, projection)
+
+        plan = plan_search(
+            transaction_type,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            min_amount_base=min_amount_base,
+            max_amount_base=max_amount_base,
+            currency=currency,
+            category=category,
+            occurred_on=occurred_on,
+            occurred_before=occurred_before,
+            occurred_after=occurred_after,
+            recurring_only=recurring_only,
+            exclude_recurring=exclude_recurring,
+            subscription_id=subscription_id,
+            order_by=order_by,
+            order_direction=order_direction,
+            q=q,
+        )
+        projection = queries.projected_fields(fields, plan.order_by)
+        query = queries.search_query(
+            self.tx_collection, plan, limit, offset, cursor, projection
         )
+        if not plan.residual:
+            return self._stream_docs(query, projection)
 
-        if occurred_on is not None:
-            occurred_after = occurred_on.replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            occurred_before = occurred_on.replace(
-                hour=23, minute=59, second=59, microsecond=999999
-            )
+        scan = ResidualScan(plan, offset, limit)
+        return queries.to_transactions(self._scan(query, scan), projection)
+
+    def iter_search(
+        self,
+        transaction_type: TransactionType,
+        id: list[UUID4] | None = None,
+        fields: list[str] | None = None,
+        **filters: Any,
+    ) -> Iterator[Transaction]:
+        """
+        Like `search`, but yields rows as Firestore streams them.
+        """
+
+        def by_id() -> Iterator[Transaction]:
+            # Reads on first iteration, like the query streams below.
+            yield from self._get_many(id or [], projection)
 
-        query = self._apply_optional_filters(
-            query,
-            [
-                ("amount", ">=", min_amount),
-                ("amount", "<=", max_amount),
-                ("occurred_at", "<=", occurred_before),
-                ("occurred_at", ">=", occurred_after),
-            ],
+        projection = queries.projected_fields(fields)
+        if id is not None and len(id) > 0:
+            return by_id()
+
+        plan = plan_search(transaction_type, **filters)
+        query = queries.search_query(
+            self.tx_collection,
+            plan,
+            filters.get("limit"),
+            filters.get("offset"),
+            filters.get("cursor"),
+            projection,
+            bounded=False,
         )
+        if not plan.residual:
+            return self._iter_docs(query, projection)
 
-        # Support either scalar (==) or list (in) for currency/category.
-        if isinstance(currency, list):
-            query = self._apply_optional_in_filters(query, [("currency", currency)])
-        elif currency is not None:
-            query = query.where(filter=FieldFilter("currency", "==", str(currency)))
-
-        if isinstance(category, list):
-            query = self._apply_optional_in_filters(query, [("category", category)])
-        elif category is not None:
-            query = query.where(filter=FieldFilter("category", "==", category))
-
-        if transaction_type == TransactionType.EXPENSE:
-            if recurring_only:
-                query = query.where(filter=FieldFilter("interval", "!=", None))
-                if subscription_id is not None:
-                    query = query.where(
-                        filter=FieldFilter("subscription_id", "==", subscription_id)
-                    )
-            if exclude_recurring:
-                query = query.where(filter=FieldFilter("interval", "==", None))
-        query = query.order_by(order_by, direction=order_direction)
-        query = self._apply_pagination(query, offset=offset, limit=limit)
-        return [
-            doc
-            for doc in self._stream_docs(query)
-            if doc.transaction_type == transaction_type
+        # A stream has no page to fill, so it scans as far as the client reads.
+        scan = ResidualScan(
+            plan, filters.get("offset"), filters.get("limit"), max_scanned=None
+        )
+        return (
+            queries.to_transaction(doc, projection) for doc in self._scan(query, scan)
+        )
+
+    def get_rollup(self) -> dict[str, Any]:
+        doc = self.rollup_ref.get()
+        return queries.to_rollup(doc.to_dict())
+
+    def get_version(self) -> int:
+        doc = self.rollup_ref.get(field_paths=[queries.VERSION_FIELD])
+        return queries.to_version(doc.to_dict())
+
+    def rebuild_rollup(self) -> int:
+        """
+        Recomputes the rollup from the stored transactions, reading only the fields it
+        needs. Writes made while it runs may be lost from the rollup, so run it when
+        the user is idle.
+
+        Returns:
+            The number of transactions counted.
+        """
+        query = self.tx_collection.select(queries.ROLLUP_FIELDS)
+        totals = queries.rollup_totals([doc.to_dict() for doc in query.stream()])
+        self.rollup_ref.set(
+            queries.rollup_document(totals, increment=False),
+            merge=queries.ROLLUP_REBUILD_MERGE,
+        )
+        return sum(count for count, _ in totals.values())
+
+    def rebuild_search_tokens(self) -> int:
+        """
+        Recomputes the stored search tokens of every transaction, e.g. after the
+        tokenizer changed or for transactions stored before search existed. The
+        version is bumped when any row changed, so cached searches and ETags are
+        refreshed.
+
+        Returns:
+            The number of transactions updated.
+        """
+        query = self.tx_collection.select(queries.SEARCHABLE_FIELDS)
+        writer = self.db.bulk_writer()
+        updated = 0
+        for doc in query.stream():
+            tokens = queries.search_tokens(doc.to_dict())
+            writer.update(doc.reference, {queries.SEARCH_TOKENS_FIELD: tokens})
+            updated += 1
+        writer.close()
+        if updated:
+            self.rollup_ref.set(queries.version_document(), merge=True)
+        return updated
+
+    def backfill_amount_base(
+        self, rates_of: Callable[[list[dict[str, Any]]], list[float | None]]
+    ) -> int:
+        """
+        Stores `amount_base` and `exchange_rate` on every transaction that has no
+        `amount_base` yet, with the rates `rates_of` returns for the stored rows.
+        Transactions whose rate is still unknown are left as they are. The version
+        is bumped when any row changed, so cached reads and ETags are refreshed.
+
+        Returns:
+            The number of transactions updated.
+        """
+        query = self.tx_collection.select(queries.BASE_AMOUNT_FIELDS)
+        rows = [
+            (doc.reference, data)
+            for doc in query.stream()
+            if (data := doc.to_dict()).get("amount_base") is None
         ]
+        rates = rates_of([data for _, data in rows])
+        writer = self.db.bulk_writer()
+        updated = 0
+        for (ref, data), rate in zip(rows, rates, strict=True):
+            if rate is None:
+                continue
+            writer.update(
+                ref,
+                {
+                    "exchange_rate": rate,
+                    "amount_base": queries.base_amount(data["amount"], rate),
+                },
+            )
+            updated += 1
+        writer.close()
+        if updated:
+            self.rollup_ref.set(queries.version_document(), merge=True)
+        return updated
+
+    def categories(
+        self,
+        transaction_type: TransactionType,
+        start: datetime,
+        end: datetime,
+        currency: Any = None,
+    ) -> list[str | None]:
+        query = queries.categories_query(
+            self.tx_collection, transaction_type, start, end, currency
+        )
+        return queries.sorted_categories(
+            (doc.to_dict() or {}).get("category") for doc in query.stream()
+        )
+
+    def summarize(
+        self,
+        transaction_type: TransactionType,
+        ranges: list[tuple[datetime, datetime]],
+        categories: list[str | None] | None = None,
+        currency: Any = None,
+        amount_field: str = "amount",
+    ) -> list[tuple[int, float]]:
+        """
+        The count and `amount_field` total of every bucket of
+        `queries.summary_aggregations`, in order. Buckets are aggregated in parallel.
+        """
+        aggregations = queries.summary_aggregations(
+            self.tx_collection,
+            transaction_type,
+            ranges,
+            categories,
+            currency,
+            amount_field,
+        )
+        if len(aggregations) <= 1:
+            return [queries.aggregation_values(agg.get()) for agg in aggregations]
+
+        workers = min(len(aggregations), queries.MAX_PARALLEL_AGGREGATIONS)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(
+                pool.map(
+                    lambda agg: queries.aggregation_values(agg.get()), aggregations
+                )
+            )
@@ -1,10 +1,18 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
 from typing import Annotated
 from pydantic_extra_types.currency_code import Currency
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
 from app.dependencies.external import get_currency_api
-from app.models.currency_models import CurrencyConvertReq, CurrencyConvertRes
+from app.errors.currency import CircuitOpenError, UnsupportedCurrencyError
+from app.models.currency_models import (
+    CurrencyConvertBatchReq,
+    CurrencyConvertBatchRes,
+    CurrencyConvertReq,
+    CurrencyConvertRes,
+)
 from app.services.currency_service import CurrencyService
 from app.infrastructure.currency_api import CurrencyAPIClient
 
@@ -15,10 +23,63 @@ router = APIRouter(
 )
 
 
+def _set_rates_age(response: Response, service: CurrencyService) -> None:
+    # Conversions may be served from a stale table; tell clients how old it is.
+    if service.rates_age is not None:
+        response.headers["X-Rates-Age"] = f"{service.rates_age:.0f}"
+
+
+@contextmanager
+def _currency_api_errors() -> Iterator[None]:
+    """
+    Translates currency API failures into HTTP errors.
+
+    Raises:
+        HTTPException:
+            - 400 if a currency is not supported by the currency API.
+            - 503 if calls to the currency API are suspended by the circuit breaker.
+            - 504 if the currency API request times out.
+            - Propagated status codes from the currency API on HTTP errors.
+            - 502 if a network error occurs while calling the currency API.
+    """
+    try:
+        yield
+
+    except UnsupportedCurrencyError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{e}",
+        )
+
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{e}",
+        )
+
+    except httpx.TimeoutException:
+        raise HTTPException(
+            status_code=504,
+            detail="Currency API call timeout",
+        )
+
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code, detail=e.response.json()
+        )
+
+    except httpx.RequestError:
+        raise HTTPException(
+            status_code=502,
+            detail="Bad gateway",
+        )
+
+
 @router.get("/convert")
 async def convert_currency(
     params: Annotated[CurrencyConvertReq, Query()],
     api_client: Annotated[CurrencyAPIClient, Depends(get_currency_api)],
+    response: Response,
 ) -> CurrencyConvertRes:
     """
     Converts a monetary amount from one currency to another.
@@ -35,37 +96,54 @@ async def convert_currency(
         {
             "result": 123.45
         }
+        The `X-Rates-Age` header holds the age in seconds of the rates used.
 
     Raises:
         HTTPException:
+            - 400 if either currency is not supported by the currency API.
+            - 503 if calls to the currency API are suspended by the circuit breaker.
             - 504 if the currency API request times out.
             - Propagated status codes from the currency API on HTTP errors.
             - 502 if a network error occurs while calling the currency API.
     """
     currency_service = CurrencyService(api_client)
 
-    try:
-        return CurrencyConvertRes(
-            result=await currency_service.convert(
-                params.amount,
-                params.from_cur,
-                params.to_cur,
-            )
+    with _currency_api_errors():
+        result = await currency_service.convert(
+            params.amount,
+            params.from_cur,
+            params.to_cur,
         )
 
-    except httpx.TimeoutException:
-        raise HTTPException(
-            status_code=504,
-            detail="Currency API call timeout",
-        )
+    _set_rates_age(response, currency_service)
+    return CurrencyConvertRes(result=result)
 
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(
-            status_code=e.response.status_code, detail=e.response.json()
-        )
 
-    except httpx.RequestError:
-        raise HTTPException(
-            status_code=502,
-            detail="Bad gateway",
-        )
+@router.post("/convert/batch")
+async def convert_currency_batch(
+    payload: CurrencyConvertBatchReq,
+    api_client: Annotated[CurrencyAPIClient, Depends(get_currency_api)],
+    response: Response,
+) -> CurrencyConvertBatchRes:
+    """
+    Converts many monetary amounts in one request using a single rate lookup.
+
+    Args:
+        items (list[CurrencyConvertReq]): The amounts and currency pairs to convert.
+
+    Returns:
+        dict: A JSON object containing the converted amounts in request order, for example:
+        {
+            "results": [123.45, 6.78]
+        }
+
+    Raises:
+        HTTPException: Same as `GET /currency/convert`.
+    """
+    currency_service = CurrencyService(api_client)
+
+    with _currency_api_errors():
+        results = await currency_service.convert_batch(payload.items)
+
+    _set_rates_age(response, currency_service)
+    return CurrencyConvertBatchRes(results=results)
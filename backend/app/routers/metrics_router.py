@@ -0,0 +1,42 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends
+
+from app.core.http import HTTPClientPool, get_http_pool
+from app.dependencies.external import get_currency_policy, get_rate_cache
+from app.dependencies.services import get_transaction_cache
+from app.infrastructure.rate_cache import RateCache
+from app.infrastructure.resilience import ResiliencePolicy
+from app.infrastructure.transaction_cache import TransactionCacheBackend
+from app.models.metrics_models import (
+    CurrencyStats,
+    HTTPPoolStats,
+    TransactionCacheStats,
+)
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/http")
+async def http_pool_stats(
+    pool: Annotated[HTTPClientPool, Depends(get_http_pool)],
+) -> HTTPPoolStats:
+    return pool.stats()
+
+
+@router.get("/currency")
+async def currency_stats(
+    cache: Annotated[RateCache, Depends(get_rate_cache)],
+    policy: Annotated[ResiliencePolicy, Depends(get_currency_policy)],
+) -> CurrencyStats:
+    return CurrencyStats(cache=cache.stats(), upstream=policy.stats())
+
+
+@router.get("/transactions")
+async def transaction_cache_stats(
+    cache: Annotated[TransactionCacheBackend | None, Depends(get_transaction_cache)],
+) -> TransactionCacheStats:
+    if cache is None:
+        return TransactionCacheStats(
+            endpoints={}, invalidations=0, evictions=0, entries=0
+        )
+    return cache.stats()
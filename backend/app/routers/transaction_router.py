@@ -1,24 +1,51 @@
+from collections.abc import AsyncIterator, Awaitable, Callable
 from logging import Logger
 from typing import Annotated
 
 import pandas as pd
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
-from google.cloud import firestore
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
 from starlette.status import HTTP_400_BAD_REQUEST
 
+from app.core.responses import (
+    PRIVATE_CACHE_HEADERS,
+    ModelListResponse,
+    etag_for,
+    is_not_modified,
+)
 from app.dependencies.auth import get_current_user_id
-from app.dependencies.db import get_firestore_client
 from app.dependencies.services import (
+    get_exchange_rate_service,
+    get_transaction_repo,
     get_transaction_service,
 )
 from app.models.transaction_models import (
     Transaction,
+    TransactionBatchCreateReq,
+    TransactionBatchCreateRes,
     TransactionDeleteReq,
+    TransactionExportReq,
     TransactionListReq,
+    TransactionPage,
+    TransactionRollupRes,
     TransactionSearchReq,
+    TransactionSummaryReq,
+    TransactionSummaryRes,
 )
 from app.models.tx_import_models import ThirdParty, TxImportRes
-from app.repo.transaction_repo import TransactionRepo
+from app.repo.cached_transaction_repo import AnyTransactionRepo
+from app.repo.query_planner import search_order_by
+from app.services.exchange_rate_service import ExchangeRateService
 from app.services.transaction_service import TransactionService
 from app.services.tx_import_service import TxImportRegistry
 
@@ -28,6 +55,57 @@ logger = Logger("Transaction Logger")
 router = APIRouter(prefix="/transactions", tags=["transaction"])
 
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _page_response(page: TransactionPage) -> ModelListResponse:
+    response = ModelListResponse(page.items)
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return response
+
+
+async def _versioned_response(
+    request: Request,
+    user_id: str,
+    service: TransactionService,
+    page: Callable[[], Awaitable[TransactionPage]],
+    stream: Callable[[], AsyncIterator[bytes]],
+    order_by: str = "occurred_at",
+) -> Response:
+    """
+    The page, or its NDJSON stream, tagged with an ETag derived from the version of
+    the user's transactions and with the field its rows are sorted by, largest first,
+    in `X-Order-By`. A matching `If-None-Match` is answered with 304 before any query
+    runs. Both are marked private, so shared caches never answer them.
+    """
+    ndjson = _wants_ndjson(request)
+    etag = etag_for(
+        request,
+        user_id,
+        await service.version(),
+        NDJSON_MEDIA_TYPE if ndjson else "application/json",
+    )
+    if is_not_modified(request, etag):
+        return Response(
+            status_code=304, headers={"ETag": etag, **PRIVATE_CACHE_HEADERS}
+        )
+
+    response: Response
+    if ndjson:
+        response = StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
+    else:
+        response = _page_response(await page())
+    response.headers["ETag"] = etag
+    response.headers["X-Order-By"] = order_by
+    response.headers.update(PRIVATE_CACHE_HEADERS)
+    return response
+
+
 @router.post("", status_code=201)
 async def create_transaction(
     payload: Transaction,
@@ -36,6 +114,21 @@ async def create_transaction(
     return await service.create(payload)
 
 
+@router.post("/batch")
+async def create_transactions_batch(
+    payload: TransactionBatchCreateReq,
+    service: Annotated[TransactionService, Depends(get_transaction_service)],
+) -> TransactionBatchCreateRes:
+    """
+    Creates up to 500 transactions in one request, e.g. when a client syncs entries
+    made offline.
+
+    Writes are not atomic: each result reports whether its item was created, so only
+    the failed items need to be resent.
+    """
+    return await service.create_batch(payload)
+
+
 @router.delete("")
 async def delete_transaction(
     payload: TransactionDeleteReq,
@@ -47,25 +140,120 @@ async def delete_transaction(
 @router.get("")
 async def list_transactions(
     params: Annotated[TransactionListReq, Query()],
+    request: Request,
+    user_id: Annotated[str, Depends(get_current_user_id)],
     service: Annotated[TransactionService, Depends(get_transaction_service)],
 ):
-    return await service.list(params)
+    """
+    Lists transactions, newest first.
+
+    `fields` (e.g. `fields=amount,currency`) limits each row to those fields plus `id`,
+    `transaction_type` and `occurred_at`; only those are read from Firestore.
+
+    When more may follow, the `X-Next-Cursor` header holds a token to pass as `cursor`
+    for the next page. Unlike `offset`, a cursor does not re-read the skipped pages.
+
+    With `Accept: application/x-ndjson` the rows are streamed one JSON object per line
+    as they are read, so large exports start immediately and are never held in memory
+    as a whole. Streamed responses carry no `X-Next-Cursor`.
+
+    Responses carry an `ETag`. Polling clients should send it back in
+    `If-None-Match`: while none of the user's transactions changed, the answer is an
+    empty 304 and Firestore is not queried.
+    """
+    return await _versioned_response(
+        request,
+        user_id,
+        service,
+        lambda: service.list(params),
+        lambda: service.stream_list(params),
+    )
 
 
 @router.get("/search")
 async def search_transactions(
     params: Annotated[TransactionSearchReq, Query()],
+    request: Request,
+    user_id: Annotated[str, Depends(get_current_user_id)],
     service: Annotated[TransactionService, Depends(get_transaction_service)],
 ):
-    return await service.search(params)
+    """
+    Searches transactions of one type; paginated, streamable and tagged like
+    `GET /transactions`.
+
+    Results are newest first, except when `min_amount_base` or `max_amount_base` is
+    set: Firestore can only serve a range from an index sorted by the same field, so
+    those searches are sorted by `amount_base`, largest first, and their cursors
+    point into it. The `X-Order-By` header names the field of every response.
+    """
+    return await _versioned_response(
+        request,
+        user_id,
+        service,
+        lambda: service.search(params),
+        lambda: service.stream_search(params),
+        search_order_by(**params.model_dump()),
+    )
+
+
+@router.get("/summary")
+async def summarize_transactions(
+    params: Annotated[TransactionSummaryReq, Query()],
+    service: Annotated[TransactionService, Depends(get_transaction_service)],
+) -> TransactionSummaryRes:
+    """
+    Transaction counts and amount totals over `[start, end)`, grouped by `month`
+    and/or `category` (e.g. `group_by=month,category`).
+
+    Each bucket is computed by a Firestore aggregation query, so no transactions are
+    downloaded. The one exception is grouping by category without listing the
+    categories: the `category` field of each transaction is read to find them.
+    """
+    return await service.summary(params)
+
+
+@router.get("/rollup")
+async def get_transaction_rollup(
+    service: Annotated[TransactionService, Depends(get_transaction_service)],
+) -> TransactionRollupRes:
+    """
+    Counts and amount totals of every month, transaction type, category and
+    currency, read from a single document that each write keeps up to date. Totals
+    are in each bucket's currency. Cheaper than `/summary` for dashboards that show
+    whole months.
+    """
+    return await service.rollup()
+
+
+@router.get("/export")
+async def export_transactions(
+    params: Annotated[TransactionExportReq, Query()],
+    service: Annotated[TransactionService, Depends(get_transaction_service)],
+) -> StreamingResponse:
+    """
+    Downloads every transaction of the user as CSV or Parquet (`format=parquet`).
+
+    Rows are read and encoded chunk by chunk while the response is sent, so exports
+    of any size start at once and never sit in memory as a whole.
+    """
+    encoder = service.export(params)
+    return StreamingResponse(
+        service.stream_export(encoder),
+        media_type=encoder.media_type,
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="transactions.{encoder.extension}"'
+            )
+        },
+    )
 
 
 @router.post("/import")
 async def import_transaction(
     third_party: Annotated[ThirdParty, Form()],
     file: Annotated[UploadFile, File()],
-    db: Annotated[firestore.Client, Depends(get_firestore_client)],
-    user_id: Annotated[str, Depends(get_current_user_id)],
+    repo: Annotated[AnyTransactionRepo, Depends(get_transaction_repo)],
+    rates: Annotated[ExchangeRateService, Depends(get_exchange_rate_service)],
 ) -> TxImportRes:
     if file.filename is None:
         msg = "File name is not provided."
@@ -80,11 +268,12 @@ async def import_transaction(
     import_service = TxImportRegistry.get(
         third_party,
         pd.read_csv(file.file),
-        TransactionRepo(db, user_id),
+        repo,
+        rates,
     )
     if import_service is None:
         msg = f'The third party "{third_party}" is not supported'
         logger.info(msg)
         raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=msg)
 
-    return import_service.import_csv()
+    return await import_service.import_csv()
@@ -2,7 +2,6 @@ import jwt
 from typing import Any, Literal
 from datetime import datetime, timedelta, timezone
 from typing import final
-from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from app.errors.auth import (
     LoginError,
@@ -21,6 +20,8 @@ from app.models.user_models import (
 from app.errors.auth import (
     RefreshTokenVerificationError,
 )
+from app.core.concurrency import run_repo
+from app.repo.async_user_repo import AsyncUserRepo
 from app.repo.user_repo import UserRepo
 
 from pwdlib import PasswordHash
@@ -30,7 +31,7 @@ _password_hash = PasswordHash.recommended()
 
 @final
 class AuthService:
-    def __init__(self, repo: UserRepo):
+    def __init__(self, repo: UserRepo | AsyncUserRepo):
         self.repo = repo
 
     @staticmethod
@@ -121,7 +122,7 @@ class AuthService:
         return payload
 
     async def create_user(self, payload: UserCreateReq):
-        user = self.repo.get_user_by_email(payload.email)
+        user = await run_repo(self.repo.get_user_by_email, payload.email)
         if len(user) != 0:
             raise UserExistsError()
 
@@ -139,7 +140,7 @@ class AuthService:
             "updated_at": datetime.now(timezone.utc),
         }
 
-        user_id = await run_in_threadpool(self.repo.create_user, user_dict)
+        user_id = await run_repo(self.repo.create_user, user_dict)
         user = UserCreateRes(
             id=user_id,
             **user_dict,  # pyright: ignore[reportArgumentType]
@@ -147,11 +148,11 @@ class AuthService:
         return user
 
     async def delete_user(self, user: User):  # add models later
-        await run_in_threadpool(self.repo.delete_user, user.id)
+        await run_repo(self.repo.delete_user, user.id)
         return {"detail": f"User {user.id} deleted successfully."}
 
     async def authenticate_user(self, payload: OAuth2PasswordRequestForm) -> User:
-        user = self.repo.get_user_by_email(payload.username)
+        user = await run_repo(self.repo.get_user_by_email, payload.username)
         if len(user) == 0:
             raise UserNotExistsError()
 
@@ -174,7 +175,7 @@ class AuthService:
         )
 
     async def authenticate_google_user(self, user_info: dict) -> User:
-        user = self.repo.get_user_by_google_sub(user_info["sub"])
+        user = await run_repo(self.repo.get_user_by_google_sub, user_info["sub"])
         if len(user) == 0:
             raise GoogleUserNotExistsError()
         print(user_info)
@@ -188,7 +189,7 @@ class AuthService:
         )
 
     async def create_google_user(self, payload: UserCreateGoogleReq):
-        user = self.repo.get_user_by_google_sub(payload.google_sub)
+        user = await run_repo(self.repo.get_user_by_google_sub, payload.google_sub)
         if len(user) != 0:
             raise UserExistsError()
 
@@ -201,7 +202,7 @@ class AuthService:
             "updated_at": datetime.now(timezone.utc),
         }
 
-        user_id = await run_in_threadpool(self.repo.create_user, user_dict)
+        user_id = await run_repo(self.repo.create_user, user_dict)
         return UserCreateGoogleRes(
             id=user_id,
             **user_dict,  # pyright: ignore[reportArgumentType]
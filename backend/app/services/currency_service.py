@@ -2,14 +2,36 @@ from typing import final
 from pydantic_extra_types.currency_code import Currency
 
 from app.infrastructure.currency_api import CurrencyAPIClient
+from app.infrastructure.rate_table import RateTable
+from app.models.currency_models import CurrencyConvertReq
+
+# Below this size the per-call numpy overhead outweighs the vectorized arithmetic.
+VECTORIZE_THRESHOLD = 64
 
 
 @final
 class CurrencyService:
     def __init__(self, api_client: CurrencyAPIClient):
         self.api_client = api_client
+        # Age in seconds of the rate table used by the last conversion.
+        self.rates_age: float | None = None
+
+    async def _get_rate_table(self) -> RateTable:
+        table = await self.api_client.get_rate_table()
+        self.rates_age = table.age()
+        return table
 
     async def convert(self, amount: float, from_cur: Currency, to_cur: Currency):
-        res_data = await self.api_client.get_currency_rates([from_cur, to_cur])
-        rates = res_data["data"]
-        return amount * rates[from_cur] * rates[to_cur]
+        table = await self._get_rate_table()
+        return table.convert(amount, from_cur, to_cur)
+
+    async def convert_batch(self, items: list[CurrencyConvertReq]) -> list[float]:
+        table = await self._get_rate_table()
+        if len(items) < VECTORIZE_THRESHOLD:
+            return [table.convert(i.amount, i.from_cur, i.to_cur) for i in items]
+
+        return table.convert_many(
+            [i.amount for i in items],
+            [i.from_cur for i in items],
+            [i.to_cur for i in items],
+        )
@@ -0,0 +1,64 @@
+from collections.abc import Iterable, Mapping
+from typing import Any, final
+
+from app.infrastructure.rate_history import RateHistory
+from app.models.transaction_models import Transaction
+from app.repo.transaction_queries import base_amount
+
+
+@final
+class ExchangeRateService:
+    """
+    Fills `Transaction.exchange_rate` with the rate of the day the transaction occurred,
+    and `amount_base` with the amount converted at that rate.
+
+    The rate converts one unit of the transaction currency into the home currency and is
+    read from the in-memory rate history, so no upstream call is made per row.
+    """
+
+    def __init__(self, history: RateHistory, home_currency: str):
+        self.history = history
+        self.home_currency = home_currency
+
+    def fill(self, transactions: list[Transaction]) -> list[Transaction]:
+        rates = self.rates_of(
+            {
+                "exchange_rate": tx.exchange_rate,
+                "occurred_at": tx.occurred_at,
+                "currency": tx.currency,
+            }
+            for tx in transactions
+        )
+        return [
+            tx.model_copy(
+                update={
+                    "exchange_rate": rate,
+                    "amount_base": base_amount(tx.amount, rate),
+                }
+            )
+            for tx, rate in zip(transactions, rates, strict=True)
+        ]
+
+    def rates_of(self, rows: Iterable[Mapping[str, Any]]) -> list[float | None]:
+        """
+        The rate of each stored or new transaction row: its own `exchange_rate`, 1.0
+        in the home currency, or the rate of the day it occurred, or None when none
+        is known.
+        """
+        rates: list[float | None] = []
+        missing: list[tuple[int, Mapping[str, Any]]] = []
+        for i, row in enumerate(rows):
+            rate = row.get("exchange_rate")
+            if rate is None and str(row["currency"]) == self.home_currency:
+                # Needs no snapshot, so it is known before the history has loaded.
+                rate = 1.0
+            if rate is None:
+                missing.append((i, row))
+            rates.append(rate)
+        looked_up = self.history.rates_at(
+            (row["occurred_at"], str(row["currency"]), self.home_currency)
+            for _, row in missing
+        )
+        for (i, _), rate in zip(missing, looked_up, strict=True):
+            rates[i] = rate
+        return rates
@@ -1,37 +1,85 @@
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
 from datetime import datetime, timezone
 from typing import final
 
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
 
-from app.errors.transaction import TransactionNotExists
+from app.errors.transaction import (
+    InvalidCursorError,
+    QueryTooBroadError,
+    SummaryTooLargeError,
+    TransactionNotExists,
+)
 from app.models.transaction_models import (
     Transaction,
+    TransactionBatchCreateReq,
+    TransactionBatchCreateRes,
+    TransactionBatchItemRes,
+    TransactionExportReq,
     TransactionListReq,
+    TransactionPage,
+    TransactionRollupRes,
     TransactionSearchReq,
+    TransactionSummaryBucket,
+    TransactionSummaryReq,
+    TransactionSummaryRes,
     TransactionType,
     TransactionDeleteReq,
     TransactionDeleteRes,
     TransactionGetReq,
 )
-from app.repo.transaction_repo import TransactionRepo
-from fastapi.concurrency import run_in_threadpool
+from app.core.concurrency import iterate_repo, run_repo
+from app.core.export import ExportEncoder, export_encoder
+from app.repo import transaction_queries as queries
+from app.repo.cached_transaction_repo import AnyTransactionRepo
+from app.repo.query_planner import page_limit, plan_search
+from app.services.exchange_rate_service import ExchangeRateService
 
 
 @final
 class TransactionService:
-    def __init__(self, repo: TransactionRepo):
+    def __init__(
+        self,
+        repo: AnyTransactionRepo,
+        rates: ExchangeRateService | None = None,
+    ):
         self.repo = repo
+        self.rates = rates
 
     async def create(self, payload: Transaction) -> Transaction:
-        return await run_in_threadpool(
+        if self.rates is not None:
+            [payload] = self.rates.fill([payload])
+        return await run_repo(
             self.repo.create,
             payload.transaction_type,
             payload,
         )
 
+    async def create_batch(
+        self, payload: TransactionBatchCreateReq
+    ) -> TransactionBatchCreateRes:
+        items = payload.items
+        if self.rates is not None:
+            items = self.rates.fill(items)
+        errors = await run_repo(self.repo.create_many, items)
+
+        results = [
+            TransactionBatchItemRes(
+                id=tx.id, created=str(tx.id) not in errors, error=errors.get(str(tx.id))
+            )
+            for tx in items
+        ]
+        return TransactionBatchCreateRes(
+            results=results,
+            created=len(results) - len(errors),
+            failed=len(errors),
+        )
+
     async def get(self, params: TransactionGetReq) -> Transaction:
         try:
-            data = await run_in_threadpool(
+            data = await run_repo(
                 self.repo.get,
                 params.id,
             )
@@ -41,21 +89,163 @@ class TransactionService:
         return data
 
     async def delete(self, payload: TransactionDeleteReq) -> TransactionDeleteRes:
-        id = await run_in_threadpool(
-            self.repo.delete, TransactionType.EXPENSE, payload.id
-        )
+        id = await run_repo(self.repo.delete, TransactionType.EXPENSE, payload.id)
         return TransactionDeleteRes(id=id, deleted_at=datetime.now(timezone.utc))
 
-    async def list(self, params: TransactionListReq) -> list[Transaction]:
-        return await run_in_threadpool(
-            self.repo.list,
-            params.limit,
-            params.offset,
-        )
+    @staticmethod
+    def _page(
+        items: list[BaseModel], limit: int | None, order_by: str = "occurred_at"
+    ) -> TransactionPage:
+        # A short page is the last one; a full page may have more after it.
+        next_cursor = None
+        if limit is not None and len(items) == limit:
+            next_cursor = queries.encode_cursor(items[-1], order_by)
+        return TransactionPage(items=items, next_cursor=next_cursor)
+
+    async def list(self, params: TransactionListReq) -> TransactionPage:
+        try:
+            items = await run_repo(
+                self.repo.list,
+                params.limit,
+                params.offset,
+                params.cursor,
+                params.fields,
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return self._page(items, params.limit)
+
+    async def search(self, params: TransactionSearchReq) -> TransactionPage:
+        filters = params.model_dump(exclude={"transaction_type"})
+        plan = plan_search(params.transaction_type, **filters)
+        # Searches filtered in memory are paged even without a `limit`, or one over
+        # more than RESIDUAL_SCAN_LIMIT rows could never be served.
+        filters["limit"] = page_limit(plan, params.limit)
+        try:
+            items = await run_repo(self.repo.search, params.transaction_type, **filters)
+        except (InvalidCursorError, QueryTooBroadError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return self._page(items, filters["limit"], plan.order_by)
+
+    async def version(self) -> int:
+        """
+        Changes whenever the user's transactions do; see `ETag` in the router.
+        """
+        return await run_repo(self.repo.get_version)
+
+    async def rollup(self) -> TransactionRollupRes:
+        return TransactionRollupRes(months=await run_repo(self.repo.get_rollup))
 
-    async def search(self, params: TransactionSearchReq) -> list[Transaction]:
-        return await run_in_threadpool(
-            self.repo.search,
-            params.transaction_type,
-            **params.model_dump(exclude={"transaction_type"}),
+    async def summary(self, params: TransactionSummaryReq) -> TransactionSummaryRes:
+        """
+        Count and amount total per month and/or category, computed by Firestore
+        aggregation queries that run concurrently, one per bucket.
+
+        Totals add up `amount` as stored, so mixed currencies are only meaningful when
+        filtered to one `currency`, or with `base`, which adds up `amount_base` in the
+        home currency instead. Transactions stored without a rate count but add nothing
+        to a `base` total.
+        """
+        months: list[tuple[str | None, datetime, datetime]] = [
+            (None, params.start, params.end)
+        ]
+        if "month" in params.group_by:
+            months = list(queries.month_ranges(params.start, params.end))
+
+        categories: list[str | None] | None = None
+        if "category" in params.group_by:
+            categories = list(params.category) if params.category else None
+            if categories is None:
+                categories = await run_repo(
+                    self.repo.categories,
+                    params.transaction_type,
+                    params.start,
+                    params.end,
+                    params.currency,
+                )
+
+        try:
+            values = await run_repo(
+                self.repo.summarize,
+                params.transaction_type,
+                [(start, end) for _, start, end in months],
+                categories,
+                params.currency,
+                "amount_base" if params.base else "amount",
+            )
+        except SummaryTooLargeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        keys = [
+            (month, category)
+            for month, _, _ in months
+            for category in (categories if categories is not None else [None])
+        ]
+        buckets = [
+            TransactionSummaryBucket(month=month, category=category, count=n, total=t)
+            for (month, category), (n, t) in zip(keys, values, strict=True)
+        ]
+        return TransactionSummaryRes(
+            buckets=buckets,
+            count=sum(b.count for b in buckets),
+            total=sum(b.total for b in buckets),
+            base_currency=(
+                self.rates.home_currency
+                if params.base and self.rates is not None
+                else None
+            ),
         )
+
+    @staticmethod
+    async def _ndjson(
+        rows: Iterable[BaseModel] | AsyncIterable[BaseModel],
+    ) -> AsyncIterator[bytes]:
+        async for tx in iterate_repo(rows):
+            yield tx.model_dump_json().encode() + b"\n"
+
+    def stream_list(self, params: TransactionListReq) -> AsyncIterator[bytes]:
+        """
+        NDJSON lines of `list`, produced as rows arrive from Firestore.
+        """
+        try:
+            rows = self.repo.iter_list(
+                params.limit, params.offset, params.cursor, params.fields
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return self._ndjson(rows)
+
+    def stream_search(self, params: TransactionSearchReq) -> AsyncIterator[bytes]:
+        """
+        NDJSON lines of `search`, produced as rows arrive from Firestore.
+        """
+        try:
+            rows = self.repo.iter_search(
+                params.transaction_type,
+                **params.model_dump(exclude={"transaction_type"}),
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return self._ndjson(rows)
+
+    def export(self, params: TransactionExportReq) -> ExportEncoder:
+        """
+        The encoder of an export in `params.format`, for `stream_export`.
+        """
+        return export_encoder(params.format)
+
+    async def stream_export(self, encoder: ExportEncoder) -> AsyncIterator[bytes]:
+        """
+        Every transaction of the user encoded by `encoder`, produced chunk by chunk as
+        Firestore returns them.
+        """
+        async for rows in iterate_repo(self.repo.iter_export()):
+            # Encoding a chunk takes a few milliseconds; keep it off the event loop.
+            data = await run_in_threadpool(encoder.encode, rows)
+            if data:
+                yield data
+        yield await run_in_threadpool(encoder.finish)
@@ -4,9 +4,11 @@ from typing import Any, Type, final, override
 from datetime import datetime
 import pandas as pd
 
+from app.core.concurrency import run_repo
 from app.models.transaction_models import Transaction, TransactionType
 from app.models.tx_import_models import ThirdParty, TxImportRes
-from app.repo.transaction_repo import TransactionRepo
+from app.repo.cached_transaction_repo import AnyTransactionRepo
+from app.services.exchange_rate_service import ExchangeRateService
 
 
 class TxImportRegistry:
@@ -17,12 +19,13 @@ class TxImportRegistry:
         cls,
         third_party: ThirdParty,
         df: pd.DataFrame,
-        repo: TransactionRepo,
+        repo: AnyTransactionRepo,
+        rates: ExchangeRateService | None = None,
     ) -> TxImportService | None:
         if (import_service := cls._registry.get(third_party)) is None:
             return None
 
-        return import_service(df, repo)
+        return import_service(df, repo, rates)
 
     @classmethod
     def register(
@@ -35,11 +38,16 @@ class TxImportRegistry:
 
 class TxImportService(ABC):
     @abstractmethod
-    def __init__(self, df: pd.DataFrame, repo: TransactionRepo):
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        repo: AnyTransactionRepo,
+        rates: ExchangeRateService | None = None,
+    ):
         pass
 
     @abstractmethod
-    def import_csv(self) -> TxImportRes:
+    async def import_csv(self) -> TxImportRes:
         """
         Returns:
             list[str]: Return a list of transaction record ids
@@ -50,8 +58,14 @@ class TxImportService(ABC):
 @final
 class PayPayImport(TxImportService):
     @override
-    def __init__(self, df: pd.DataFrame, repo: TransactionRepo):
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        repo: AnyTransactionRepo,
+        rates: ExchangeRateService | None = None,
+    ):
         self.repo = repo
+        self.rates = rates
         self.datetime_format = "%Y/%m/%d %H:%M:%S"
         self.records = df.to_dict(orient="records")
 
@@ -87,8 +101,8 @@ class PayPayImport(TxImportService):
         return datetime.strptime(datetime_str.strip(), self.datetime_format)
 
     @override
-    def import_csv(self) -> TxImportRes:
-        transaction_ids: list[str] = []
+    async def import_csv(self) -> TxImportRes:
+        transactions: list[Transaction] = []
         for record in self.records:
             amount, tx_type = self.process_amount(record)
             tx_type = self.process_tx_type(tx_type)
@@ -103,9 +117,19 @@ class PayPayImport(TxImportService):
                 payment_method=record["Method"],
                 business_name=record["Business Name"],
             )
-
-            self.repo.create(TransactionType.EXPENSE, transaction)
-            transaction_ids.append(str(transaction.id))
+            transactions.append(transaction)
+
+        # Look up the rates of all rows at once from the in-memory history.
+        if self.rates is not None:
+            transactions = self.rates.fill(transactions)
+
+        # Each write batch commits its rows together with their rollup increment.
+        errors = await run_repo(self.repo.create_many, transactions)
+        transaction_ids = [
+            str(transaction.id)
+            for transaction in transactions
+            if str(transaction.id) not in errors
+        ]
         return TxImportRes(transaction_ids=transaction_ids)
 
 
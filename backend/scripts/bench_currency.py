@@ -0,0 +1,87 @@
+"""
+Measures throughput and tail latency of the currency endpoints of a running backend.
+
+Run the backend against the fake currency API (see `scripts/fake_currency_api.py`) to
+get reproducible numbers offline.
+
+Usage:
+    python scripts/bench_currency.py --url http://localhost:8080 \
+        --requests 2000 --concurrency 50 [--batch 100]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+CURRENCIES = ["USD", "EUR", "JPY", "GBP", "AUD", "CAD"]
+
+
+def _item() -> dict[str, object]:
+    from_cur, to_cur = random.sample(CURRENCIES, 2)
+    return {
+        "amount": round(random.uniform(1, 1000), 2),
+        "from_cur": from_cur,
+        "to_cur": to_cur,
+    }
+
+
+async def _send(client: httpx.AsyncClient, batch: int) -> httpx.Response:
+    if batch > 0:
+        items = [_item() for _ in range(batch)]
+        return await client.post("/currency/convert/batch", json={"items": items})
+    return await client.get("/currency/convert", params=_item())
+
+
+async def run(url: str, total: int, concurrency: int, batch: int) -> None:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    queue: asyncio.Queue[None] = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+
+        async def worker() -> None:
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    res = await _send(client, batch)
+                    status = res.status_code
+                except httpx.HTTPError:
+                    status = 0
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"requests:    {total} ({batch or 1} conversion(s) each)")
+    print(f"concurrency: {concurrency}")
+    print(f"elapsed:     {elapsed:.2f}s")
+    print(f"throughput:  {total / elapsed:.1f} req/s")
+    print(
+        "latency:     "
+        f"p50={quantiles[49] * 1000:.1f}ms "
+        f"p95={quantiles[94] * 1000:.1f}ms "
+        f"p99={quantiles[98] * 1000:.1f}ms "
+        f"max={max(latencies) * 1000:.1f}ms"
+    )
+    print(f"statuses:    {dict(sorted(statuses.items()))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.requests, args.concurrency, args.batch))
@@ -0,0 +1,122 @@
+"""
+Measures the per-row cost of turning stored transaction documents into API responses:
+hydrating Firestore rows into models, and encoding a list response.
+
+Compares building one `Transaction` per row against validating the whole page in one
+call (`to_transactions`), and FastAPI's default encoding against `ModelListResponse`.
+No Firestore is needed; documents are built in memory exactly as `to_document` stores
+them.
+
+Usage:
+    python scripts/bench_transactions.py [--rows 10000] [--repeat 5]
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from pydantic_extra_types.currency_code import Currency
+
+from app.core.responses import ModelListResponse
+from app.models.transaction_models import Transaction, TransactionType
+from app.repo import transaction_queries as queries
+
+CURRENCIES = ["USD", "EUR", "JPY", "GBP"]
+
+
+class _Snapshot:
+    """Stands in for a Firestore `DocumentSnapshot`."""
+
+    exists = True
+
+    def __init__(self, data: dict[str, Any]):
+        self.id = data["id"]
+        self._data = data
+
+    def to_dict(self) -> dict[str, Any]:
+        # Firestore hands out a fresh dict per call.
+        return dict(self._data)
+
+
+def _documents(rows: int) -> list[_Snapshot]:
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    docs = []
+    for i in range(rows):
+        tx = Transaction(
+            amount=round(random.uniform(1, 500), 2),
+            exchange_rate=None,
+            currency=Currency(random.choice(CURRENCIES)),
+            transaction_type=TransactionType.EXPENSE,
+            category="food",
+            description="lunch",
+            business_name="shop",
+            payment_method="card",
+            occurred_at=start + timedelta(hours=i),
+        )
+        docs.append(_Snapshot(queries.to_document(tx)))
+    return docs
+
+
+def _per_row(doc: _Snapshot) -> Transaction:
+    # How rows used to be built: one model per row from keyword arguments.
+    return Transaction(**doc.to_dict() | {"id": doc.id})
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    # Like timeit, keep the cyclic GC out of the timings so runs are comparable.
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+            gc.collect()
+    finally:
+        gc.enable()
+    return best
+
+
+def main(rows: int, repeat: int) -> None:
+    docs = _documents(rows)
+    txs = queries.to_transactions(docs)
+    assert txs == [_per_row(doc) for doc in docs]
+
+    results = {
+        "hydrate (per row)": _best(lambda: [_per_row(d) for d in docs], repeat),
+        "hydrate (to_transactions)": _best(
+            lambda: queries.to_transactions(docs), repeat
+        ),
+        "encode (jsonable_encoder)": _best(
+            lambda: json.dumps(jsonable_encoder(txs)).encode(), repeat
+        ),
+        "encode (ModelListResponse)": _best(
+            lambda: ModelListResponse(txs).body, repeat
+        ),
+    }
+    results["total before"] = (
+        results["hydrate (per row)"] + results["encode (jsonable_encoder)"]
+    )
+    results["total after"] = (
+        results["hydrate (to_transactions)"] + results["encode (ModelListResponse)"]
+    )
+
+    print(f"rows={rows} best of {repeat}")
+    for name, seconds in results.items():
+        print(
+            f"  {name:28} {seconds * 1e3:8.1f} ms  {seconds / rows * 1e6:6.2f} us/row"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
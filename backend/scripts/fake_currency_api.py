@@ -0,0 +1,104 @@
+"""
+Local stand-in for the freecurrencyapi `/v1/latest` and `/v1/historical` endpoints.
+
+Point the backend at it with `CURRENCY_API_URL=http://localhost:8090/v1` to load-test
+the currency path without spending real API quota.
+
+Usage:
+    FAKE_CURRENCY_LATENCY_MS=80 FAKE_CURRENCY_ERROR_RATE=0.01 \
+        uvicorn scripts.fake_currency_api:app --port 8090
+
+Settings (environment variables):
+    FAKE_CURRENCY_LATENCY_MS: Base response latency in milliseconds.
+    FAKE_CURRENCY_JITTER_MS: Extra random latency in milliseconds, drawn uniformly.
+    FAKE_CURRENCY_ERROR_RATE: Fraction of requests answered with a 500.
+    FAKE_CURRENCY_RATE_LIMIT: Requests allowed per second before answering 429 (0 = off).
+"""
+
+import asyncio
+import random
+import time
+from datetime import date
+from typing import Annotated
+
+from fastapi import FastAPI, HTTPException, Query
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+RATES = {
+    "AUD": 1.52,
+    "BRL": 4.97,
+    "CAD": 1.36,
+    "CHF": 0.88,
+    "CNY": 7.19,
+    "EUR": 0.92,
+    "GBP": 0.79,
+    "HKD": 7.82,
+    "INR": 83.1,
+    "JPY": 149.5,
+    "KRW": 1331.0,
+    "MXN": 17.1,
+    "NZD": 1.64,
+    "SEK": 10.4,
+    "SGD": 1.34,
+    "THB": 35.6,
+    "TWD": 31.4,
+    "USD": 1.0,
+    "ZAR": 18.7,
+}
+
+
+class FakeSettings(BaseSettings):
+    latency_ms: float = 50.0
+    jitter_ms: float = 20.0
+    error_rate: float = 0.0
+    rate_limit: int = 0
+    model_config = SettingsConfigDict(env_prefix="FAKE_CURRENCY_")
+
+
+def create_app(settings: FakeSettings | None = None) -> FastAPI:
+    settings = settings or FakeSettings()
+    fake = FastAPI(title="Fake currency API")
+    window = {"second": 0, "count": 0}
+
+    async def simulate() -> None:
+        if settings.rate_limit > 0:
+            second = int(time.monotonic())
+            if window["second"] != second:
+                window["second"], window["count"] = second, 0
+            window["count"] += 1
+            if window["count"] > settings.rate_limit:
+                raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+        delay = settings.latency_ms + random.uniform(0, settings.jitter_ms)
+        await asyncio.sleep(delay / 1000)
+
+        if random.random() < settings.error_rate:
+            raise HTTPException(status_code=500, detail="Injected failure")
+
+    def select(currencies: str | None, scale: float = 1.0) -> dict[str, float]:
+        codes = currencies.split(",") if currencies else RATES
+        return {code: RATES[code] * scale for code in codes if code in RATES}
+
+    @fake.get("/v1/latest")
+    async def latest(
+        apikey: str,
+        currencies: str | None = None,
+    ):
+        await simulate()
+        return {"data": select(currencies)}
+
+    @fake.get("/v1/historical")
+    async def historical(
+        apikey: str,
+        day: Annotated[date, Query(alias="date")],
+        currencies: str | None = None,
+    ):
+        await simulate()
+        # Drift the rates slightly per day so lookups by date are distinguishable.
+        scale = 1 + (day.toordinal() % 30) / 1000
+        return {"data": {day.isoformat(): select(currencies, scale) | {"USD": 1.0}}}
+
+    return fake
+
+
+app = create_app()
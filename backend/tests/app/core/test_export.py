@@ -0,0 +1,60 @@
+import csv
+import io
+from datetime import datetime, timezone
+
+import pyarrow.parquet as pq
+from pydantic_extra_types.currency_code import Currency
+
+from app.core.export import COLUMNS, CsvEncoder, ParquetEncoder
+from app.models.transaction_models import Transaction, TransactionType
+
+
+def _transaction(amount: float, hour: int = 0) -> Transaction:
+    return Transaction(
+        amount=amount,
+        exchange_rate=None,
+        currency=Currency("JPY"),
+        transaction_type=TransactionType.EXPENSE,
+        category="food",
+        description="ランチ, 2人",
+        business_name=None,
+        payment_method=None,
+        occurred_at=datetime(2024, 1, 1, hour, tzinfo=timezone.utc),
+    )
+
+
+def test_csv_encoder_writes_the_header_once_and_a_row_per_transaction():
+    encoder = CsvEncoder()
+    txs = [_transaction(1.0), _transaction(2.0, 1), _transaction(3.0, 2)]
+
+    body = encoder.encode(txs[:2]) + encoder.encode(txs[2:]) + encoder.finish()
+
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+    assert list(rows[0]) == COLUMNS
+    assert [row["amount"] for row in rows] == ["1.0", "2.0", "3.0"]
+    assert rows[0]["description"] == "ランチ, 2人"
+    assert rows[0]["occurred_at"] == "2024-01-01T00:00:00Z"
+    assert rows[0]["business_name"] == ""
+
+
+def test_csv_encoder_writes_the_header_of_an_empty_export():
+    encoder = CsvEncoder()
+
+    assert encoder.finish().decode().strip() == ",".join(COLUMNS)
+
+
+def test_parquet_encoder_writes_row_groups_as_they_fill():
+    encoder = ParquetEncoder(row_group_size=2)
+    txs = [_transaction(float(i + 1), i) for i in range(5)]
+
+    chunks = [encoder.encode(txs[:3]), encoder.encode(txs[3:]), encoder.finish()]
+
+    # The first full row group is sent before the export ends.
+    assert chunks[0]
+    table_file = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+    assert table_file.num_row_groups == 3
+    table = table_file.read()
+    assert table.column("amount").to_pylist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert table.column("transaction_type").to_pylist() == ["expense"] * 5
+    assert table.column("id").to_pylist() == [str(tx.id) for tx in txs]
+    assert table.column("occurred_at").to_pylist()[1] == txs[1].occurred_at
@@ -2,17 +2,77 @@ import asyncio
 import httpx
 
 
-def test_get_http_client_yields_async_client():
-    from app.core import http
+def test_http_client_pool_applies_settings(settings_env, monkeypatch):
+    from app.core import config, http
+
+    monkeypatch.setenv("HTTP_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "3")
+    monkeypatch.setenv("HTTP_KEEPALIVE_EXPIRY", "12.5")
+    config.get_settings.cache_clear()
+
+    async def main():
+        pool = http.HTTPClientPool(config.get_settings())
+        try:
+            assert isinstance(pool.client, httpx.AsyncClient)
+            assert pool.client.headers.get("Accept") == "application/json"
+
+            conn_pool = pool.transport._transport._pool
+            assert conn_pool._max_connections == 7
+            assert conn_pool._max_keepalive_connections == 3
+            assert conn_pool._keepalive_expiry == 12.5
+        finally:
+            await pool.aclose()
+
+    asyncio.run(main())
+
+
+def test_http_client_pool_enables_http2(settings_env, monkeypatch):
+    from app.core import config, http
+
+    monkeypatch.setenv("HTTP_HTTP2", "true")
+    config.get_settings.cache_clear()
 
     async def main():
-        agen = http.get_http_client()
-        client = await agen.__anext__()
+        # Fails with ImportError when `h2` is not installed.
+        pool = http.HTTPClientPool(config.get_settings())
         try:
-            assert isinstance(client, httpx.AsyncClient)
-            assert client.headers.get("Accept") == "application/json"
+            assert pool.transport._transport._pool._http2
         finally:
-            await agen.aclose()
+            await pool.aclose()
 
     asyncio.run(main())
 
+
+def test_http_client_pool_records_stats(settings_env):
+    from app.core import config, http
+
+    async def main():
+        pool = http.HTTPClientPool(config.get_settings())
+        # Swap the network transport for an in-memory one to keep the test offline.
+        pool.transport._transport = httpx.MockTransport(
+            lambda request: httpx.Response(200, json={"ok": True})
+        )
+        try:
+            for _ in range(3):
+                res = await pool.client.get("http://currency.test/v1/latest")
+                assert res.status_code == 200
+        finally:
+            await pool.aclose()
+        return pool.stats()
+
+    stats = asyncio.run(main())
+    assert stats.requests == 3
+    assert stats.errors == 0
+    assert stats.in_flight == 0
+    assert stats.peak_in_flight == 1
+
+
+def test_get_http_client_shares_lifespan_client(client):
+    from app.core import http
+
+    pool = client.app.state.http_pool
+    assert isinstance(pool, http.HTTPClientPool)
+
+    res = client.get("/metrics/http")
+    assert res.status_code == 200
+    assert res.json()["requests"] == 0
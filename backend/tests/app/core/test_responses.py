@@ -0,0 +1,43 @@
+from starlette.requests import Request
+
+from app.core.responses import etag_for, is_not_modified
+
+
+def _request(query: str, if_none_match: str | None = None) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/transactions",
+            "query_string": query.encode(),
+            "headers": headers,
+        }
+    )
+
+
+def test_etag_depends_on_user_version_query_and_media_type():
+    request = _request("limit=20&fields=amount")
+    tag = etag_for(request, "alice", 3, "application/json")
+
+    assert tag.startswith('"3-') and tag.endswith('"')
+    assert tag == etag_for(
+        _request("fields=amount&limit=20"), "alice", 3, "application/json"
+    )
+    assert tag != etag_for(request, "bob", 3, "application/json")
+    assert tag != etag_for(request, "alice", 4, "application/json")
+    assert tag != etag_for(
+        _request("limit=21&fields=amount"), "alice", 3, "application/json"
+    )
+    assert tag != etag_for(request, "alice", 3, "application/x-ndjson")
+
+
+def test_is_not_modified_matches_any_listed_tag():
+    tag = '"3-abc"'
+
+    assert not is_not_modified(_request(""), tag)
+    assert is_not_modified(_request("", '"1-x", W/"3-abc"'), tag)
+    assert is_not_modified(_request("", "*"), tag)
+    assert not is_not_modified(_request("", '"2-abc"'), tag)
@@ -1,16 +1,43 @@
+from types import SimpleNamespace
+
 from google.cloud import firestore
 
 
-def test_get_firestore_client_uses_settings_project():
+def test_create_firestore_client_uses_settings_project():
     from app.dependencies import db as db_dep
 
     class DummySettings:
         gcp_project_id = "test-project-123"
+        firestore_async = False
 
-    client = db_dep.get_firestore_client(DummySettings())
+    client = db_dep.create_firestore_client(DummySettings())
 
     # Verify we get a real Firestore client
     assert isinstance(client, firestore.Client)
     # In the emulator environment, verify the client is functional
     assert client.project == "test-project-123"
 
+
+def test_create_firestore_client_returns_async_client_when_enabled():
+    from app.dependencies import db as db_dep
+
+    class DummySettings:
+        gcp_project_id = "test-project-123"
+        firestore_async = True
+
+    client = db_dep.create_firestore_client(DummySettings())
+
+    assert isinstance(client, firestore.AsyncClient)
+    assert client.project == "test-project-123"
+
+
+def test_get_firestore_client_returns_the_lifespan_client(client):
+    from app.dependencies import db as db_dep
+
+    shared = client.app.state.firestore
+    request = SimpleNamespace(app=client.app)
+
+    assert isinstance(shared, firestore.Client)
+    assert shared.project == "test-project"
+    assert db_dep.get_firestore_client(request) is shared
+    assert db_dep.get_firestore_client(request) is shared
@@ -3,9 +3,45 @@ def test_get_transaction_services_construct_with_deps(firestore_db):
     from app.services.transaction_service import TransactionService
 
     transaction_svc = svc_dep.get_transaction_service(
-        db=firestore_db, user_id="test-user"
+        repo=svc_dep.get_transaction_repo(db=firestore_db, user_id="test-user")
     )
 
     assert isinstance(transaction_svc, TransactionService)
 
     assert transaction_svc.repo is not None
+
+
+def test_get_transaction_repo_picks_async_repo_for_async_client():
+    from google.cloud import firestore
+
+    from app.dependencies import services as svc_dep
+    from app.repo.async_transaction_repo import AsyncTransactionRepo
+    from app.repo.transaction_repo import TransactionRepo
+
+    async_repo = svc_dep.get_transaction_repo(
+        db=firestore.AsyncClient(project="test-project"), user_id="test-user"
+    )
+    sync_repo = svc_dep.get_transaction_repo(
+        db=firestore.Client(project="test-project"), user_id="test-user"
+    )
+
+    assert isinstance(async_repo, AsyncTransactionRepo)
+    assert isinstance(sync_repo, TransactionRepo)
+
+
+def test_get_transaction_repo_wraps_repo_when_cache_is_enabled():
+    from google.cloud import firestore
+
+    from app.dependencies import services as svc_dep
+    from app.infrastructure.transaction_cache import TransactionCache
+    from app.repo.cached_transaction_repo import CachedTransactionRepo
+    from app.repo.transaction_repo import TransactionRepo
+
+    repo = svc_dep.get_transaction_repo(
+        db=firestore.Client(project="test-project"),
+        user_id="test-user",
+        cache=TransactionCache(ttl=30, max_entries=8),
+    )
+
+    assert isinstance(repo, CachedTransactionRepo)
+    assert isinstance(repo.repo, TransactionRepo)
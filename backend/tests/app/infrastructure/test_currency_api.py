@@ -0,0 +1,61 @@
+import asyncio
+from datetime import date
+
+import httpx
+import pytest
+
+from app.infrastructure.currency_api import CurrencyAPIClient
+from app.infrastructure.resilience import CircuitBreaker, ResiliencePolicy
+from scripts.fake_currency_api import FakeSettings, create_app
+
+
+def _client(settings: FakeSettings, policy: ResiliencePolicy | None = None):
+    transport = httpx.ASGITransport(app=create_app(settings))
+    http_client = httpx.AsyncClient(transport=transport)
+    return CurrencyAPIClient(
+        http_client,
+        "dummy",
+        policy=policy,
+        base_url="http://fake-currency/v1",
+    )
+
+
+def test_currency_api_client_against_fake_server():
+    api_client = _client(FakeSettings(latency_ms=0, jitter_ms=0))
+
+    async def main():
+        table = await api_client.get_rate_table()
+        historical = await api_client.get_historical_rates(date(2024, 1, 31))
+        return table, historical
+
+    table, historical = asyncio.run(main())
+    assert table.rate("USD", "JPY") == 149.5
+    assert "EUR" in historical
+    assert historical.rate("USD", "USD") == 1.0
+
+
+def test_currency_api_client_retries_injected_failures():
+    api_client = _client(
+        FakeSettings(latency_ms=0, jitter_ms=0, error_rate=1.0),
+        ResiliencePolicy(
+            CircuitBreaker(failure_threshold=10, reset_timeout=30),
+            max_attempts=3,
+            backoff_base=0.001,
+        ),
+    )
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(api_client.get_rate_table())
+    assert api_client.policy.stats().attempts == 3
+
+
+def test_fake_server_rate_limits():
+    api_client = _client(FakeSettings(latency_ms=0, jitter_ms=0, rate_limit=1))
+
+    async def main():
+        await api_client.get_currency_rates(["USD"])
+        await api_client.get_currency_rates(["USD"])
+
+    with pytest.raises(httpx.HTTPStatusError) as e:
+        asyncio.run(main())
+    assert e.value.response.status_code == 429
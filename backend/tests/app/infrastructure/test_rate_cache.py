@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app.infrastructure.rate_cache import RateCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_cache_hits_until_ttl_expires():
+    clock = FakeClock()
+    cache = RateCache(ttl=60, max_entries=8, clock=clock)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return {"data": {"USD": 1.0}}
+
+    async def main():
+        await cache.get_or_load("USD", loader)
+        await cache.get_or_load("USD", loader)
+        clock.now = 61
+        await cache.get_or_load("USD", loader)
+
+    asyncio.run(main())
+    assert calls == 2
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.coalesced) == (1, 2, 0)
+
+
+def test_rate_cache_coalesces_concurrent_misses():
+    cache = RateCache(ttl=60, max_entries=8)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"data": {"EUR": 0.5}}
+
+    async def main():
+        return await asyncio.gather(
+            *(cache.get_or_load("EUR", loader) for _ in range(10))
+        )
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert all(res == {"data": {"EUR": 0.5}} for res in results)
+    assert cache.stats().coalesced == 9
+
+
+def test_rate_cache_does_not_cache_errors():
+    cache = RateCache(ttl=60, max_entries=8)
+
+    async def failing():
+        raise RuntimeError("upstream down")
+
+    async def ok():
+        return 1
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("k", failing)
+        return await cache.get_or_load("k", ok)
+
+    assert asyncio.run(main()) == 1
+    assert cache.stats().misses == 2
+
+
+def test_rate_cache_evicts_least_recently_used():
+    cache = RateCache(ttl=60, max_entries=2)
+
+    async def main():
+        for key in ("a", "b", "a", "c"):
+            await cache.get_or_load(key, lambda key=key: asyncio.sleep(0, result=key))
+
+    asyncio.run(main())
+    stats = cache.stats()
+    assert stats.entries == 2
+    assert stats.evictions == 1
+
+
+def test_rate_cache_serves_stale_value_while_revalidating():
+    clock = FakeClock()
+    cache = RateCache(ttl=60, max_entries=8, max_stale=600, clock=clock)
+    versions = iter(["v1", "v2"])
+
+    async def loader():
+        return next(versions)
+
+    async def failing():
+        raise RuntimeError("upstream down")
+
+    async def main():
+        assert await cache.get_or_load("k", loader) == "v1"
+        clock.now = 100
+        # Expired: the old value is returned immediately and refreshed in background.
+        assert await cache.get_or_load("k", failing) == "v1"
+        await asyncio.sleep(0)
+        assert await cache.get_or_load("k", loader) == "v1"
+        await asyncio.sleep(0)
+        return await cache.get_or_load("k", loader)
+
+    assert asyncio.run(main()) == "v2"
+    stats = cache.stats()
+    assert stats.stale_hits == 2
+    assert stats.load_errors == 1
@@ -0,0 +1,51 @@
+from datetime import date, datetime, timezone
+
+from app.infrastructure.rate_history import RateHistory
+from app.infrastructure.rate_table import RateTable
+
+
+def _history() -> RateHistory:
+    history = RateHistory()
+    history.add_many(
+        {
+            date(2024, 1, 1): RateTable({"USD": 1.0, "JPY": 140.0}),
+            date(2024, 1, 3): RateTable({"USD": 1.0, "JPY": 150.0}),
+        }
+    )
+    history.add(date(2024, 1, 5), RateTable({"USD": 1.0, "JPY": 160.0}))
+    return history
+
+
+def test_rate_history_uses_closest_earlier_snapshot():
+    history = _history()
+
+    assert len(history) == 3
+    assert history.latest_day == date(2024, 1, 5)
+    assert history.rate_at(date(2024, 1, 1), "USD", "JPY") == 140.0
+    assert history.rate_at(date(2024, 1, 2), "USD", "JPY") == 140.0
+    assert (
+        history.rate_at(datetime(2024, 1, 4, 12, tzinfo=timezone.utc), "JPY", "USD")
+        == 1 / 150.0
+    )
+    assert history.rate_at(date(2030, 1, 1), "USD", "JPY") == 160.0
+
+
+def test_rate_history_returns_none_without_snapshot():
+    history = _history()
+
+    assert history.rate_at(date(2023, 12, 31), "USD", "JPY") is None
+    assert history.rate_at(date(2024, 1, 2), "USD", "EUR") is None
+
+
+def test_rate_history_bulk_lookup():
+    history = _history()
+
+    rates = history.rates_at(
+        [
+            (date(2024, 1, 2), "USD", "JPY"),
+            (date(2024, 1, 3), "USD", "JPY"),
+            (date(2023, 1, 1), "USD", "JPY"),
+            (date(2024, 1, 3), "USD", "EUR"),
+        ]
+    )
+    assert rates == [140.0, 150.0, None, None]
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import date, datetime, timezone
+
+from app.infrastructure.rate_history import RateHistory
+from app.infrastructure import rate_refresher
+from app.infrastructure.rate_refresher import RateRefresher
+from app.infrastructure.rate_table import RateTable
+
+
+class CountingAPIClient:
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    async def refresh_rate_table(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return RateTable({"USD": 1.0, "JPY": 150.0})
+
+
+def test_rate_refresher_refreshes_on_schedule():
+    api_client = CountingAPIClient()
+    refresher = RateRefresher(api_client, interval=0.01)
+
+    async def main():
+        refresher.start()
+        await asyncio.sleep(0.05)
+        await refresher.stop()
+
+    asyncio.run(main())
+    assert api_client.calls >= 2
+
+
+def test_rate_refresher_survives_failures():
+    api_client = CountingAPIClient(fail=True)
+    refresher = RateRefresher(api_client, interval=0.01)
+
+    async def main():
+        refresher.start()
+        await asyncio.sleep(0.05)
+        await refresher.stop()
+
+    asyncio.run(main())
+    assert api_client.calls >= 2
+
+
+def test_rate_refresher_records_daily_snapshot():
+    api_client = CountingAPIClient()
+    history = RateHistory()
+    refresher = RateRefresher(api_client, interval=0.01, history=history)
+
+    async def main():
+        refresher.start()
+        await asyncio.sleep(0.05)
+        await refresher.stop()
+
+    asyncio.run(main())
+    assert len(history) == 1
+    assert datetime.now(timezone.utc).date() in history
+
+
+class RecordingRateRepo:
+    def __init__(self):
+        self.since = None
+
+    def load(self, since):
+        self.since = since
+        return {}
+
+
+def test_rate_refresher_loads_history_up_to_the_utc_day(monkeypatch):
+    monkeypatch.setattr(rate_refresher, "utc_today", lambda: date(2024, 1, 10))
+    repo = RecordingRateRepo()
+    refresher = RateRefresher(
+        CountingAPIClient(),
+        interval=0.01,
+        history=RateHistory(),
+        repo=repo,
+        history_days=7,
+    )
+
+    asyncio.run(refresher._load_history())
+
+    assert repo.since == date(2024, 1, 3)
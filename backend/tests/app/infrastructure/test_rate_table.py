@@ -0,0 +1,21 @@
+import pytest
+
+from app.errors.currency import UnsupportedCurrencyError
+from app.infrastructure.rate_table import RateTable
+
+
+def test_rate_table_computes_cross_rates():
+    table = RateTable({"USD": 1.0, "EUR": 0.5, "JPY": 150.0})
+
+    assert len(table) == 3
+    assert "EUR" in table
+    assert table.rate("USD", "EUR") == 0.5
+    assert table.rate("EUR", "USD") == 2.0
+    assert table.convert(2, "JPY", "EUR") == pytest.approx(2 * 0.5 / 150.0)
+
+
+def test_rate_table_rejects_unknown_currency():
+    table = RateTable.from_response({"data": {"USD": 1.0}})
+
+    with pytest.raises(UnsupportedCurrencyError):
+        table.rate("USD", "GBP")
@@ -0,0 +1,121 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.errors.currency import CircuitOpenError
+from app.infrastructure.resilience import (
+    CircuitBreaker,
+    CircuitState,
+    ResiliencePolicy,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _response(status_code: int) -> httpx.Response:
+    request = httpx.Request("GET", "http://currency.test/v1/latest")
+    return httpx.Response(status_code, json={"data": {}}, request=request)
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 31
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.before_call()
+    # Only one probe is let through while half-open.
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.rejected == 2
+
+
+def test_policy_retries_server_errors_then_succeeds():
+    policy = ResiliencePolicy(
+        CircuitBreaker(failure_threshold=5, reset_timeout=30),
+        max_attempts=3,
+        backoff_base=0.001,
+    )
+    responses = iter([_response(503), _response(200)])
+
+    async def request():
+        return next(responses)
+
+    res = asyncio.run(policy.call(request))
+    assert res.status_code == 200
+    stats = policy.stats()
+    assert (stats.attempts, stats.retries, stats.failures) == (2, 1, 1)
+    assert stats.circuit_state == "closed"
+
+
+def test_policy_does_not_retry_client_errors():
+    policy = ResiliencePolicy(
+        CircuitBreaker(failure_threshold=1, reset_timeout=30),
+        max_attempts=3,
+        backoff_base=0.001,
+    )
+
+    async def request():
+        return _response(401)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(policy.call(request))
+    assert policy.stats().attempts == 1
+    assert policy.breaker.state == CircuitState.CLOSED
+
+
+def test_policy_opens_circuit_after_repeated_failures():
+    policy = ResiliencePolicy(
+        CircuitBreaker(failure_threshold=2, reset_timeout=30),
+        max_attempts=5,
+        backoff_base=0.001,
+    )
+
+    async def request():
+        raise httpx.ConnectError("boom")
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(policy.call(request))
+    stats = policy.stats()
+    assert stats.attempts == 2
+    assert stats.circuit_state == "open"
+
+
+def test_policy_hedges_slow_requests():
+    policy = ResiliencePolicy(
+        CircuitBreaker(failure_threshold=5, reset_timeout=30),
+        hedge_percentile=50,
+    )
+    policy._latencies.extend([0.01] * ResiliencePolicy.MIN_HEDGE_SAMPLES)
+    delays = iter([1.0, 0.0])
+
+    async def request():
+        await asyncio.sleep(next(delays))
+        return _response(200)
+
+    async def main():
+        started = asyncio.get_running_loop().time()
+        res = await policy.call(request)
+        return res, asyncio.get_running_loop().time() - started
+
+    res, elapsed = asyncio.run(main())
+    assert res.status_code == 200
+    assert elapsed < 0.5
+    assert policy.stats().hedged == 1
@@ -0,0 +1,165 @@
+import asyncio
+
+from app.infrastructure.transaction_cache import TransactionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return [self.calls]
+
+
+def test_transaction_cache_hits_until_ttl_expires():
+    clock = FakeClock()
+    cache = TransactionCache(ttl=30, max_entries=8, clock=clock)
+    loader = CountingLoader()
+
+    async def main():
+        first = await cache.get_or_load("u1", "list", (20,), None, loader)
+        again = await cache.get_or_load("u1", "list", (20,), None, loader)
+        clock.now = 31
+        expired = await cache.get_or_load("u1", "list", (20,), None, loader)
+        return first, again, expired
+
+    assert asyncio.run(main()) == ([1], [1], [2])
+    stats = cache.stats().endpoints["list"]
+    assert (stats.hits, stats.misses, stats.hit_rate) == (1, 2, 1 / 3)
+
+
+def test_transaction_cache_evicts_least_recently_used():
+    cache = TransactionCache(ttl=30, max_entries=2)
+    loader = CountingLoader()
+
+    async def main():
+        await cache.get_or_load("u1", "list", "a", None, loader)
+        await cache.get_or_load("u1", "list", "b", None, loader)
+        await cache.get_or_load("u1", "list", "a", None, loader)
+        await cache.get_or_load("u1", "list", "c", None, loader)
+        # "b" was the least recently used.
+        await cache.get_or_load("u1", "list", "a", None, loader)
+        await cache.get_or_load("u1", "list", "b", None, loader)
+
+    asyncio.run(main())
+    assert loader.calls == 4
+    assert cache.stats().evictions == 2
+
+
+def test_transaction_cache_invalidates_only_affected_entries_of_the_user():
+    cache = TransactionCache(ttl=30, max_entries=8)
+    loader = CountingLoader()
+    entries = [
+        ("u1", "list", "all", None),
+        ("u1", "search", "expense", "expense"),
+        ("u1", "search", "income", "income"),
+        ("u2", "list", "all", None),
+    ]
+
+    async def main():
+        for entry in entries:
+            await cache.get_or_load(*entry, loader)
+        await cache.invalidate("u1", ["expense"])
+        for entry in entries:
+            await cache.get_or_load(*entry, loader)
+
+    asyncio.run(main())
+    # The u1 list and expense search were reloaded; the rest were hits.
+    assert loader.calls == 6
+    assert cache.stats().invalidations == 2
+
+
+def test_transaction_cache_does_not_store_a_load_raced_by_a_write():
+    cache = TransactionCache(ttl=30, max_entries=8)
+    loader = CountingLoader()
+
+    async def slow_loader():
+        await cache.invalidate("u1")
+        return ["stale"]
+
+    async def main():
+        stale = await cache.get_or_load("u1", "list", "a", None, slow_loader)
+        fresh = await cache.get_or_load("u1", "list", "a", None, loader)
+        return stale, fresh
+
+    assert asyncio.run(main()) == (["stale"], [1])
+
+
+def test_transaction_cache_keeps_versions_and_drops_entries_when_they_change():
+    clock = FakeClock()
+    cache = TransactionCache(ttl=30, max_entries=8, version_ttl=5, clock=clock)
+    loader = CountingLoader()
+    stored = [1]
+
+    async def load_version():
+        return stored[0]
+
+    async def main():
+        assert await cache.version("u1", load_version) == 1
+        await cache.get_or_load("u1", "list", "a", None, loader)
+        # Another instance writes; the kept version is used until it expires.
+        stored[0] = 2
+        assert await cache.version("u1", load_version) == 1
+        await cache.get_or_load("u1", "list", "a", None, loader)
+        clock.now = 6
+        assert await cache.version("u1", load_version) == 2
+        await cache.get_or_load("u1", "list", "a", None, loader)
+
+    asyncio.run(main())
+    assert loader.calls == 2
+    stats = cache.stats().endpoints["version"]
+    assert (stats.hits, stats.misses) == (1, 2)
+
+
+def test_transaction_cache_reloads_version_after_a_local_write():
+    cache = TransactionCache(ttl=30, max_entries=8, version_ttl=60)
+    loads = 0
+
+    async def load_version():
+        nonlocal loads
+        loads += 1
+        return loads
+
+    async def main():
+        await cache.version("u1", load_version)
+        await cache.invalidate("u1", ["expense"])
+        return await cache.version("u1", load_version)
+
+    assert asyncio.run(main()) == 2
+
+
+def test_transaction_cache_keeps_entries_of_other_types_after_a_local_write():
+    clock = FakeClock()
+    cache = TransactionCache(ttl=30, max_entries=8, version_ttl=5, clock=clock)
+    loader = CountingLoader()
+    stored = [1]
+
+    async def load_version():
+        return stored[0]
+
+    async def main():
+        await cache.version("u1", load_version)
+        await cache.get_or_load("u1", "search", "income", "income", loader)
+        # An expense write through this instance, which produced version 2.
+        stored[0] = 2
+        await cache.invalidate("u1", ["expense"], version=2)
+        clock.now = 6
+        assert await cache.version("u1", load_version) == 2
+        await cache.get_or_load("u1", "search", "income", "income", loader)
+        # A write by another instance still drops them.
+        stored[0] = 3
+        clock.now = 12
+        assert await cache.version("u1", load_version) == 3
+        await cache.get_or_load("u1", "search", "income", "income", loader)
+
+    asyncio.run(main())
+    assert loader.calls == 2
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timezone
+
+from google.cloud import firestore
+from pydantic_extra_types.currency_code import Currency
+import pytest
+
+from app.errors.transaction import TransactionNotExists
+from app.models.transaction_models import Transaction, TransactionType
+from app.repo.async_transaction_repo import AsyncTransactionRepo
+from app.repo.transaction_repo import TransactionRepo
+
+
+def _transaction(tx_type: TransactionType, amount: float = 1.0) -> Transaction:
+    return Transaction(
+        amount=amount,
+        exchange_rate=None,
+        currency=Currency("USD"),
+        transaction_type=tx_type,
+        category="test",
+        description="desc",
+        business_name=None,
+        payment_method=None,
+        occurred_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def test_async_repo_create_get_list_delete_expense(firestore_db):
+    tx = _transaction(TransactionType.EXPENSE, 12.34)
+
+    async def main():
+        repo = AsyncTransactionRepo(
+            firestore.AsyncClient(project=firestore_db.project), "test-user"
+        )
+        created = await repo.create(TransactionType.EXPENSE, tx)
+        got = await repo.get(created.id)
+        listed = await repo.list(limit=10, offset=0)
+        deleted = await repo.delete(TransactionType.EXPENSE, [created.id])
+        with pytest.raises(TransactionNotExists):
+            await repo.get(created.id)
+        return got, listed, deleted
+
+    got, listed, deleted = asyncio.run(main())
+
+    assert got.amount == 12.34
+    assert [doc.id for doc in listed] == [tx.id]
+    assert deleted == [tx.id]
+
+
+def test_async_repo_reads_what_sync_repo_wrote(firestore_db):
+    sync_repo = TransactionRepo(firestore_db, "test-user")
+    expense = sync_repo.create(
+        TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE, 1.0)
+    )
+    _ = sync_repo.create(
+        TransactionType.INCOME, _transaction(TransactionType.INCOME, 2.0)
+    )
+
+    async def main():
+        repo = AsyncTransactionRepo(
+            firestore.AsyncClient(project=firestore_db.project), "test-user"
+        )
+        return await repo.search(TransactionType.EXPENSE, limit=10)
+
+    found = asyncio.run(main())
+
+    assert [doc.id for doc in found] == [expense.id]
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime, timezone
+
+from pydantic_extra_types.currency_code import Currency
+
+from app.infrastructure.transaction_cache import TransactionCache
+from app.models.transaction_models import Transaction, TransactionType
+from app.repo.cached_transaction_repo import CachedTransactionRepo
+
+
+def _transaction(tx_type: TransactionType) -> Transaction:
+    return Transaction(
+        amount=1.0,
+        exchange_rate=None,
+        currency=Currency("USD"),
+        transaction_type=tx_type,
+        category="test",
+        description=None,
+        business_name=None,
+        payment_method=None,
+        occurred_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+class _Repo:
+    def __init__(self):
+        self.reads = 0
+        self.version = 0
+        self.rows: list[Transaction] = []
+
+    def list(self, limit, offset, cursor, fields):
+        self.reads += 1
+        return self.rows[:limit]
+
+    def search(self, transaction_type, **filters):
+        self.reads += 1
+        return [tx for tx in self.rows if tx.transaction_type == transaction_type]
+
+    def create(self, transaction_type, data):
+        self.rows.append(data)
+        self.version += 1
+        return data
+
+    def backfill_amount_base(self, rates_of):
+        return len(self.rows)
+
+    def get_rollup(self):
+        return {}
+
+    def get_version(self):
+        return self.version
+
+
+def test_cached_repo_serves_repeated_reads_and_invalidates_on_write():
+    inner = _Repo()
+    repo = CachedTransactionRepo(inner, TransactionCache(ttl=30, max_entries=8), "u")
+
+    async def main():
+        await repo.list(20, 0, None, None)
+        await repo.list(20, 0, None, None)
+        assert inner.reads == 1
+
+        await repo.create(
+            TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE)
+        )
+        return await repo.list(20, 0, None, None)
+
+    rows = asyncio.run(main())
+    assert inner.reads == 2
+    assert len(rows) == 1
+
+
+def test_cached_repo_drops_the_users_entries_after_a_backfill():
+    inner = _Repo()
+    repo = CachedTransactionRepo(inner, TransactionCache(ttl=30, max_entries=8), "u")
+
+    async def main():
+        await repo.search(TransactionType.EXPENSE)
+        await repo.list(20, 0, None, None)
+        await repo.backfill_amount_base(lambda rows: [1.0] * len(rows))
+        await repo.search(TransactionType.EXPENSE)
+        await repo.list(20, 0, None, None)
+
+    asyncio.run(main())
+    assert inner.reads == 4
+
+
+def test_cached_repo_normalizes_search_filters():
+    inner = _Repo()
+    repo = CachedTransactionRepo(inner, TransactionCache(ttl=30, max_entries=8), "u")
+
+    async def main():
+        await repo.search(TransactionType.EXPENSE, category=["b", "a"], limit=None)
+        await repo.search(TransactionType.EXPENSE, category=["a", "b"])
+        await repo.search(TransactionType.EXPENSE, category=["a", "b"], fields=[])
+        # Writes of another type keep expense searches cached.
+        await repo.create(TransactionType.INCOME, _transaction(TransactionType.INCOME))
+        await repo.search(TransactionType.EXPENSE, category=["a"])
+        await repo.search(TransactionType.EXPENSE, category=["a"])
+
+    asyncio.run(main())
+    assert inner.reads == 2
+
+
+def test_cached_repo_keeps_other_types_cached_across_a_version_check():
+    inner = _Repo()
+    cache = TransactionCache(ttl=30, max_entries=8, version_ttl=60)
+    repo = CachedTransactionRepo(inner, cache, "u")
+
+    async def main():
+        assert await repo.get_version() == 0
+        await repo.search(TransactionType.INCOME)
+        await repo.create(
+            TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE)
+        )
+        # The version of the expense write was recorded, not taken for a write by
+        # another instance.
+        assert await repo.get_version() == 1
+        await repo.search(TransactionType.INCOME)
+
+    asyncio.run(main())
+    assert inner.reads == 1
+
+
+def test_cached_repo_passes_other_methods_through():
+    inner = _Repo()
+    repo = CachedTransactionRepo(inner, TransactionCache(ttl=30, max_entries=8), "u")
+
+    assert repo.get_rollup() == {}
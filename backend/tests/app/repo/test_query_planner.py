@@ -0,0 +1,165 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.errors.transaction import QueryTooBroadError
+from app.jobs.generate_indexes import DEFAULT_OUTPUT, render
+from app.models.transaction_models import TransactionType
+from app.repo.query_planner import (
+    MAX_IN_VALUES,
+    ResidualScan,
+    composite_indexes,
+    plan_search,
+)
+
+DAY = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_plan_pushes_equalities_and_the_range_on_the_sort_field():
+    plan = plan_search(
+        TransactionType.EXPENSE,
+        currency="USD",
+        category=["food"],
+        occurred_after=datetime(2024, 1, 1),
+        exclude_recurring=True,
+    )
+
+    assert plan.equalities == [
+        ("transaction_type", "expense"),
+        ("currency", "USD"),
+        ("category", "food"),
+        ("interval", None),
+    ]
+    # Naive datetimes are read as UTC, like Firestore does.
+    assert plan.ranges == [("occurred_at", ">=", DAY)]
+    assert plan.in_filter is None
+    assert plan.residual == []
+
+
+def test_plan_leaves_ranges_on_other_fields_and_extra_in_lists_residual():
+    plan = plan_search(
+        TransactionType.EXPENSE,
+        min_amount=10,
+        currency=["USD", "JPY", "EUR"],
+        category=["food", "rent"],
+    )
+
+    assert plan.in_filter == ("category", ["food", "rent"])
+    assert plan.residual == [
+        ("amount", ">=", 10),
+        ("currency", "in", {"USD", "JPY", "EUR"}),
+    ]
+    assert plan.residual_fields == {"amount", "currency"}
+
+
+def test_plan_sorts_by_amount_base_to_push_its_bounds():
+    plan = plan_search(
+        TransactionType.EXPENSE,
+        min_amount_base=100,
+        max_amount_base=500,
+        occurred_after=DAY,
+    )
+
+    assert plan.order_by == "amount_base"
+    assert plan.ranges == [("amount_base", ">=", 100), ("amount_base", "<=", 500)]
+    # Only one field can be ranged by the index; the date is checked in memory.
+    assert plan.residual == [("occurred_at", ">=", DAY)]
+    assert plan.index_fields() in composite_indexes()
+
+
+def test_plan_keeps_oversized_in_lists_residual():
+    categories = [str(i) for i in range(MAX_IN_VALUES + 1)]
+
+    plan = plan_search(TransactionType.INCOME, category=categories)
+
+    assert plan.in_filter is None
+    assert plan.residual == [("category", "in", set(categories))]
+
+
+def test_plan_checks_recurring_in_memory():
+    plan = plan_search(
+        TransactionType.EXPENSE, recurring_only=True, subscription_id="sub"
+    )
+
+    assert ("subscription_id", "sub") in plan.equalities
+    assert plan.matches({"interval": "monthly"})
+    assert not plan.matches({"interval": None})
+
+
+def test_plan_matches_treats_incomparable_values_as_misses():
+    plan = plan_search(TransactionType.EXPENSE, min_amount=10)
+
+    assert plan.matches({"amount": 10})
+    assert not plan.matches({"amount": 9})
+    assert not plan.matches({})
+
+
+def test_residual_scan_applies_offset_and_limit_after_filtering():
+    plan = plan_search(TransactionType.EXPENSE, min_amount=10)
+    scan = ResidualScan(plan, offset=1, limit=2)
+    rows = [{"amount": a} for a in [5, 10, 20, 1, 30, 40]]
+
+    taken = []
+    for row in rows:
+        if scan.done:
+            break
+        if scan.take(row):
+            taken.append(row["amount"])
+
+    assert taken == [20, 30]
+    assert scan.scanned == 5
+
+
+def test_residual_scan_rejects_scans_past_the_bound():
+    plan = plan_search(TransactionType.EXPENSE, min_amount=10)
+    scan = ResidualScan(plan, offset=None, limit=1, max_scanned=2)
+
+    _ = scan.take({"amount": 1})
+    _ = scan.take({"amount": 2})
+    with pytest.raises(QueryTooBroadError):
+        _ = scan.take({"amount": 3})
+
+
+def test_composite_indexes_cover_every_planned_search():
+    indexes = composite_indexes()
+    plan = plan_search(
+        TransactionType.EXPENSE,
+        min_amount=10,
+        currency="USD",
+        category=["food", "rent"],
+        occurred_after=DAY,
+    )
+
+    assert plan.index_fields() in indexes
+    assert len(indexes) == len({tuple(fields) for fields in indexes})
+
+
+def test_committed_index_file_is_up_to_date():
+    # Regenerate with `python -m app.jobs.generate_indexes`.
+    assert DEFAULT_OUTPUT.read_text() == render()
+
+
+def test_plan_pushes_one_search_token_and_checks_the_words():
+    plan = plan_search(TransactionType.EXPENSE, q="Star")
+
+    # "ar" is made of the rarest letters.
+    assert plan.array_contains == ("search_tokens", "ar")
+    assert plan.residual_fields == {"business_name", "description"}
+    assert plan.matches({"business_name": "STARBUCKS", "description": None})
+    assert plan.matches({"business_name": "Coffee", "description": "at the star"})
+    assert not plan.matches({"business_name": "Stop at the bar"})
+    assert ("search_tokens", "CONTAINS") in plan.index_fields()
+
+
+def test_plan_rejects_rows_holding_every_token_but_not_the_term():
+    plan = plan_search(TransactionType.EXPENSE, q="ｃａｆｅ latte")
+
+    # Holds the bigrams "ca", "af" and "fe", but not the word.
+    assert not plan.matches({"business_name": "Cash Safeway Feed latte"})
+    assert not plan.matches({"business_name": "Cafe", "description": "lat te"})
+    assert plan.matches({"business_name": "Cafe", "description": "Iced latte"})
+
+
+def test_plan_without_residual_for_a_one_token_term():
+    assert plan_search(TransactionType.EXPENSE, q="a").residual == []
+    assert plan_search(TransactionType.EXPENSE, q="ca").residual == []
@@ -0,0 +1,19 @@
+from datetime import date
+
+from app.repo.rate_repo import RateRepo
+
+
+def test_rate_repo_save_and_load(firestore_db):
+    repo = RateRepo(firestore_db)
+    repo.save_many(
+        {
+            date(2024, 1, 1): {"USD": 1.0, "JPY": 140.0},
+            date(2024, 2, 1): {"USD": 1.0, "JPY": 150.0},
+        }
+    )
+
+    assert repo.load() == {
+        date(2024, 1, 1): {"USD": 1.0, "JPY": 140.0},
+        date(2024, 2, 1): {"USD": 1.0, "JPY": 150.0},
+    }
+    assert list(repo.load(since=date(2024, 1, 15))) == [date(2024, 2, 1)]
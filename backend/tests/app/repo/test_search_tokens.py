@@ -0,0 +1,66 @@
+from app.repo.search_tokens import document_tokens, most_selective, tokenize
+
+
+def test_tokenize_yields_bigrams_of_each_word():
+    assert tokenize("Starbucks Cafe") == [
+        "st",
+        "ta",
+        "ar",
+        "rb",
+        "bu",
+        "uc",
+        "ck",
+        "ks",
+        "ca",
+        "af",
+        "fe",
+    ]
+
+
+def test_tokenize_normalizes_width_and_case():
+    # Full-width text as found in PayPay exports.
+    assert tokenize("ＳＴＡＲ") == tokenize("star")
+
+
+def test_tokenize_splits_japanese_without_spaces():
+    assert tokenize("スターバックス") == [
+        "スタ",
+        "ター",
+        "ーバ",
+        "バッ",
+        "ック",
+        "クス",
+    ]
+
+
+def test_tokenize_keeps_single_characters_and_drops_punctuation():
+    assert tokenize("A & 7-11") == ["a", "7", "11"]
+
+
+def test_document_tokens_merge_fields_and_skip_missing_ones():
+    assert document_tokens(["Tea", None, "tea time"]) == [
+        "a",
+        "e",
+        "ea",
+        "i",
+        "im",
+        "m",
+        "me",
+        "t",
+        "te",
+        "ti",
+    ]
+
+
+def test_single_character_terms_match_longer_words():
+    tokens = document_tokens(["喫茶店", "Cafe A"])
+
+    assert set(tokenize("店")) <= set(tokens)
+    assert set(tokenize("a")) <= set(tokens)
+    assert set(tokenize("喫茶")) <= set(tokens)
+
+
+def test_most_selective_prefers_long_tokens_of_rare_characters():
+    assert most_selective(["e", "ea"]) == "ea"
+    assert most_selective(["ea", "qu", "zz"]) == "zz"
+    assert most_selective(["ta", "バッ"]) == "バッ"
@@ -0,0 +1,321 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import uuid
+
+from google.cloud.firestore_v1 import Increment
+import pytest
+from pydantic import ValidationError
+
+from app.errors.transaction import InvalidCursorError, SummaryTooLargeError
+from app.models.transaction_models import Transaction, TransactionType
+from app.repo.transaction_queries import (
+    DOCUMENT_ID,
+    MAX_SUMMARY_BUCKETS,
+    aggregation_values,
+    chunked,
+    decode_cursor,
+    deletable_ids,
+    encode_cursor,
+    in_request_order,
+    month_ranges,
+    projected_fields,
+    rollup_document,
+    rollup_totals,
+    sorted_categories,
+    summary_aggregations,
+    to_document,
+    to_rollup,
+    to_transaction,
+    to_transactions,
+)
+
+
+def _transaction() -> Transaction:
+    return Transaction(
+        amount=12.5,
+        exchange_rate=None,
+        transaction_type=TransactionType.EXPENSE,
+        category="food",
+        description=None,
+        business_name=None,
+        payment_method=None,
+        occurred_at=datetime(2024, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    )
+
+
+def test_to_document_stores_search_tokens():
+    tx = _transaction().model_copy(
+        update={"business_name": "Tully's", "description": "ラテ"}
+    )
+
+    assert to_document(tx)["search_tokens"] == [
+        "l",
+        "ll",
+        "ly",
+        "s",
+        "t",
+        "tu",
+        "u",
+        "ul",
+        "y",
+        "テ",
+        "ラ",
+        "ラテ",
+    ]
+
+
+def test_cursor_round_trips_sort_value_and_id():
+    tx = _transaction()
+
+    values = decode_cursor(encode_cursor(tx))
+
+    assert values == {"occurred_at": tx.occurred_at, DOCUMENT_ID: str(tx.id)}
+
+
+def test_cursor_supports_other_sort_fields():
+    tx = _transaction()
+
+    values = decode_cursor(encode_cursor(tx, "amount"), "amount")
+
+    assert values == {"amount": 12.5, DOCUMENT_ID: str(tx.id)}
+
+
+@pytest.mark.parametrize("token", ["", "not-base64!", "bnVsbA", "e30"])
+def test_decode_cursor_rejects_garbage(token):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token)
+
+
+@pytest.mark.parametrize("doc_id", ["", "users/other/transactions/x", "not-a-uuid", 7])
+def test_decode_cursor_rejects_ids_that_are_not_transaction_ids(doc_id):
+    payload = json.dumps({"f": "amount", "v": 1.0, "id": doc_id})
+    token = base64.urlsafe_b64encode(payload.encode()).decode()
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, "amount")
+
+
+def test_decode_cursor_rejects_cursor_for_other_sort_field():
+    token = encode_cursor(_transaction(), "amount")
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, "occurred_at")
+
+
+def _snapshot(tx_type: TransactionType | None):
+    data = {} if tx_type is None else {"transaction_type": tx_type.value}
+    return SimpleNamespace(exists=tx_type is not None, to_dict=lambda: data)
+
+
+def test_deletable_ids_keeps_request_order_and_skips_mismatches():
+    expense, income, missing, unknown = (uuid.uuid4() for _ in range(4))
+    docs = {
+        str(expense): _snapshot(TransactionType.EXPENSE),
+        str(income): _snapshot(TransactionType.INCOME),
+        str(missing): _snapshot(None),
+    }
+    other_expense = uuid.uuid4()
+    docs[str(other_expense)] = _snapshot(TransactionType.EXPENSE)
+
+    result = deletable_ids(
+        [other_expense, income, missing, unknown, expense, other_expense],
+        docs,
+        TransactionType.EXPENSE,
+    )
+
+    assert result == [other_expense, expense]
+
+
+def test_chunked_respects_batch_limit():
+    chunks = list(chunked(list(range(1001))))
+
+    assert [len(chunk) for chunk in chunks] == [500, 500, 1]
+
+
+def test_in_request_order_follows_ids_and_skips_missing():
+    first, second = _transaction(), _transaction()
+    docs = {
+        str(tx.id): SimpleNamespace(id=str(tx.id), exists=True, to_dict=tx.model_dump)
+        for tx in (first, second)
+    }
+
+    result = in_request_order([second.id, uuid.uuid4(), first.id], docs)
+
+    assert [tx.id for tx in result] == [second.id, first.id]
+
+
+def test_projected_fields_adds_required_fields():
+    assert projected_fields(None) is None
+    assert projected_fields([]) is None
+    assert projected_fields(["category", "amount", "amount"]) == (
+        "amount",
+        "category",
+        "occurred_at",
+        "transaction_type",
+    )
+
+
+def test_to_transaction_builds_projection_for_selected_fields():
+    tx = _transaction()
+    fields = projected_fields(["amount"])
+    data = {name: value for name, value in to_document(tx).items() if name in fields}
+    doc = SimpleNamespace(id=str(tx.id), exists=True, to_dict=lambda: dict(data))
+
+    row = to_transaction(doc, fields)
+
+    assert row.model_dump() == {
+        "id": tx.id,
+        "amount": 12.5,
+        "occurred_at": tx.occurred_at,
+        "transaction_type": TransactionType.EXPENSE,
+    }
+
+
+def _stored(tx: Transaction, *drop: str) -> SimpleNamespace:
+    data = {k: v for k, v in to_document(tx).items() if k not in drop}
+    return SimpleNamespace(id=str(tx.id), exists=True, to_dict=lambda: dict(data))
+
+
+def test_to_transactions_matches_per_row_hydration():
+    txs = [_transaction() for _ in range(3)]
+    docs = [_stored(tx) for tx in txs]
+
+    assert to_transactions(docs) == [to_transaction(doc) for doc in docs] == txs
+
+
+def test_to_transactions_validates_every_row():
+    docs = [_stored(_transaction()), _stored(_transaction(), "payment_method")]
+
+    with pytest.raises(ValidationError):
+        to_transactions(docs)
+
+
+def test_month_ranges_split_at_month_boundaries():
+    start = datetime(2023, 11, 15, 8, tzinfo=timezone.utc)
+    end = datetime(2024, 2, 10, tzinfo=timezone.utc)
+
+    ranges = month_ranges(start, end)
+
+    assert [label for label, _, _ in ranges] == [
+        "2023-11",
+        "2023-12",
+        "2024-01",
+        "2024-02",
+    ]
+    assert ranges[0][1] == start
+    assert ranges[1][1] == datetime(2023, 12, 1, tzinfo=timezone.utc)
+    assert ranges[-1][2] == end
+    assert all(
+        upper == lower for (_, _, upper), (_, lower, _) in zip(ranges, ranges[1:])
+    )
+
+
+def test_summary_aggregations_rejects_too_many_buckets():
+    day = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    ranges = [(day, day)] * MAX_SUMMARY_BUCKETS
+
+    with pytest.raises(SummaryTooLargeError):
+        summary_aggregations(None, TransactionType.EXPENSE, ranges, ["a", "b"])
+
+
+def test_aggregation_values_reads_aliases_and_defaults_to_zero():
+    results = [
+        [
+            SimpleNamespace(alias="count", value=3),
+            SimpleNamespace(alias="total", value=7.5),
+        ]
+    ]
+
+    assert aggregation_values(results) == (3, 7.5)
+    assert aggregation_values([[SimpleNamespace(alias="total", value=None)]]) == (
+        0,
+        0.0,
+    )
+
+
+def test_sorted_categories_dedupes_and_puts_uncategorized_last():
+    assert sorted_categories(["rent", None, "food", "rent"]) == ["food", "rent", None]
+
+
+def test_rollup_totals_buckets_by_utc_month_type_category_and_currency():
+    jst = timezone(timedelta(hours=9))
+    rows = [
+        {
+            "amount": 2.0,
+            "category": "food",
+            "currency": "USD",
+            "transaction_type": "expense",
+            # Still January in UTC.
+            "occurred_at": datetime(2024, 2, 1, 8, tzinfo=jst),
+        },
+        {
+            "amount": 3.0,
+            "category": "food",
+            "currency": "USD",
+            "transaction_type": "expense",
+            "occurred_at": datetime(2024, 1, 5, tzinfo=timezone.utc),
+        },
+        {
+            "amount": 500.0,
+            "category": "food",
+            "currency": "JPY",
+            "transaction_type": "expense",
+            "occurred_at": datetime(2024, 1, 6, tzinfo=timezone.utc),
+        },
+        to_document(_transaction()) | {"category": None},
+    ]
+
+    assert rollup_totals(rows) == {
+        ("2024-01", "expense", "food", "USD"): (2, 5.0),
+        ("2024-01", "expense", "food", "JPY"): (1, 500.0),
+        ("2024-03", "expense", "(uncategorized)", "JPY"): (1, 12.5),
+    }
+    assert rollup_totals(rows[:1], sign=-1) == {
+        ("2024-01", "expense", "food", "USD"): (-1, -2.0)
+    }
+
+
+def test_rollup_document_nests_buckets_as_increments_or_values():
+    totals = {
+        ("2024-01", "expense", "food", "USD"): (2, 5.0),
+        ("2024-01", "expense", "food", "JPY"): (1, 500.0),
+    }
+
+    bucket = rollup_document(totals)["months"]["2024-01"]["expense"]["food"]["USD"]
+    assert isinstance(bucket["count"], Increment)
+    rebuilt = rollup_document(totals, increment=False)
+    assert rebuilt["months"] == {
+        "2024-01": {
+            "expense": {
+                "food": {
+                    "USD": {"count": 2, "total": 5.0},
+                    "JPY": {"count": 1, "total": 500.0},
+                }
+            }
+        }
+    }
+    # Every rollup write bumps the version, rebuilds included.
+    assert isinstance(rebuilt["version"], Increment)
+
+
+def test_to_rollup_drops_emptied_and_unkeyed_buckets():
+    stored = {
+        "months": {
+            "2024-01": {
+                "expense": {
+                    "food": {"JPY": {"count": 0, "total": 1e-16}},
+                    "rent": {"JPY": {"count": 1, "total": 9.0}},
+                }
+            },
+            "2024-02": {"income": {"pay": {"USD": {"count": 0, "total": 0.0}}}},
+            # Stored before buckets were keyed by currency.
+            "2023-12": {"income": {"pay": {"count": 1, "total": 5.0}}},
+        }
+    }
+
+    assert to_rollup(stored) == {
+        "2024-01": {"expense": {"rent": {"JPY": {"count": 1, "total": 9.0}}}}
+    }
+    assert to_rollup(None) == {}
@@ -1,5 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
+from google.api_core.exceptions import AlreadyExists, ServiceUnavailable
 from pydantic_extra_types.currency_code import Currency
 import pytest
 
@@ -104,3 +106,317 @@ def test_repo_list_with_amount_filters(firestore_db):
     listed_ids = [doc.id for doc in listed]
     assert high.id in listed_ids
     assert low.id not in listed_ids
+
+
+def test_repo_list_pages_with_cursor(firestore_db):
+    from app.repo.transaction_queries import encode_cursor
+
+    repo = TransactionRepo(firestore_db, "test-user")
+    # Same occurred_at everywhere, so ordering falls back to the document id.
+    created = [
+        repo.create(TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE))
+        for _ in range(5)
+    ]
+
+    seen = []
+    cursor = None
+    while True:
+        page = repo.list(limit=2, cursor=cursor)
+        seen.extend(tx.id for tx in page)
+        if len(page) < 2:
+            break
+        cursor = encode_cursor(page[-1])
+
+    assert sorted(seen) == sorted(tx.id for tx in created)
+    assert len(seen) == len(set(seen))
+
+
+def test_repo_delete_many_reports_only_deleted_ids(firestore_db):
+    repo = TransactionRepo(firestore_db, "test-user")
+    expenses = [
+        repo.create(TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE))
+        for _ in range(3)
+    ]
+    income = repo.create(TransactionType.INCOME, _transaction(TransactionType.INCOME))
+    ids = [expenses[2].id, income.id, expenses[0].id, expenses[1].id]
+
+    deleted = repo.delete(TransactionType.EXPENSE, ids)
+
+    assert deleted == [expenses[2].id, expenses[0].id, expenses[1].id]
+    assert repo.get(income.id).id == income.id
+    for tx in expenses:
+        with pytest.raises(TransactionNotExists):
+            repo.get(tx.id)
+
+
+def test_repo_search_by_id_preserves_request_order(firestore_db, monkeypatch):
+    from app.repo import transaction_queries
+
+    repo = TransactionRepo(firestore_db, "test-user")
+    created = [
+        repo.create(TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE))
+        for _ in range(5)
+    ]
+    ids = [tx.id for tx in reversed(created)]
+
+    # Force several chunks so the parallel read path is exercised too.
+    monkeypatch.setattr(transaction_queries, "GET_ALL_CHUNK", 2)
+    listed = repo.search(TransactionType.EXPENSE, id=ids)
+
+    assert [tx.id for tx in listed] == ids
+
+
+def test_repo_search_by_term_matches_business_name_and_description(firestore_db):
+    repo = TransactionRepo(firestore_db, "test-user")
+    coffee = _transaction(TransactionType.EXPENSE).model_copy(
+        update={"business_name": "スターバックス"}
+    )
+    other = _transaction(TransactionType.EXPENSE).model_copy(
+        update={"description": "Star Market"}
+    )
+    for tx in [coffee, other]:
+        _ = repo.create(TransactionType.EXPENSE, tx)
+
+    assert [tx.id for tx in repo.search(TransactionType.EXPENSE, q="バックス")] == [
+        coffee.id
+    ]
+    assert [tx.id for tx in repo.search(TransactionType.EXPENSE, q="star")] == [
+        other.id
+    ]
+    assert [tx.id for tx in repo.search(TransactionType.EXPENSE, q="M")] == [other.id]
+
+
+def test_repo_list_with_fields_reads_a_projection(firestore_db):
+    repo = TransactionRepo(firestore_db, "test-user")
+    tx = repo.create(
+        TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE, 3.0)
+    )
+
+    [row] = repo.list(limit=10, fields=["amount"])
+
+    assert not isinstance(row, Transaction)
+    assert row.id == tx.id
+    assert row.amount == 3.0
+    assert "description" not in row.model_dump()
+
+
+def test_repo_create_many_writes_every_item(firestore_db):
+    repo = TransactionRepo(firestore_db, "test-user")
+    items = [_transaction(TransactionType.EXPENSE, float(i + 1)) for i in range(45)]
+
+    errors = repo.create_many(items)
+
+    assert errors == {}
+    listed = repo.list(limit=100)
+    assert sorted(tx.id for tx in listed) == sorted(tx.id for tx in items)
+
+
+def test_repo_summarize_aggregates_each_bucket(firestore_db):
+    repo = TransactionRepo(firestore_db, "test-user")
+    for amount, category, month in [
+        (2.0, "food", 1),
+        (3.0, "food", 1),
+        (5.0, "rent", 1),
+        (7.0, "food", 2),
+    ]:
+        tx = _transaction(TransactionType.EXPENSE, amount)
+        tx.category = category
+        tx.occurred_at = datetime(2024, month, 10, tzinfo=timezone.utc)
+        repo.create(TransactionType.EXPENSE, tx)
+    january = (
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        datetime(2024, 2, 1, tzinfo=timezone.utc),
+    )
+    february = (january[1], datetime(2024, 3, 1, tzinfo=timezone.utc))
+
+    categories = repo.categories(TransactionType.EXPENSE, january[0], february[1])
+    values = repo.summarize(TransactionType.EXPENSE, [january, february], categories)
+
+    assert categories == ["food", "rent"]
+    assert values == [(2, 5.0), (1, 5.0), (1, 7.0), (0, 0.0)]
+
+
+def test_repo_writes_keep_the_rollup_in_sync(firestore_db):
+    repo = TransactionRepo(firestore_db, "test-user")
+    first = repo.create(
+        TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE, 2.0)
+    )
+    repo.create_many([_transaction(TransactionType.EXPENSE, 3.0) for _ in range(2)])
+    repo.create(TransactionType.INCOME, _transaction(TransactionType.INCOME, 10.0))
+    repo.delete(TransactionType.EXPENSE, [first.id])
+
+    rollup = repo.get_rollup()
+
+    assert rollup == {
+        "2024-01": {
+            "expense": {"test": {"USD": {"count": 2, "total": 6.0}}},
+            "income": {"test": {"USD": {"count": 1, "total": 10.0}}},
+        }
+    }
+    # A rebuild from the raw transactions arrives at the same totals.
+    repo.rollup_ref.delete()
+    assert repo.rebuild_rollup() == 3
+    assert repo.get_rollup() == rollup
+
+
+def test_repo_version_changes_on_every_write(firestore_db):
+    repo = TransactionRepo(firestore_db, "test-user")
+    versions = [repo.get_version()]
+
+    tx = repo.create(TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE))
+    versions.append(repo.get_version())
+    repo.create_many([_transaction(TransactionType.INCOME)])
+    versions.append(repo.get_version())
+    repo.delete(TransactionType.EXPENSE, [tx.id])
+    versions.append(repo.get_version())
+    repo.rebuild_rollup()
+    versions.append(repo.get_version())
+
+    assert versions == [0, 1, 2, 3, 4]
+
+
+def test_repo_backfill_amount_base_bumps_the_version(firestore_db):
+    repo = TransactionRepo(firestore_db, "test-user")
+    repo.create(TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE, 3.0))
+    version = repo.get_version()
+
+    assert repo.backfill_amount_base(lambda rows: [2.0] * len(rows)) == 1
+    assert repo.get_version() == version + 1
+    assert repo.list()[0].amount_base == 6.0
+    # Nothing left to backfill: the version stays.
+    assert repo.backfill_amount_base(lambda rows: [2.0] * len(rows)) == 0
+    assert repo.get_version() == version + 1
+
+
+def test_repo_rebuild_search_tokens_bumps_the_version(firestore_db):
+    repo = TransactionRepo(firestore_db, "test-user")
+    assert repo.rebuild_search_tokens() == 0
+    assert repo.get_version() == 0
+
+    repo.create(TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE))
+    version = repo.get_version()
+
+    assert repo.rebuild_search_tokens() == 1
+    assert repo.get_version() == version + 1
+
+
+def _offline_repo() -> TransactionRepo:
+    from google.auth.credentials import AnonymousCredentials
+    from google.cloud import firestore
+
+    db = firestore.Client(project="test", credentials=AnonymousCredentials())
+    return TransactionRepo(db, "test-user")
+
+
+def test_repo_iter_search_by_id_reads_on_first_iteration():
+    repo = _offline_repo()
+    tx = _transaction(TransactionType.EXPENSE)
+    reads = []
+
+    def get_many(ids, fields=None):
+        reads.append(ids)
+        return [tx]
+
+    repo._get_many = get_many
+    rows = repo.iter_search(TransactionType.EXPENSE, id=[tx.id])
+
+    assert reads == []
+    assert list(rows) == [tx]
+    assert reads == [[tx.id]]
+
+
+class _RecordingBatch:
+    def __init__(self, db):
+        self.db = db
+        self.refs = []
+
+    def set(self, ref, data, merge=False):
+        self.refs.append(ref.id)
+
+    def create(self, ref, data):
+        self.refs.append(ref.id)
+
+    def commit(self):
+        self.db.committed.append(self.refs)
+        error = self.db.failing.get(len(self.db.committed))
+        if error is not None:
+            raise error
+
+
+class _RecordingDb:
+    def __init__(self, failing=None):
+        self.committed = []
+        # Errors raised by the n-th commit, counting from 1.
+        self.failing = failing or {}
+
+    def batch(self):
+        return _RecordingBatch(self)
+
+
+def test_repo_create_many_commits_each_chunk_with_its_rollup(monkeypatch):
+    from app.repo import transaction_queries
+
+    monkeypatch.setattr(transaction_queries, "BATCH_LIMIT", 3)
+    repo = _offline_repo()
+    repo.db = _RecordingDb(failing={2: ServiceUnavailable("unavailable")})
+    items = [_transaction(TransactionType.EXPENSE) for _ in range(3)]
+
+    errors = repo.create_many(items)
+
+    ids = [str(tx.id) for tx in items]
+    assert repo.db.committed == [[*ids[:2], "monthly"], [ids[2], "monthly"]]
+    # Only the rows of the failed batch, whose rollup write failed with them.
+    assert list(errors) == ids[2:]
+
+
+def test_repo_create_many_counts_resent_rows_as_written_once():
+    repo = _offline_repo()
+    # The batch fails on a row written before; alone, that row fails again.
+    repo.db = _RecordingDb(
+        failing={1: AlreadyExists("exists"), 2: AlreadyExists("exists")}
+    )
+    resent, new = (_transaction(TransactionType.EXPENSE) for _ in range(2))
+
+    errors = repo.create_many([resent, new])
+
+    assert errors == {}
+    assert repo.db.committed[1:] == [
+        [str(resent.id), "monthly"],
+        [str(new.id), "monthly"],
+    ]
+
+
+def test_repo_create_twice_counts_the_transaction_once(firestore_db):
+    repo = TransactionRepo(firestore_db, "test-user")
+    tx = _transaction(TransactionType.EXPENSE, 2.0)
+
+    _ = repo.create(TransactionType.EXPENSE, tx)
+    resent = repo.create(TransactionType.EXPENSE, tx.model_copy(update={"amount": 5.0}))
+    assert repo.create_many([tx]) == {}
+
+    # The stored row is kept and returned.
+    assert resent.amount == 2.0
+    assert repo.get_rollup() == {
+        "2024-01": {"expense": {"test": {"USD": {"count": 1, "total": 2.0}}}}
+    }
+
+
+def test_repo_concurrent_deletes_subtract_a_transaction_once(firestore_db):
+    repo = TransactionRepo(firestore_db, "test-user")
+    kept = repo.create(TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE))
+    tx = repo.create(TransactionType.EXPENSE, _transaction(TransactionType.EXPENSE))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(
+            pool.map(
+                lambda _: TransactionRepo(firestore_db, "test-user").delete(
+                    TransactionType.EXPENSE, [tx.id]
+                ),
+                range(2),
+            )
+        )
+
+    assert sorted(len(ids) for ids in results) == [0, 1]
+    assert repo.get_rollup() == {
+        "2024-01": {"expense": {"test": {"USD": {"count": 1, "total": kept.amount}}}}
+    }
@@ -16,6 +16,7 @@ def test_convert_currency_success(client, monkeypatch, settings_env):
     )
     assert res.status_code == 200
     assert res.json() == {"result": 5.0}
+    assert res.headers["X-Rates-Age"] == "0"
 
 
 def test_convert_currency_timeout(client, monkeypatch, settings_env):
@@ -49,3 +50,128 @@ def test_convert_currency_bad_gateway(client, monkeypatch, settings_env):
     assert res.status_code == 502
     assert res.json() == {"detail": "Bad gateway"}
 
+
+
+def test_convert_currency_reuses_cached_rates(client, monkeypatch, settings_env):
+    from app.infrastructure.currency_api import CurrencyAPIClient
+
+    calls = 0
+
+    async def fake_get_rates(self, currencies):
+        nonlocal calls
+        calls += 1
+        return {"data": {"USD": 1.0, "EUR": 0.5, "JPY": 150.0}}
+
+    monkeypatch.setattr(CurrencyAPIClient, "get_currency_rates", fake_get_rates)
+
+    # Different pairs are all served from the one cached rate table.
+    for from_cur, to_cur in (("USD", "EUR"), ("EUR", "JPY"), ("JPY", "USD")):
+        res = client.get(
+            "/currency/convert",
+            params={"amount": 10, "from_cur": from_cur, "to_cur": to_cur},
+        )
+        assert res.status_code == 200
+
+    assert calls == 1
+    stats = client.get("/metrics/currency").json()["cache"]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+
+
+def test_convert_currency_unsupported_currency(client, monkeypatch, settings_env):
+    from app.infrastructure.currency_api import CurrencyAPIClient
+
+    async def fake_get_rates(self, currencies):
+        return {"data": {"USD": 1.0, "EUR": 0.5}}
+
+    monkeypatch.setattr(CurrencyAPIClient, "get_currency_rates", fake_get_rates)
+
+    res = client.get(
+        "/currency/convert",
+        params={"amount": 10, "from_cur": "USD", "to_cur": "JPY"},
+    )
+    assert res.status_code == 400
+
+
+def test_convert_currency_batch(client, monkeypatch, settings_env):
+    from app.infrastructure.currency_api import CurrencyAPIClient
+
+    calls = 0
+
+    async def fake_get_rates(self, currencies):
+        nonlocal calls
+        calls += 1
+        return {"data": {"USD": 1.0, "EUR": 0.5, "JPY": 150.0}}
+
+    monkeypatch.setattr(CurrencyAPIClient, "get_currency_rates", fake_get_rates)
+
+    res = client.post(
+        "/currency/convert/batch",
+        json={
+            "items": [
+                {"amount": 10, "from_cur": "USD", "to_cur": "EUR"},
+                {"amount": 10, "from_cur": "EUR", "to_cur": "JPY"},
+            ]
+        },
+    )
+    assert res.status_code == 200
+    assert res.json() == {"results": [5.0, 3000.0]}
+    assert calls == 1
+
+
+def test_convert_currency_batch_rejects_invalid_item(client, settings_env):
+    res = client.post(
+        "/currency/convert/batch",
+        json={
+            "items": [
+                {"amount": 10, "from_cur": "USD", "to_cur": "EUR"},
+                {"amount": -1, "from_cur": "USD", "to_cur": "EUR"},
+            ]
+        },
+    )
+    assert res.status_code == 422
+
+
+def test_lifespan_refresher_prewarms_rate_table(app, monkeypatch, settings_env):
+    from fastapi.testclient import TestClient
+
+    from app.core import config
+    from app.infrastructure.currency_api import CurrencyAPIClient
+
+    calls = 0
+
+    async def fake_get_rates(self, currencies):
+        nonlocal calls
+        calls += 1
+        return {"data": {"USD": 1.0, "EUR": 0.5}}
+
+    monkeypatch.setattr(CurrencyAPIClient, "get_currency_rates", fake_get_rates)
+    monkeypatch.setenv("CURRENCY_REFRESH_INTERVAL", "3600")
+    config.get_settings.cache_clear()
+
+    with TestClient(app) as refreshed_client:
+        res = refreshed_client.get(
+            "/currency/convert",
+            params={"amount": 10, "from_cur": "USD", "to_cur": "EUR"},
+        )
+        assert res.status_code == 200
+        assert res.json() == {"result": 5.0}
+
+    # The conversion was served by (or joined) the refresher's fetch.
+    assert calls == 1
+
+
+def test_convert_currency_circuit_open(client, monkeypatch, settings_env):
+    from app.errors.currency import CircuitOpenError
+    from app.infrastructure.currency_api import CurrencyAPIClient
+
+    async def raise_circuit_open(self, currencies):
+        raise CircuitOpenError()
+
+    monkeypatch.setattr(CurrencyAPIClient, "get_currency_rates", raise_circuit_open)
+
+    res = client.get(
+        "/currency/convert",
+        params={"amount": 10, "from_cur": "USD", "to_cur": "EUR"},
+    )
+    assert res.status_code == 503
@@ -85,5 +85,171 @@ def test_search_income_endpoint_filters_by_transaction_type(client, app, firesto
     assert all(item["transaction_type"] == "income" for item in data)
     assert income_id in [item["id"] for item in data]
     assert 10.0 not in [item["amount"] for item in data]
+    assert res.headers["x-order-by"] == "occurred_at"
+
+    bounded = client.get(
+        "/transactions/search",
+        params={"transaction_type": "income", "min_amount_base": 0},
+    )
+    assert bounded.status_code == 200
+    assert bounded.headers["x-order-by"] == "amount_base"
+
+    client.app.dependency_overrides.clear()
+
+
+def test_list_endpoint_streams_ndjson_when_requested(client, app, firestore_db):
+    import json
+
+    from app.dependencies.auth import get_current_user_id
+    from app.dependencies.db import get_firestore_client
+
+    client.app.dependency_overrides[get_firestore_client] = lambda: firestore_db
+    client.app.dependency_overrides[get_current_user_id] = lambda: "test-user"
+
+    body = {
+        "currency": "USD",
+        "exchange_rate": None,
+        "transaction_type": "expense",
+        "category": "food",
+        "description": None,
+        "business_name": None,
+        "payment_method": None,
+        "occurred_at": datetime(2024, 1, 1, tzinfo=timezone.utc).isoformat(),
+    }
+    for amount in (1.0, 2.0, 3.0):
+        assert (
+            client.post("/transactions", json=body | {"amount": amount}).status_code
+            == 201
+        )
+
+    res = client.get(
+        "/transactions",
+        params={"limit": 100},
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert sorted(row["amount"] for row in rows) == [1.0, 2.0, 3.0]
+
+    client.app.dependency_overrides.clear()
+
+
+def test_list_endpoint_answers_matching_etag_with_304_without_querying(client, app):
+    from app.dependencies.auth import get_current_user_id
+    from app.dependencies.services import get_transaction_repo
+
+    class Repo:
+        version = 1
+        reads = 0
+
+        def get_version(self):
+            return self.version
+
+        def list(self, limit, offset, cursor, fields):
+            self.reads += 1
+            return []
+
+    repo = Repo()
+    client.app.dependency_overrides[get_transaction_repo] = lambda: repo
+    client.app.dependency_overrides[get_current_user_id] = lambda: "test-user"
+
+    first = client.get("/transactions", params={"limit": 20})
+    etag = first.headers["etag"]
+    again = client.get(
+        "/transactions", params={"limit": 20}, headers={"If-None-Match": etag}
+    )
+    repo.version = 2
+    changed = client.get(
+        "/transactions", params={"limit": 20}, headers={"If-None-Match": etag}
+    )
+
+    assert first.status_code == 200
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    for res in (first, again):
+        assert res.headers["cache-control"] == "private, no-cache"
+        assert "Authorization" in res.headers["vary"]
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert repo.reads == 2
+
+    client.app.dependency_overrides.clear()
+
+
+def test_export_endpoint_streams_csv_chunks(client, app):
+    import csv
+    import io
+
+    from app.dependencies.auth import get_current_user_id
+    from app.dependencies.services import get_transaction_repo
+    from app.models.transaction_models import Transaction
+
+    def tx(amount):
+        return Transaction(
+            amount=amount,
+            exchange_rate=None,
+            transaction_type="expense",
+            category="food",
+            description=None,
+            business_name=None,
+            payment_method=None,
+        )
+
+    class Repo:
+        def iter_export(self):
+            yield [tx(1.0), tx(2.0)]
+            yield [tx(3.0)]
+
+    client.app.dependency_overrides[get_transaction_repo] = lambda: Repo()
+    client.app.dependency_overrides[get_current_user_id] = lambda: "test-user"
+
+    res = client.get("/transactions/export", params={"format": "csv"})
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/csv")
+    assert "transactions.csv" in res.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert [row["amount"] for row in rows] == ["1.0", "2.0", "3.0"]
+
+    client.app.dependency_overrides.clear()
+
+
+def test_export_endpoint_streams_parquet(client, app):
+    import io
+
+    import pyarrow.parquet as pq
+
+    from app.dependencies.auth import get_current_user_id
+    from app.dependencies.services import get_transaction_repo
+    from app.models.transaction_models import Transaction
+
+    def tx(amount):
+        return Transaction(
+            amount=amount,
+            exchange_rate=None,
+            transaction_type="expense",
+            category="food",
+            description=None,
+            business_name=None,
+            payment_method=None,
+        )
+
+    class Repo:
+        def iter_export(self):
+            yield [tx(1.0), tx(2.0)]
+            yield [tx(3.0)]
+
+    client.app.dependency_overrides[get_transaction_repo] = lambda: Repo()
+    client.app.dependency_overrides[get_current_user_id] = lambda: "test-user"
+
+    res = client.get("/transactions/export", params={"format": "parquet"})
+
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/vnd.apache.parquet"
+    assert "transactions.parquet" in res.headers["content-disposition"]
+    table = pq.read_table(io.BytesIO(res.content))
+    assert table.column("amount").to_pylist() == [1.0, 2.0, 3.0]
 
     client.app.dependency_overrides.clear()
@@ -1,6 +1,7 @@
 import asyncio
 import httpx
 
+from app.infrastructure.rate_table import RateTable
 from app.services.currency_service import CurrencyService
 
 
@@ -8,8 +9,8 @@ class DummyAPIClient:
     def __init__(self, result):
         self._result = result
 
-    async def get_currency_rates(self, currencies):
-        return self._result
+    async def get_rate_table(self):
+        return RateTable.from_response(self._result)
 
 
 def test_convert_success():
@@ -20,9 +21,18 @@ def test_convert_success():
     assert result == 5.0
 
 
+def test_convert_uses_cross_rate_between_non_base_currencies():
+    api_client = DummyAPIClient({"data": {"USD": 1.0, "EUR": 0.5, "JPY": 150.0}})
+    svc = CurrencyService(api_client)
+
+    # 10 EUR -> 20 USD -> 3000 JPY
+    result = asyncio.run(svc.convert(10, "EUR", "JPY"))
+    assert result == 3000.0
+
+
 def test_convert_propagates_timeout():
     class TimeoutAPIClient:
-        async def get_currency_rates(self, currencies):
+        async def get_rate_table(self):
             raise httpx.TimeoutException("timeout")
 
     svc = CurrencyService(TimeoutAPIClient())
@@ -33,3 +43,24 @@ def test_convert_propagates_timeout():
     except httpx.TimeoutException:
         pass
 
+
+
+def test_convert_batch_vectorized_matches_scalar():
+    from app.models.currency_models import CurrencyConvertReq
+
+    api_client = DummyAPIClient({"data": {"USD": 1.0, "EUR": 0.5, "JPY": 150.0}})
+    svc = CurrencyService(api_client)
+    pairs = [("USD", "EUR"), ("EUR", "JPY"), ("JPY", "USD")]
+    items = [
+        CurrencyConvertReq(
+            amount=i + 1, from_cur=pairs[i % 3][0], to_cur=pairs[i % 3][1]
+        )
+        for i in range(200)
+    ]
+
+    results = asyncio.run(svc.convert_batch(items))
+    expected = [
+        asyncio.run(svc.convert(item.amount, item.from_cur, item.to_cur))
+        for item in items
+    ]
+    assert results == expected
@@ -0,0 +1,68 @@
+from datetime import date, datetime, timezone
+
+from pydantic_extra_types.currency_code import Currency
+
+from app.infrastructure.rate_history import RateHistory
+from app.infrastructure.rate_table import RateTable
+from app.models.transaction_models import Transaction, TransactionType
+from app.services.exchange_rate_service import ExchangeRateService
+
+
+def _tx(currency: str, exchange_rate: float | None = None) -> Transaction:
+    return Transaction(
+        amount=10.0,
+        exchange_rate=exchange_rate,
+        currency=Currency(currency),
+        transaction_type=TransactionType.EXPENSE,
+        category=None,
+        description=None,
+        business_name=None,
+        payment_method=None,
+        occurred_at=datetime(2024, 1, 2, tzinfo=timezone.utc),
+    )
+
+
+def test_fill_sets_rate_of_the_transaction_day():
+    history = RateHistory()
+    history.add(date(2024, 1, 1), RateTable({"USD": 1.0, "EUR": 0.5, "JPY": 150.0}))
+    svc = ExchangeRateService(history, "JPY")
+
+    filled = svc.fill([_tx("USD"), _tx("EUR"), _tx("USD", exchange_rate=1.0)])
+
+    assert [tx.exchange_rate for tx in filled] == [150.0, 300.0, 1.0]
+    assert [tx.amount_base for tx in filled] == [1500.0, 3000.0, 10.0]
+
+
+def test_fill_leaves_rate_empty_without_history():
+    svc = ExchangeRateService(RateHistory(), "JPY")
+
+    filled = svc.fill([_tx("USD")])
+
+    assert filled[0].exchange_rate is None
+    assert filled[0].amount_base is None
+
+
+def test_rates_of_prefers_the_stored_rate_of_each_row():
+    history = RateHistory()
+    history.add(date(2024, 1, 1), RateTable({"USD": 1.0, "JPY": 150.0}))
+    svc = ExchangeRateService(history, "JPY")
+    day = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+    rates = svc.rates_of(
+        [
+            {"currency": "USD", "occurred_at": day, "exchange_rate": 140.0},
+            {"currency": "USD", "occurred_at": day},
+            {"currency": "USD", "occurred_at": datetime(2023, 1, 1)},
+        ]
+    )
+
+    assert rates == [140.0, 150.0, None]
+
+
+def test_fill_converts_home_currency_without_history():
+    svc = ExchangeRateService(RateHistory(), "JPY")
+
+    filled = svc.fill([_tx("JPY"), _tx("USD")])
+
+    assert [tx.exchange_rate for tx in filled] == [1.0, None]
+    assert [tx.amount_base for tx in filled] == [10.0, None]
@@ -1,19 +1,27 @@
 import asyncio
 from datetime import datetime, timezone
 
+from fastapi import HTTPException
 from pydantic_extra_types.currency_code import Currency
 import pytest
 from pydantic import ValidationError
 
+from app.errors.transaction import QueryTooBroadError, SummaryTooLargeError
+from app.infrastructure.rate_history import RateHistory
 from app.models.transaction_models import (
     Transaction,
+    TransactionBatchCreateReq,
     TransactionDeleteReq,
     TransactionGetReq,
     TransactionListReq,
     TransactionSearchReq,
+    TransactionSummaryReq,
     TransactionType,
 )
+from app.repo import transaction_queries as queries
+from app.repo.query_planner import RESIDUAL_PAGE_LIMIT
 from app.repo.transaction_repo import TransactionRepo
+from app.services.exchange_rate_service import ExchangeRateService
 from app.services.transaction_service import TransactionService
 
 
@@ -50,7 +58,8 @@ def test_transaction_service_all_functions(firestore_db):
     assert got.id == created_expense.id
 
     tx_list = asyncio.run(svc.list(TransactionListReq(limit=20)))
-    tx_by_id = {tx.id: tx for tx in tx_list}
+    assert tx_list.next_cursor is None
+    tx_by_id = {tx.id: tx for tx in tx_list.items}
     assert created_income.id in tx_by_id
     assert created_expense.id in tx_by_id
     assert tx_by_id[created_income.id].transaction_type == TransactionType.INCOME
@@ -64,8 +73,8 @@ def test_transaction_service_all_functions(firestore_db):
             )
         )
     )
-    assert len(by_id) == 2
-    assert by_id[0].id == created_expense.id
+    assert len(by_id.items) == 2
+    assert by_id.items[0].id == created_expense.id
 
     deleted = asyncio.run(svc.delete(TransactionDeleteReq(id=[created_expense.id])))
     assert deleted.id == [created_expense.id]
@@ -78,3 +87,225 @@ def test_transaction_list_req_disallows_id_with_other_filters():
             id=["any-id"],
             min_amount=1,
         )
+
+
+class _StreamingRepo:
+    def __init__(self, rows: list[Transaction]):
+        self.rows = rows
+
+    def iter_list(self, limit, offset, cursor, fields):
+        return iter(self.rows[:limit])
+
+
+class _AsyncStreamingRepo(_StreamingRepo):
+    def iter_list(self, limit, offset, cursor, fields):
+        async def rows():
+            for tx in self.rows[:limit]:
+                yield tx
+
+        return rows()
+
+
+@pytest.mark.parametrize("repo_cls", [_StreamingRepo, _AsyncStreamingRepo])
+def test_stream_list_yields_one_json_line_per_row(repo_cls):
+    rows = [_tx(TransactionType.EXPENSE, float(i + 1)) for i in range(3)]
+    svc = TransactionService(repo_cls(rows))
+
+    async def collect():
+        return [line async for line in svc.stream_list(TransactionListReq(limit=2))]
+
+    lines = asyncio.run(collect())
+
+    assert [Transaction.model_validate_json(line) for line in lines] == rows[:2]
+    assert all(line.endswith(b"\n") for line in lines)
+
+
+class _BulkRepo:
+    def __init__(self, failing: set[str]):
+        self.failing = failing
+        self.written: list[Transaction] = []
+
+    def create_many(self, items):
+        self.written.extend(items)
+        return {str(tx.id): "unavailable" for tx in items if str(tx.id) in self.failing}
+
+
+def test_create_batch_reports_per_item_status():
+    items = [_tx(TransactionType.EXPENSE, float(i + 1)) for i in range(3)]
+    repo = _BulkRepo(failing={str(items[1].id)})
+    svc = TransactionService(repo)
+
+    res = asyncio.run(svc.create_batch(TransactionBatchCreateReq(items=items)))
+
+    assert repo.written == items
+    assert [r.id for r in res.results] == [tx.id for tx in items]
+    assert [r.created for r in res.results] == [True, False, True]
+    assert res.results[1].error == "unavailable"
+    assert (res.created, res.failed) == (2, 1)
+
+
+def test_batch_create_req_rejects_empty_and_oversized_batches():
+    with pytest.raises(ValidationError):
+        TransactionBatchCreateReq(items=[])
+    with pytest.raises(ValidationError):
+        TransactionBatchCreateReq(
+            items=[_tx(TransactionType.EXPENSE, 1.0) for _ in range(501)]
+        )
+
+
+class _SummaryRepo:
+    def __init__(self, categories: list[str | None]):
+        self.known = categories
+        self.calls: list[tuple] = []
+
+    def categories(self, transaction_type, start, end, currency):
+        return self.known
+
+    def summarize(
+        self, transaction_type, ranges, categories, currency, amount_field="amount"
+    ):
+        self.calls.append((ranges, categories))
+        self.amount_field = amount_field
+        per_range = len(categories) if categories is not None else 1
+        return [(i + 1, float(i + 1)) for i in range(len(ranges) * per_range)]
+
+
+def _summary_req(**kwargs) -> TransactionSummaryReq:
+    return TransactionSummaryReq(
+        transaction_type=TransactionType.EXPENSE,
+        start=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        end=datetime(2024, 3, 1, tzinfo=timezone.utc),
+        **kwargs,
+    )
+
+
+def test_summary_groups_by_month_and_discovered_categories():
+    repo = _SummaryRepo(["food", None])
+    svc = TransactionService(repo)
+
+    res = asyncio.run(svc.summary(_summary_req(group_by="month,category")))
+
+    assert [(b.month, b.category) for b in res.buckets] == [
+        ("2024-01", "food"),
+        ("2024-01", None),
+        ("2024-02", "food"),
+        ("2024-02", None),
+    ]
+    assert [b.count for b in res.buckets] == [1, 2, 3, 4]
+    assert (res.count, res.total) == (10, 10.0)
+    [(ranges, categories)] = repo.calls
+    assert len(ranges) == 2
+    assert categories == ["food", None]
+
+
+def test_summary_without_month_uses_one_range_and_given_categories():
+    repo = _SummaryRepo([])
+    svc = TransactionService(repo)
+
+    res = asyncio.run(
+        svc.summary(_summary_req(group_by=["category"], category=["rent", "food"]))
+    )
+
+    assert [(b.month, b.category) for b in res.buckets] == [
+        (None, "rent"),
+        (None, "food"),
+    ]
+    [(ranges, _)] = repo.calls
+    assert ranges == [
+        (
+            datetime(2024, 1, 1, tzinfo=timezone.utc),
+            datetime(2024, 3, 1, tzinfo=timezone.utc),
+        )
+    ]
+
+
+def test_summary_with_base_adds_up_amount_base_in_the_home_currency():
+    repo = _SummaryRepo([])
+    rates = ExchangeRateService(RateHistory(), "JPY")
+    svc = TransactionService(repo, rates)
+
+    res = asyncio.run(svc.summary(_summary_req(base=True)))
+
+    assert repo.amount_field == "amount_base"
+    assert res.base_currency == "JPY"
+
+
+class _OversizedSummaryRepo(_SummaryRepo):
+    def summarize(self, transaction_type, ranges, categories, currency, amount_field):
+        raise SummaryTooLargeError(1000, 300)
+
+
+def test_summary_maps_too_many_buckets_to_400():
+    svc = TransactionService(_OversizedSummaryRepo(["food"]))
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(svc.summary(_summary_req(group_by="month,category")))
+
+    assert e.value.status_code == 400
+
+
+class _BroadSearchRepo:
+    def search(self, transaction_type, **filters):
+        raise QueryTooBroadError(2000)
+
+
+def test_search_maps_too_broad_queries_to_400():
+    svc = TransactionService(_BroadSearchRepo())
+    params = TransactionSearchReq(
+        transaction_type=TransactionType.EXPENSE, min_amount=10, limit=20
+    )
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(svc.search(params))
+
+    assert e.value.status_code == 400
+
+
+class _PageRepo:
+    def search(self, transaction_type, **filters):
+        tx = _tx(transaction_type, 5.0).model_copy(update={"amount_base": 750.0})
+        return [tx] * filters["limit"]
+
+
+def test_search_cursor_points_into_amount_base_when_it_is_bounded():
+    svc = TransactionService(_PageRepo())
+    params = TransactionSearchReq(
+        transaction_type=TransactionType.EXPENSE, min_amount_base=100, limit=2
+    )
+
+    page = asyncio.run(svc.search(params))
+
+    assert page.next_cursor is not None
+    assert (
+        queries.decode_cursor(page.next_cursor, "amount_base")["amount_base"] == 750.0
+    )
+
+
+def test_search_pages_residual_searches_without_a_limit():
+    svc = TransactionService(_PageRepo())
+    # `min_amount` is checked in memory, since searches are sorted by `occurred_at`.
+    params = TransactionSearchReq(
+        transaction_type=TransactionType.EXPENSE, min_amount=1
+    )
+
+    page = asyncio.run(svc.search(params))
+
+    assert len(page.items) == RESIDUAL_PAGE_LIMIT
+    assert page.next_cursor is not None
+
+
+def test_search_req_rejects_terms_without_word_characters():
+    with pytest.raises(ValidationError):
+        TransactionSearchReq(transaction_type=TransactionType.EXPENSE, q="--")
+
+    params = TransactionSearchReq(transaction_type=TransactionType.EXPENSE, q="カフェ")
+    assert params.q == "カフェ"
+
+
+def test_summary_req_rejects_empty_range():
+    with pytest.raises(ValidationError):
+        TransactionSummaryReq(
+            transaction_type=TransactionType.EXPENSE,
+            start=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            end=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        )
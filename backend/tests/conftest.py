@@ -14,8 +14,10 @@ def app() -> FastAPI:
 
 
 @pytest.fixture
-def client(app: FastAPI) -> TestClient:
-    return TestClient(app)
+def client(app: FastAPI):
+    # Entering the client runs the app lifespan (shared HTTP client, etc.).
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 @pytest.fixture(autouse=True)
@@ -34,6 +36,8 @@ def settings_env(monkeypatch):
     monkeypatch.setenv("JWT_AUTH_ALGORITHM", "RS256")
     monkeypatch.setenv("JWT_AUTH_EXPIRES", "3600")
     monkeypatch.setenv("JWT_REFRESH_EXPIRES", "20")
+    # Keep the background rate refresher from calling the real currency API.
+    monkeypatch.setenv("CURRENCY_REFRESH_INTERVAL", "0")
     yield
     config.get_settings.cache_clear()
 